@@ -0,0 +1,385 @@
+"""
+Benchmarks e regressão do caminho quente do decode.
+
+Gera arquivos tj!/tje/tjz sintéticos (Lua de 1 KB até atlas de 64 MB)
+cifrados com um XXTEA de encrypt compatível com o sub_4D1DB4, mede MB/s,
+latência por arquivo (p50/p90/p99) e pico de RSS de cada backend e do
+Decode All serial vs paralelo, e salva tudo em JSON para comparar runs.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_decode --verify
+    python -m benchmarks.bench_decode --profile quick -o bench.json
+    python -m benchmarks.bench_decode --profile full -o novo.json --compare bench.json
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+from decoder import tjxxtea
+from decoder.decode_logic import (
+    ParallelDecoder,
+    decode_file_low_memory,
+    decode_single_file,
+    iter_tj_files,
+)
+from decoder.keygen import BASE_KEY_HEX, KeyDeriver, derive_file_key, parse_hex_bytes
+from tests.synthetic import make_tj_bytes, synthetic_plain, xxtea_encrypt
+
+GOLDEN_PATH = Path(__file__).with_name("golden_vectors.json")
+
+KB = 1024
+MB = 1024 * KB
+
+# tamanhos de payload por perfil
+PROFILES = {
+    "quick": [1 * KB, 16 * KB, 256 * KB, 1 * MB],
+    "full": [1 * KB, 16 * KB, 256 * KB, 1 * MB, 8 * MB, 64 * MB],
+}
+
+# o motor numpy só compensa em lote: mede lotes deste tamanho até este limite
+NUMPY_BATCH_ROWS = 64
+NUMPY_MAX_SIZE = 64 * KB
+
+
+# ----------------------------------------------------------------------
+# Corpus sintético
+# ----------------------------------------------------------------------
+def build_corpus(root: Path, sizes: list[int], per_size: int = 1, seed: int = 1234) -> list[Path]:
+    """Cria tj! (Lua/JSON), tje (PNG) e tjz (zlib) de cada tamanho."""
+    rng = random.Random(seed)
+    base_key = parse_hex_bytes(BASE_KEY_HEX)
+    kinds = [(b"tj!", "lua", ".lua"), (b"tj!", "json", ".json"),
+             (b"tje", "png", ".png"), (b"tjz", "zlib", ".lua")]
+    paths: list[Path] = []
+    for si, size in enumerate(sizes):
+        for n in range(per_size):
+            magic, kind, ext = kinds[(n + si) % len(kinds)]
+            path = root / f"s{size}" / f"{kind}_{n}{ext}"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(make_tj_bytes(magic, synthetic_plain(kind, size, rng), rng.randbytes(16), base_key))
+            paths.append(path)
+    return paths
+
+
+# ----------------------------------------------------------------------
+# Medições (cada caso roda num processo novo para o RSS ser do caso)
+# ----------------------------------------------------------------------
+def _maxrss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux em KB, macOS em bytes
+    return rss / (MB if sys.platform == "darwin" else KB)
+
+
+def _percentiles(samples: list[float]) -> dict:
+    s = sorted(samples)
+
+    def pick(q: float) -> float:
+        return s[min(len(s) - 1, int(round(q * (len(s) - 1))))]
+
+    return {"p50_ms": pick(0.50) * 1e3, "p90_ms": pick(0.90) * 1e3, "p99_ms": pick(0.99) * 1e3}
+
+
+def _case_backend(backend: str, size: int, seed: int, repeat: int) -> dict:
+    rng = random.Random(seed)
+    key = rng.randbytes(16)
+    rows = NUMPY_BATCH_ROWS if backend == "numpy-batch" else 1
+    cipher = [xxtea_encrypt(rng.randbytes(size), key) for _ in range(rows)]
+
+    rss_before = _maxrss_mb()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        if backend == "numpy-batch":
+            tjxxtea.tj_xxtea_decrypt_many([(c, key) for c in cipher], backend="numpy")
+        else:
+            tjxxtea.tj_xxtea_decrypt_bytes(cipher[0], key, backend=backend)
+        samples.append(time.perf_counter() - t0)
+
+    best = min(samples)
+    return {
+        "bytes": size * rows,
+        "mb_per_sec": size * rows / best / MB,
+        "rss_before_mb": rss_before,
+        "peak_rss_mb": _maxrss_mb(),
+        **_percentiles(samples),
+    }
+
+
+def _case_file(mode: str, path: str, repeat: int) -> dict:
+    src = Path(path)
+    out = src.with_name(src.name + ".bench_out")
+    rss_before = _maxrss_mb()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        if mode == "low_memory":
+            decode_file_low_memory(src, out)
+        else:
+            decode_single_file(src, out, low_memory=False)
+        samples.append(time.perf_counter() - t0)
+    out.unlink(missing_ok=True)
+
+    size = src.stat().st_size
+    return {
+        "bytes": size,
+        "mb_per_sec": size / min(samples) / MB,
+        "rss_before_mb": rss_before,
+        "peak_rss_mb": _maxrss_mb(),
+        **_percentiles(samples),
+    }
+
+
+def _in_child(fn, *args) -> dict:
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def bench_backends(sizes: list[int], repeat: int) -> list[dict]:
+    backends = ["python"] + (["numpy-batch"] if tjxxtea.NUMPY_AVAILABLE else [])
+    results = []
+    for size in sizes:
+        for backend in backends:
+            if backend == "numpy-batch" and size > NUMPY_MAX_SIZE:
+                continue
+            # arquivos grandes: uma repetição basta
+            reps = repeat if size <= MB else 1
+            res = _in_child(_case_backend, backend, size, size, reps)
+            results.append({"case": "xxtea", "backend": backend, "size": size, **res})
+            _progress(f"xxtea {backend:12s} {size:>10d} B  {res['mb_per_sec']:8.3f} MB/s")
+    return results
+
+
+def bench_files(corpus: list[Path], repeat: int) -> list[dict]:
+    results = []
+    for path in corpus:
+        size = path.stat().st_size
+        for mode in ("single", "low_memory"):
+            reps = repeat if size <= MB else 1
+            res = _in_child(_case_file, mode, str(path), reps)
+            results.append({"case": "decode_file", "mode": mode, "file": path.name, "size": size, **res})
+            _progress(f"file  {mode:12s} {size:>10d} B  {res['mb_per_sec']:8.3f} MB/s  "
+                      f"rss {res['peak_rss_mb']:.0f} MB")
+    return results
+
+
+def bench_keygen(n: int = 100_000) -> dict:
+    rng = random.Random(7)
+    base = parse_hex_bytes(BASE_KEY_HEX)
+    headers = [rng.randbytes(16) for _ in range(256)]
+
+    t0 = time.perf_counter()
+    for i in range(n):
+        derive_file_key(base, headers[i & 255])
+    reference = time.perf_counter() - t0
+
+    deriver = KeyDeriver(base)
+    t0 = time.perf_counter()
+    for i in range(n):
+        deriver.derive(headers[i & 255])
+    cached = time.perf_counter() - t0
+
+    res = {"case": "keygen", "calls": n,
+           "reference_us": reference / n * 1e6, "key_deriver_us": cached / n * 1e6}
+    _progress(f"keygen ref {res['reference_us']:.2f} us/call, KeyDeriver {res['key_deriver_us']:.2f} us/call")
+    return res
+
+
+def bench_decode_all(root: Path, workers_list: list[int]) -> list[dict]:
+    jobs = list(iter_tj_files(root, True, True, True, with_head=True))
+    total_bytes = sum(p.stat().st_size for p, _, _ in jobs)
+    results = []
+    for workers in workers_list:
+        decoder = ParallelDecoder(workers=workers)
+        t0 = time.perf_counter()
+        events = decoder.start(jobs)
+        errors = 0
+        while True:
+            kind, payload = events.get()
+            if kind == "result" and not payload.ok:
+                errors += 1
+            elif kind == "done":
+                break
+        elapsed = time.perf_counter() - t0
+        res = {"case": "decode_all", "workers": workers, "files": len(jobs), "errors": errors,
+               "seconds": elapsed, "files_per_sec": len(jobs) / elapsed,
+               "mb_per_sec": total_bytes / elapsed / MB}
+        results.append(res)
+        _progress(f"decode_all workers={workers:<3d} {res['files_per_sec']:8.1f} arq/s  "
+                  f"{res['mb_per_sec']:8.3f} MB/s  erros={errors}")
+    return results
+
+
+def _progress(msg: str) -> None:
+    print(msg, file=sys.stderr, flush=True)
+
+
+# ----------------------------------------------------------------------
+# Regressão: golden vectors e equivalência entre backends
+# ----------------------------------------------------------------------
+def make_golden(seed: int = 20240101) -> list[dict]:
+    """Vetores gerados com o encrypt acima e conferidos pelo backend de referência."""
+    rng = random.Random(seed)
+    base = parse_hex_bytes(BASE_KEY_HEX)
+    vectors = []
+    for size in (0, 1, 3, 4, 5, 7, 8, 13, 47, 48, 52, 53, 200, 207, 1000, 4099):
+        header = rng.randbytes(16)
+        plain = rng.randbytes(size)
+        data = make_tj_bytes(b"tje", plain, header, base)
+        assert tjxxtea.tj_xxtea_decrypt_bytes(data[23:], derive_file_key(base, header), "python") == plain
+        vectors.append({
+            "size": size,
+            "header_size": 23,
+            "file_hex": data.hex(),
+            "plain_sha256": hashlib.sha256(plain).hexdigest(),
+        })
+    return vectors
+
+
+def _decrypt_all_backends(data: bytes, key: bytes) -> dict[str, bytes]:
+    """Plaintext de cada backend para o mesmo payload."""
+    outputs = {name: tjxxtea.tj_xxtea_decrypt_bytes(data, key, backend=name) for name in tjxxtea.BACKENDS}
+    outputs["batch"] = tjxxtea.tj_xxtea_decrypt_many([(data, key)] * NUMPY_BATCH_ROWS)[0]
+
+    from decoder.decode_logic import _new_word_buffer
+
+    words = _new_word_buffer((len(data) + 3) // 4)
+    memoryview(words).cast("B")[:len(data)] = data
+    if sys.byteorder == "big":
+        words.byteswap()
+    v43 = tjxxtea.tj_xxtea_decrypt_inplace(words, key)
+    if sys.byteorder == "big":
+        words.byteswap()
+    outputs["inplace"] = memoryview(words).cast("B")[:v43].tobytes()
+    return outputs
+
+
+def verify(random_cases: int = 100) -> list[str]:
+    """Confere golden vectors e equivalência entre backends. Retorna as falhas."""
+    failures: list[str] = []
+    base = parse_hex_bytes(BASE_KEY_HEX)
+
+    golden = json.loads(GOLDEN_PATH.read_text())
+    for vec in golden:
+        data = bytes.fromhex(vec["file_hex"])
+        hs = vec["header_size"]
+        key = derive_file_key(base, data[3:19])
+        if not data[hs:]:
+            continue
+        plain = tjxxtea.tj_xxtea_decrypt_bytes(data[hs:], key, backend="python")
+        if tjxxtea.tj_xxtea_encrypt_bytes(plain, key) != data[hs:]:
+            failures.append(f"golden size={vec['size']} encrypt")
+        for name, plain in _decrypt_all_backends(data[hs:], key).items():
+            if hashlib.sha256(plain).hexdigest() != vec["plain_sha256"]:
+                failures.append(f"golden size={vec['size']} backend={name}")
+
+    rng = random.Random(99)
+    for _ in range(random_cases):
+        plain = rng.randbytes(rng.choice([1, 2, 5, 9, 31, 64, 255, 1024, rng.randrange(1, 3000)]))
+        key = rng.randbytes(16)
+        cipher = xxtea_encrypt(plain, key)
+        if tjxxtea.tj_xxtea_encrypt_bytes(plain, key) != cipher:
+            failures.append(f"encrypt size={len(plain)}")
+        if tjxxtea.tj_xxtea_encrypt_many([(plain, key)] * NUMPY_BATCH_ROWS)[0] != cipher:
+            failures.append(f"encrypt batch size={len(plain)}")
+        for name, out in _decrypt_all_backends(cipher, key).items():
+            if out != plain:
+                failures.append(f"round-trip size={len(plain)} backend={name}")
+
+    return failures
+
+
+# ----------------------------------------------------------------------
+# Comparação de runs
+# ----------------------------------------------------------------------
+def _case_key(r: dict) -> str:
+    return "/".join(str(r.get(k)) for k in ("case", "backend", "mode", "size", "file", "workers") if k in r)
+
+
+def compare(new: dict, old: dict, threshold: float = 0.10) -> list[str]:
+    """Linhas com a variação de MB/s por caso; marca regressões acima do limite."""
+    old_by_key = {_case_key(r): r for r in old.get("results", [])}
+    lines = []
+    for r in new.get("results", []):
+        prev = old_by_key.get(_case_key(r))
+        if not prev or "mb_per_sec" not in r or not prev.get("mb_per_sec"):
+            continue
+        ratio = r["mb_per_sec"] / prev["mb_per_sec"]
+        flag = "  << REGRESSÃO" if ratio < 1 - threshold else ""
+        lines.append(f"{_case_key(r):60s} {prev['mb_per_sec']:9.3f} -> {r['mb_per_sec']:9.3f} MB/s "
+                     f"({ratio:5.2f}x){flag}")
+    return lines
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_decode", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument("--repeat", type=int, default=5, help="repetições por caso pequeno")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processos do Decode All paralelo")
+    parser.add_argument("-o", "--output", type=Path, help="salva os resultados em JSON")
+    parser.add_argument("--compare", type=Path, help="JSON de um run anterior para comparar")
+    parser.add_argument("--verify", action="store_true", help="só roda a regressão (golden vectors)")
+    parser.add_argument("--write-golden", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.write_golden:
+        GOLDEN_PATH.write_text(json.dumps(make_golden(), indent=1) + "\n")
+        return 0
+
+    failures = verify()
+    for f in failures:
+        _progress(f"[FALHA] {f}")
+    if args.verify or failures:
+        _progress("Regressão OK." if not failures else f"{len(failures)} falhas de regressão.")
+        return 1 if failures else 0
+
+    sizes = PROFILES[args.profile]
+    results: list[dict] = []
+    results += bench_backends(sizes, args.repeat)
+    results.append(bench_keygen())
+
+    tmp = Path(tempfile.mkdtemp(prefix="tj_bench_"))
+    try:
+        corpus = build_corpus(tmp / "files", sizes)
+        results += bench_files(corpus, args.repeat)
+
+        # Decode All: muitos assets pequenos (caso típico de um dump)
+        build_corpus(tmp / "dump", [1 * KB, 4 * KB, 16 * KB], per_size=150)
+        results += bench_decode_all(tmp / "dump", sorted({1, args.workers}))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    report = {
+        "profile": args.profile,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "numpy": tjxxtea.NUMPY_AVAILABLE,
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=1) + "\n")
+        _progress(f"Resultados salvos em {args.output}")
+    if args.compare:
+        for line in compare(report, json.loads(args.compare.read_text())):
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,231 @@
+"""
+Decode direto do APK/OBB (zip), sem extrair o client para o disco.
+
+O scan usa só o diretório central do zip: membros pequenos demais são
+descartados sem abrir, e dos demais só o começo é inflado para ler o
+magic + header. No decode cada membro tj!/tje/tjz é lido pelo stream do
+ZipFile e a saída vai para uma pasta (mesma árvore do zip) ou para um
+zip novo.
+"""
+from __future__ import annotations
+
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path, PurePosixPath
+
+from .decode_logic import (
+    DEFAULT_CHUNK_SIZE,
+    HEAD_SIZE,
+    LOW_MEMORY_THRESHOLD,
+    DecodeResult,
+    _decrypt_stream_low_memory,
+    _load_tj_stream,
+    _post_plain,
+    _write_output,
+    tj_type_from_bytes,
+)
+from .postprocess import classify_plain
+from .sink import ZipSink
+from .tjxxtea import tj_xxtea_decrypt_bytes, tj_xxtea_decrypt_many
+
+ARCHIVE_SUFFIXES = {".apk", ".obb", ".zip"}
+
+
+def is_archive(path: str | Path) -> bool:
+    """True para um arquivo .apk/.obb/.zip que é de fato um zip."""
+    p = Path(path)
+    return p.suffix.lower() in ARCHIVE_SUFFIXES and p.is_file() and zipfile.is_zipfile(p)
+
+
+def _safe_member_path(name: str) -> PurePosixPath | None:
+    """Caminho relativo do membro, ou None se for absoluto ou tiver '..'."""
+    rel = PurePosixPath(name)
+    if rel.is_absolute() or ".." in rel.parts or not rel.parts:
+        return None
+    return rel
+
+
+def iter_zip_tj_files(archive: str | Path | zipfile.ZipFile,
+                      include_tj_bang: bool = True,
+                      include_tje: bool = True,
+                      include_tjz: bool = False):
+    """Como iter_tj_files(with_head=True), mas sobre os membros de um zip.
+
+    Gera (nome do membro, tipo, head). Pastas e membros com menos de
+    HEAD_SIZE bytes saem direto do diretório central, sem inflar nada.
+    """
+    wanted = {
+        "tj_bang": include_tj_bang,
+        "tje": include_tje,
+        "tjz": include_tjz,
+    }
+    zf = archive if isinstance(archive, zipfile.ZipFile) else zipfile.ZipFile(archive)
+    try:
+        for info in zf.infolist():
+            if info.is_dir() or info.file_size < HEAD_SIZE or _safe_member_path(info.filename) is None:
+                continue
+            try:
+                with zf.open(info) as f:
+                    head = f.read(HEAD_SIZE)
+            except (OSError, zipfile.BadZipFile, NotImplementedError):
+                continue
+            t = tj_type_from_bytes(head)
+            if wanted.get(t, False):
+                yield info.filename, t, head
+    finally:
+        if zf is not archive:
+            zf.close()
+
+
+def decode_zip_member(archive: str | Path | zipfile.ZipFile,
+                      name: str,
+                      out_path: str | Path,
+                      base_key_hex: str | None = None,
+                      header_size: int = 23,
+                      head: bytes | None = None) -> Path:
+    """Como decode_single_file, lendo o membro `name` direto do zip."""
+    zf = archive if isinstance(archive, zipfile.ZipFile) else zipfile.ZipFile(archive)
+    try:
+        plain, tj_type, item = _read_member(zf, zf.getinfo(name), base_key_hex, header_size, head)
+    finally:
+        if zf is not archive:
+            zf.close()
+    if item is not None:
+        plain = tj_xxtea_decrypt_bytes(*item)
+    dst = Path(out_path)
+    _write_output(dst, plain, tj_type)
+    return dst
+
+
+def _read_member(zf: zipfile.ZipFile,
+                 info: zipfile.ZipInfo,
+                 base_key_hex: str | None,
+                 header_size: int,
+                 head: bytes | None):
+    """Decifra um membro grande com memória limitada; os pequenos voltam
+    como (payload, key, tipo) para o lote. Retorna (plain, tipo, None) ou
+    (None, tipo, (payload, key))."""
+    with zf.open(info) as f:
+        if info.file_size >= LOW_MEMORY_THRESHOLD:
+            plain, tj_type = _decrypt_stream_low_memory(f, info.file_size, base_key_hex,
+                                                        header_size, head, info.filename)
+            return plain, tj_type, None
+        payload, key_bytes, tj_type = _load_tj_stream(f, base_key_hex, header_size, head, info.filename)
+    return None, tj_type, (payload, key_bytes)
+
+
+def _decode_zip_chunk(archive: Path,
+                      chunk: list[tuple[str, str, bytes | None]],
+                      base_key_hex: str | None,
+                      header_size: int,
+                      out_dir: Path | None,
+                      json_format: str | None = None) -> list[tuple[DecodeResult, bytes | None]]:
+    """Executado nos processos do pool: abre o zip uma vez e decodifica um lote.
+
+    Com out_dir, grava cada saída lá e devolve (resultado, None); sem ele,
+    devolve o plaintext para o processo principal gravar no zip de saída.
+    Os dois caminhos passam pelo estágio pós-decrypt (decoder.postprocess).
+    """
+    results: list = [None] * len(chunk)
+    pending: list[int] = []
+    items: list[tuple[bytes, bytes]] = []
+
+    def finish(i: int, plain, tj_type: str) -> None:
+        name = chunk[i][0]
+        src = archive / name
+        if out_dir is None:
+            res = DecodeResult(src, tj_type, None, size_of[name], plain_size=len(plain))
+            results[i] = _post_plain(res, bytes(plain), json_format)
+            return
+        dst = out_dir.joinpath(*PurePosixPath(name).parts)
+        content, version = classify_plain(plain, tj_type)
+        try:
+            out_size, container = _write_output(dst, plain, tj_type, json_format)
+        except OSError as e:
+            results[i] = (DecodeResult(src, tj_type, None, size_of[name], str(e)), None)
+            return
+        results[i] = (DecodeResult(src, tj_type, dst, size_of[name], plain_size=len(plain), out_size=out_size,
+                                   container=container, content=content, content_version=version), None)
+
+    with zipfile.ZipFile(archive) as zf:
+        size_of: dict[str, int] = {}
+        for i, (name, tj_type, head) in enumerate(chunk):
+            try:
+                info = zf.getinfo(name)
+                size_of[name] = info.file_size
+                plain, tj_type, item = _read_member(zf, info, base_key_hex, header_size, head)
+            except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+                results[i] = (DecodeResult(archive / name, tj_type, None, size_of.get(name, 0), str(e)), None)
+                continue
+            if item is None:
+                finish(i, plain, tj_type)
+                continue
+            pending.append(i)
+            items.append(item)
+
+    for i, plain in zip(pending, tj_xxtea_decrypt_many(items)):
+        name, tj_type, _ = chunk[i]
+        if isinstance(plain, Exception):
+            results[i] = (DecodeResult(archive / name, tj_type, None, size_of[name], str(plain)), None)
+            continue
+        finish(i, plain, tj_type)
+    return results
+
+
+def decode_archive(archive: str | Path,
+                   out_dir: str | Path | None = None,
+                   out_zip: str | Path | None = None,
+                   include_tj_bang: bool = True,
+                   include_tje: bool = True,
+                   include_tjz: bool = False,
+                   base_key_hex: str | None = None,
+                   header_size: int = 23,
+                   workers: int | None = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   json_format: str | None = None):
+    """Decodifica os membros tj!/tje/tjz de um APK/OBB em todos os núcleos.
+
+    Exatamente um de out_dir (pasta espelhando a árvore do zip) ou out_zip
+    (zip novo, sem compressão, para não serializar o deflate no processo
+    principal; ver ZipSink). json_format: "pretty"/"minify" reformata JSON. Gera um DecodeResult por membro; o path de
+    cada resultado é archive/nome_do_membro.
+    """
+    if (out_dir is None) == (out_zip is None):
+        raise ValueError("informe out_dir ou out_zip")
+    archive = Path(archive)
+    jobs = list(iter_zip_tj_files(archive, include_tj_bang, include_tje, include_tjz))
+    step = max(1, chunk_size)
+    chunks = [jobs[i:i + step] for i in range(0, len(jobs), step)]
+
+    out = ZipSink(out_zip, archive) if out_zip is not None else None
+    finished = False
+    try:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # no máximo workers*2 lotes em voo: o plaintext que volta para o
+            # zip de saída não se acumula na memória
+            pending: deque = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(_decode_zip_chunk, archive, chunk, base_key_hex, header_size,
+                                           None if out_dir is None else Path(out_dir), json_format))
+                if len(pending) < workers * 2:
+                    continue
+                yield from _collect(pending.popleft(), out)
+            while pending:
+                yield from _collect(pending.popleft(), out)
+        finished = True
+    finally:
+        # erro ou gerador fechado antes do fim: o zip de saída não é finalizado
+        if out is not None and finished:
+            out.close()
+        elif out is not None:
+            out.abort()
+
+
+def _collect(fut, out: ZipSink | None):
+    for res, plain in fut.result():
+        if out is not None and res.ok:
+            res.out_path, res.out_size, res.container = out.write(res.path, plain, res.tj_type)
+        yield res
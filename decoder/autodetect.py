@@ -0,0 +1,166 @@
+"""
+Detecção automática da base key e do header_size de um client.
+
+Lê poucos arquivos (os menores da árvore, para cada tentativa custar
+quase nada) e testa cada base key do keyring com cada header_size
+candidato. Uma combinação ganha pontos por arquivo em que a word de
+tamanho (v43) do sub_4D1DB4 confere e mais um ponto quando o plaintext
+tem um tipo reconhecível (PNG, Lua, JSON...). Com a key errada o v43
+praticamente nunca confere, então cada candidato errado cai já no
+primeiro arquivo.
+"""
+from __future__ import annotations
+
+import heapq
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from .decode_logic import HEAD_SIZE
+from .keygen import BASE_KEY_HEX, KeyDeriver, parse_hex_bytes
+from .scanner import ScanIndex
+from .sniff import KNOWN_KINDS, sniff_plaintext
+from .tjxxtea import tj_xxtea_decrypt_bytes
+
+DEFAULT_KEYRING = Path(__file__).with_name("keyring.txt")
+
+# header_size testados: o padrão primeiro, depois o resto do intervalo
+DEFAULT_HEADER_SIZE = 23
+HEADER_SIZE_CANDIDATES = (DEFAULT_HEADER_SIZE,) + tuple(
+    hs for hs in range(HEAD_SIZE, 48) if hs != DEFAULT_HEADER_SIZE)
+
+# arquivos amostrados por detecção
+SAMPLE_SIZE = 8
+
+# com uma word só o sub_4D1DB4 não roda nenhuma rodada: o v43 não diz nada
+MIN_PAYLOAD = 8
+
+
+@dataclass
+class Detection:
+    """Combinação vencedora. score vai até 2 * files."""
+    base_key_hex: str
+    header_size: int
+    score: int
+    files: int
+    trials: int
+    seconds: float
+
+    @property
+    def exact(self) -> bool:
+        """True se todos os arquivos amostrados passaram no v43 e no tipo."""
+        return self.score == 2 * self.files
+
+
+def load_keyring(path: str | Path | None = None) -> list[str]:
+    """Base keys em hex do keyring (BASE_KEY_HEX sempre primeiro).
+
+    Linhas "nome = hex" ou só "hex"; vazias e comentários (#) são ignorados.
+    """
+    keys = [BASE_KEY_HEX]
+    path = Path(path) if path is not None else DEFAULT_KEYRING
+    if not path.exists():
+        return keys
+    for lineno, line in enumerate(path.read_text(encoding="utf-8").splitlines(), 1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        hex_part = line.split("=", 1)[1] if "=" in line else line
+        try:
+            key = parse_hex_bytes(hex_part)
+        except ValueError:
+            key = b""
+        if len(key) != 16:
+            raise ValueError(f"{path}:{lineno}: base key precisa ter 16 bytes em hex")
+        key_hex = key.hex(" ")
+        if key_hex not in keys:
+            keys.append(key_hex)
+    return keys
+
+
+def smallest_sample(jobs, n: int = SAMPLE_SIZE, min_size: int = 0) -> list[Path]:
+    """Os n menores arquivos dos jobs (path, tipo[, head]) com pelo menos min_size bytes."""
+    sized = []
+    for job in jobs:
+        try:
+            size = os.stat(job[0]).st_size
+        except OSError:
+            continue
+        if size >= min_size:
+            sized.append((size, str(job[0])))
+    return [Path(p) for _, p in heapq.nsmallest(n, sized)]
+
+
+def _score(raws: list[bytes], keys: list[bytes], header_size: int) -> tuple[int, int]:
+    """(arquivos que passaram no v43, pontuação) de um header_size, com as
+    FILE KEYs já derivadas de cada arquivo."""
+    passed = score = failed = 0
+    for raw, key in zip(raws, keys):
+        try:
+            plain = tj_xxtea_decrypt_bytes(raw[header_size:], key, backend="python")
+        except ValueError:
+            failed += 1
+            if 2 * failed >= len(raws):
+                return 0, 0  # já não tem como passar na maioria: candidato descartado
+            continue
+        passed += 1
+        score += 2 if sniff_plaintext(plain) in KNOWN_KINDS else 1
+    return passed, score
+
+
+def detect_key(paths: list[Path],
+               keyring: list[str] | None = None,
+               header_sizes=HEADER_SIZE_CANDIDATES) -> Detection | None:
+    """Testa keyring x header_sizes nos arquivos e devolve a melhor combinação.
+
+    None se nenhuma combinação passou no v43 em mais da metade dos arquivos.
+    """
+    started = time.perf_counter()
+    raws = []
+    for path in paths:
+        with open(path, "rb") as f:
+            raws.append(f.read())
+    if not raws:
+        return None
+    if keyring is None:
+        keyring = load_keyring()
+
+    perfect = 2 * len(raws)
+    best = (0, 0, None, None)
+    trials = 0
+    for key_hex in keyring:
+        deriver = KeyDeriver.from_hex(key_hex)
+        keys = [deriver.derive(raw[3:HEAD_SIZE]) for raw in raws]
+        for header_size in header_sizes:
+            trials += 1
+            passed, score = _score(raws, keys, header_size)
+            if score > best[1]:
+                best = (passed, score, key_hex, header_size)
+                if score == perfect:
+                    break
+        if best[1] == perfect:
+            break
+
+    passed, score, key_hex, header_size = best
+    if 2 * passed <= len(raws):
+        return None
+    return Detection(key_hex, header_size, score, len(raws), trials, time.perf_counter() - started)
+
+
+def sample_min_size() -> int:
+    """Tamanho mínimo de um arquivo amostrado: payload de 2+ words no maior header_size."""
+    return max(HEADER_SIZE_CANDIDATES) + MIN_PAYLOAD
+
+
+def detect_for_root(root: str | Path,
+                    jobs=None,
+                    keyring_path: str | Path | None = None,
+                    sample: int = SAMPLE_SIZE) -> Detection | None:
+    """Amostra os menores arquivos de root (do índice, ou dos jobs dados) e roda detect_key."""
+    if jobs is None:
+        with ScanIndex(root) as index:
+            index.refresh()
+            jobs = index.smallest_tj_files(sample, sample_min_size())
+    paths = smallest_sample(jobs, sample, sample_min_size())
+    return detect_key(paths, load_keyring(keyring_path))
@@ -0,0 +1,654 @@
+"""
+Linha de comando (sem GUI) para dump em lote: python -m decoder PASTA
+
+Não importa tkinter nem PIL, então roda em servidores/cron sem display.
+Sai com código 1 se algum arquivo falhar (2 para erro de uso).
+
+Repack (o inverso): python -m decoder repack PASTA_MOD --orig PASTA_CLIENT -o SAIDA
+Dry-run (não grava nada): python -m decoder verify PASTA
+Detecção de base key / header_size: python -m decoder detect PASTA
+Diff entre dois builds: python -m decoder diff PASTA_ANTIGA PASTA_NOVA -o SAIDA
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+
+from .decode_logic import DEFAULT_CHUNK_SIZE, ParallelDecoder, ThroughputMeter, iter_tj_files
+from .dedup import DEDUP_MODES
+from .diff import DIFF_FILENAME
+from .keygen import parse_hex_bytes
+from .postprocess import JSON_FORMATS, content_label
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m decoder",
+        description="Decodifica em lote arquivos tj!/tje/tjz do ShinobiAsia.",
+    )
+    parser.add_argument("root", type=Path,
+                        help="pasta raiz com os arquivos do client, ou o APK/OBB direto")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="processos em paralelo (padrão: número de CPUs)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="arquivos por lote enviado a cada processo")
+    parser.add_argument("--tj-bang", action=argparse.BooleanOptionalAction, default=True,
+                        help="decodificar tj! (padrão: sim)")
+    parser.add_argument("--tje", action=argparse.BooleanOptionalAction, default=True,
+                        help="decodificar tje (padrão: sim)")
+    parser.add_argument("--tjz", action=argparse.BooleanOptionalAction, default=False,
+                        help="decodificar tjz (padrão: não)")
+    parser.add_argument("-o", "--out-dir", type=Path, default=None,
+                        help="grava as saídas aqui espelhando a árvore da raiz "
+                             "(padrão: foo.dec.ext ao lado da fonte)")
+    parser.add_argument("--out-zip", type=Path, default=None,
+                        help="grava todas as saídas em um único zip sem compressão (com índice)")
+    parser.add_argument("--out-tar", type=Path, default=None,
+                        help="grava todas as saídas em um único tar sem compressão (com índice)")
+    parser.add_argument("--json", dest="json_format", choices=JSON_FORMATS, default=None,
+                        help="reformata as saídas JSON no mesmo passo do decrypt (indentado ou "
+                             "minificado); JSON inválido sai como está")
+    parser.add_argument("--writer-thread", action="store_true",
+                        help="os processos só decifram; uma thread grava as saídas (menos "
+                             "mkdir/open por processo, bom para shares de rede)")
+    parser.add_argument("--base-key", default=None,
+                        help='base key em hex, ex.: "67 1c b6 06 ..." (padrão: BASE_KEY_HEX)')
+    parser.add_argument("--header-size", type=int, default=23,
+                        help="offset do payload no arquivo (padrão: 23)")
+    _add_auto_key_args(parser)
+    parser.add_argument("--incremental", action="store_true",
+                        help="pula fontes inalteradas desde o último dump (manifesto)")
+    parser.add_argument("--dedup", choices=DEDUP_MODES, default=None,
+                        help="decifra uma vez só fontes de conteúdo idêntico; as cópias viram "
+                             "hardlinks (link) ou vão para tj_duplicates.json (manifest)")
+    parser.add_argument("--no-index", action="store_true",
+                        help="não usa/grava o índice SQLite; varre a pasta com os.walk")
+    parser.add_argument("--resume", action="store_true",
+                        help="retoma um Decode All interrompido, pulando as fontes do journal "
+                             "da pasta de saída")
+    parser.add_argument("--max-file-size", type=float, default=None, metavar="MB",
+                        help="fontes maiores que isto viram erro sem serem lidas")
+    parser.add_argument("--file-timeout", type=float, default=None, metavar="SEGUNDOS",
+                        help="tempo limite por arquivo; o que passar vira erro (só Linux/macOS)")
+    parser.add_argument("--profile", action="store_true",
+                        help="mede tempo/CPU/bytes por estágio (scan, read, keygen, xxtea, write...) "
+                             "e mostra a tabela no fim")
+    parser.add_argument("--profile-json", type=Path, default=None,
+                        help="grava a medição por estágio neste JSON (implica --profile)")
+    parser.add_argument("--pstats", type=Path, default=None,
+                        help="roda também o cProfile nos workers e grava um dump pstats "
+                             "(implica --profile)")
+    parser.add_argument("--jsonl", action="store_true",
+                        help="progresso em JSON lines no stdout")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="no modo texto, mostra só erros e o resumo")
+    return parser
+
+
+def _add_auto_key_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--auto-key", action="store_true",
+                        help="detecta base key e header_size em uma amostra dos menores arquivos")
+    parser.add_argument("--keyring", type=Path, default=None,
+                        help="arquivo de base keys candidatas (padrão: decoder/keyring.txt)")
+
+
+def _check_base_key(parser: argparse.ArgumentParser, base_key: str | None) -> None:
+    if base_key is not None:
+        try:
+            key = parse_hex_bytes(base_key)
+        except ValueError:
+            key = b""
+        if len(key) != 16:
+            parser.error("--base-key precisa ter 16 bytes em hex")
+
+
+def _validate(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    from .archive import is_archive
+
+    args.archive = is_archive(args.root)
+    if not args.archive and not args.root.is_dir():
+        parser.error(f"pasta ou APK/OBB não encontrado: {args.root}")
+    if args.jobs < 1 or args.chunk_size < 1:
+        parser.error("--jobs e --chunk-size precisam ser >= 1")
+    if (args.max_file_size is not None and args.max_file_size <= 0) or \
+            (args.file_timeout is not None and args.file_timeout <= 0):
+        parser.error("--max-file-size e --file-timeout precisam ser > 0")
+    _check_auto_key(parser, args)
+    if args.profile_json is not None or args.pstats is not None:
+        args.profile = True
+    args.sink = args.writer_thread or args.out_zip is not None or args.out_tar is not None
+    if args.archive:
+        if args.incremental or args.dedup or args.auto_key or args.profile or args.writer_thread or \
+                args.resume or args.max_file_size is not None or args.file_timeout is not None:
+            parser.error("--incremental/--dedup/--auto-key/--profile/--writer-thread/--resume/"
+                         "--max-file-size/--file-timeout não se aplicam a APK/OBB")
+        if args.out_tar is not None:
+            parser.error("--out-tar não se aplica a APK/OBB (use --out-zip)")
+        if args.out_dir is not None and args.out_zip is not None:
+            parser.error("use --out-dir ou --out-zip, não os dois")
+        if args.out_dir is None and args.out_zip is None:
+            args.out_dir = args.root.with_name(args.root.stem + ".dec")
+        return
+    outputs = [opt for opt, value in (("--out-dir", args.out_dir),
+                                      ("--out-zip", args.out_zip),
+                                      ("--out-tar", args.out_tar)) if value is not None]
+    if len(outputs) > 1:
+        parser.error(f"use só uma saída: {', '.join(outputs)}")
+    if args.sink and (args.incremental or args.dedup or args.resume):
+        parser.error("--out-zip/--out-tar/--writer-thread não combinam com --incremental/--dedup/--resume")
+    if args.out_dir is not None and args.out_dir.resolve() == args.root.resolve():
+        parser.error("--out-dir não pode ser a própria raiz (sobrescreveria as fontes)")
+    if args.incremental and args.dedup == "manifest":
+        parser.error("--dedup manifest não combina com --incremental (use --dedup link)")
+    if args.incremental and args.no_index:
+        parser.error("--incremental usa o arquivo do índice; não combine com --no-index")
+
+
+def _check_auto_key(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    _check_base_key(parser, args.base_key)
+    if args.auto_key and args.base_key is not None:
+        parser.error("--auto-key escolhe a base key; não combine com --base-key")
+    if args.keyring is not None and not args.keyring.is_file():
+        parser.error(f"keyring não encontrado: {args.keyring}")
+
+
+class _Reporter:
+    """Escreve o progresso em texto ou JSON lines."""
+
+    def __init__(self, jsonl: bool, quiet: bool):
+        self.jsonl = jsonl
+        self.quiet = quiet
+
+    def emit(self, event: str, **fields) -> None:
+        if self.jsonl:
+            print(json.dumps({"event": event, **fields}, ensure_ascii=False), flush=True)
+
+    def text(self, msg: str, error: bool = False, summary: bool = False) -> None:
+        if self.jsonl or (self.quiet and not (error or summary)):
+            return
+        print(msg, file=sys.stderr if error else sys.stdout, flush=True)
+
+
+def build_repack_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m decoder repack",
+        description="Recifra assets modificados reusando magic + header dos originais.",
+    )
+    parser.add_argument("root", type=Path,
+                        help="pasta com os arquivos modificados (mesma árvore do --out-dir do dump)")
+    parser.add_argument("--orig", type=Path, required=True,
+                        help="pasta do client com os arquivos cifrados originais")
+    parser.add_argument("-o", "--out-dir", type=Path, required=True,
+                        help="grava os arquivos recifrados aqui espelhando a árvore")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="processos em paralelo (padrão: número de CPUs)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="arquivos por lote enviado a cada processo")
+    parser.add_argument("--base-key", default=None,
+                        help='base key em hex (padrão: BASE_KEY_HEX)')
+    parser.add_argument("--header-size", type=int, default=23,
+                        help="offset do payload no arquivo (padrão: 23)")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="mostra só erros e o resumo")
+    return parser
+
+
+def repack_main(argv: list[str] | None = None) -> int:
+    from .encode_logic import repack_tree
+
+    parser = build_repack_parser()
+    args = parser.parse_args(argv)
+    if not args.root.is_dir() or not args.orig.is_dir():
+        parser.error("pasta não encontrada")
+    if args.out_dir.resolve() == args.orig.resolve():
+        parser.error("--out-dir não pode ser a pasta dos originais")
+    if args.jobs < 1 or args.chunk_size < 1:
+        parser.error("--jobs e --chunk-size precisam ser >= 1")
+    _check_base_key(parser, args.base_key)
+
+    out = _Reporter(False, args.quiet)
+    meter = ThroughputMeter()
+    count_ok = count_err = 0
+    try:
+        for res in repack_tree(args.root, args.orig, args.out_dir, args.jobs, args.chunk_size,
+                               args.base_key, args.header_size):
+            meter.add(res.size)
+            if res.ok:
+                count_ok += 1
+                out.text(f"[OK] {res.path} -> {res.out_path}")
+            else:
+                count_err += 1
+                out.text(f"[ERRO] {res.path}: {res.error}", error=True)
+    except KeyboardInterrupt:
+        return 130
+
+    out.text(f"Concluído. Recifrados: {count_ok}, Erros: {count_err} "
+             f"({meter.elapsed:.1f}s, {meter.mb_per_sec:.2f} MB/s)", error=bool(count_err))
+    return 1 if count_err else 0
+
+
+def _detect_key(args: argparse.Namespace, out: _Reporter, jobs: list | None = None):
+    """Roda a detecção; None (e mensagem de erro) se nada do keyring serviu."""
+    from .autodetect import detect_for_root
+
+    try:
+        det = detect_for_root(args.root, jobs, args.keyring)
+    except (OSError, ValueError) as e:
+        out.emit("auto_key", found=False, error=str(e))
+        out.text(f"[ERRO] Detecção de key: {e}", error=True)
+        return None
+    if det is None:
+        out.emit("auto_key", found=False)
+        out.text("[ERRO] Nenhuma base key/header_size do keyring serviu para a amostra.", error=True)
+        return None
+    out.emit("auto_key", found=True, base_key=det.base_key_hex, header_size=det.header_size,
+             score=det.score, max_score=2 * det.files, trials=det.trials, seconds=round(det.seconds, 3))
+    out.text(f"Key detectada: {det.base_key_hex} / header_size {det.header_size} "
+             f"(score {det.score}/{2 * det.files}, {det.trials} tentativas, {det.seconds:.2f}s)",
+             summary=True)
+    return det
+
+
+def _apply_auto_key(args: argparse.Namespace, out: _Reporter, jobs: list | None = None) -> bool:
+    """--auto-key: fixa a key/header_size detectados para o resto da execução."""
+    det = _detect_key(args, out, jobs)
+    if det is None:
+        return False
+    args.base_key, args.header_size = det.base_key_hex, det.header_size
+    return True
+
+
+def _report_result(out: _Reporter, meter: ThroughputMeter, res) -> None:
+    if res.ok and res.duplicate_of is not None:
+        target = res.out_path if res.out_path is not None else "(tj_duplicates.json)"
+        out.text(f"[DUP] ({res.tj_type}) {res.path} = {res.duplicate_of} -> {target}")
+    elif res.ok:
+        label = content_label(res.content, res.content_version)
+        out.text(f"[OK] ({res.tj_type}) {res.path} -> {res.out_path}" + (f" [{label}]" if label else ""))
+    else:
+        out.text(f"[ERRO] ({res.tj_type}) {res.path}: {res.error}", error=True)
+    eta = meter.eta
+    out.emit("result", path=str(res.path), type=res.tj_type, ok=res.ok,
+             out_path=str(res.out_path) if res.out_path else None, error=res.error,
+             size=res.size, out_size=res.out_size, container=res.container,
+             duplicate_of=str(res.duplicate_of) if res.duplicate_of else None,
+             content=res.content, content_version=res.content_version,
+             done=meter.files, total=meter.total,
+             files_per_sec=round(meter.files_per_sec, 2),
+             mb_per_sec=round(meter.mb_per_sec, 3),
+             eta=None if eta is None else round(eta, 1))
+
+
+def _report_contents(out: _Reporter, contents: Counter) -> None:
+    """Quantos arquivos de cada tipo de conteúdo (lua, luajit, json, png...)."""
+    if not contents:
+        return
+    out.emit("contents", **dict(contents.most_common()))
+    out.text("Conteúdo: " + ", ".join(f"{kind} {n}" for kind, n in contents.most_common()), summary=True)
+
+
+def _report_profile(out: _Reporter, args: argparse.Namespace, report: dict) -> None:
+    from .profiling import stage_lines, write_profile_json
+
+    out.emit("profile", **report)
+    for line in stage_lines(report):
+        out.text(line, summary=True)
+    if args.profile_json is not None:
+        write_profile_json(args.profile_json, report)
+
+
+def _decode_archive_main(args: argparse.Namespace) -> int:
+    """Decode direto do APK/OBB (sem índice, manifesto nem extração)."""
+    from .archive import decode_archive
+
+    out = _Reporter(args.jsonl, args.quiet)
+    meter = ThroughputMeter()
+    count_ok = count_err = 0
+    contents: Counter = Counter()
+    cancelled = False
+    try:
+        for res in decode_archive(args.root, args.out_dir, args.out_zip, args.tj_bang, args.tje, args.tjz,
+                                  args.base_key, args.header_size, args.jobs, args.chunk_size,
+                                  args.json_format):
+            meter.add(res.size)
+            if res.ok:
+                count_ok += 1
+                contents[res.content] += 1
+            else:
+                count_err += 1
+            _report_result(out, meter, res)
+    except KeyboardInterrupt:
+        cancelled = True
+
+    _report_contents(out, contents)
+    out.emit("summary", ok=count_ok, errors=count_err, cancelled=cancelled,
+             seconds=round(meter.elapsed, 3), mb_per_sec=round(meter.mb_per_sec, 3))
+    out.text(f"Concluído. Sucesso: {count_ok}, Erros: {count_err} "
+             f"({meter.elapsed:.1f}s, {meter.mb_per_sec:.2f} MB/s)", error=bool(count_err))
+    if cancelled:
+        return 130
+    return 1 if count_err else 0
+
+
+def build_verify_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m decoder verify",
+        description="Dry-run: decifra em memória e confere header, tamanho (v43) e tipo do "
+                    "plaintext, sem gravar nada.",
+    )
+    parser.add_argument("root", type=Path, help="pasta raiz com os arquivos do client")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="processos em paralelo (padrão: número de CPUs)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="arquivos por lote enviado a cada processo")
+    parser.add_argument("--tj-bang", action=argparse.BooleanOptionalAction, default=True,
+                        help="verificar tj! (padrão: sim)")
+    parser.add_argument("--tje", action=argparse.BooleanOptionalAction, default=True,
+                        help="verificar tje (padrão: sim)")
+    parser.add_argument("--tjz", action=argparse.BooleanOptionalAction, default=True,
+                        help="verificar tjz (padrão: sim)")
+    parser.add_argument("--sample", type=int, default=0,
+                        help="verifica só N arquivos espaçados pela árvore (0 = todos)")
+    parser.add_argument("--base-key", default=None,
+                        help='base key em hex (padrão: BASE_KEY_HEX)')
+    parser.add_argument("--header-size", type=int, default=23,
+                        help="offset do payload no arquivo (padrão: 23)")
+    _add_auto_key_args(parser)
+    parser.add_argument("--no-index", action="store_true",
+                        help="não usa/grava o índice SQLite; varre a pasta com os.walk")
+    parser.add_argument("--jsonl", action="store_true",
+                        help="uma linha JSON por falha e o relatório no fim")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="mostra só o relatório, sem listar as falhas")
+    return parser
+
+
+def verify_main(argv: list[str] | None = None) -> int:
+    from .verify import VerifyReport, sample_jobs, verify_files
+
+    parser = build_verify_parser()
+    args = parser.parse_args(argv)
+    if not args.root.is_dir():
+        parser.error(f"pasta não encontrada: {args.root}")
+    if args.jobs < 1 or args.chunk_size < 1 or args.sample < 0:
+        parser.error("--jobs e --chunk-size precisam ser >= 1 e --sample >= 0")
+    _check_auto_key(parser, args)
+
+    if args.no_index:
+        jobs = iter_tj_files(args.root, args.tj_bang, args.tje, args.tjz, with_head=True)
+    else:
+        from .scanner import iter_indexed_tj_files
+
+        jobs = iter_indexed_tj_files(args.root, args.tj_bang, args.tje, args.tjz)
+    jobs = list(jobs)
+
+    out = _Reporter(args.jsonl, args.quiet)
+    if args.auto_key and not _apply_auto_key(args, out, jobs if args.no_index else None):
+        return 1
+    jobs = sample_jobs(jobs, args.sample)
+    meter = ThroughputMeter()
+    meter.total = len(jobs)
+    report = VerifyReport()
+    try:
+        for res in verify_files(jobs, args.base_key, args.header_size, args.jobs, args.chunk_size):
+            meter.add(res.size)
+            report.add(res)
+            if not res.ok:
+                out.emit("failure", path=str(res.path), type=res.tj_type, reason=res.reason, error=res.error)
+                out.text(f"[FALHA:{res.reason}] ({res.tj_type}) {res.path}: {res.error}")
+    except KeyboardInterrupt:
+        return 130
+
+    out.emit("report", seconds=round(meter.elapsed, 3), mb_per_sec=round(meter.mb_per_sec, 3),
+             **report.to_dict())
+    for line in report.lines():
+        out.text(line, summary=True)
+    out.text(f"({meter.elapsed:.1f}s, {meter.mb_per_sec:.2f} MB/s)", summary=True)
+    return 1 if report.failed else 0
+
+
+def build_diff_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m decoder diff",
+        description="Compara dois builds do client pelo ciphertext e pelo header (FILE KEY) e "
+                    "decifra só os arquivos novos e alterados.",
+    )
+    parser.add_argument("old", type=Path, help="pasta raiz do build antigo")
+    parser.add_argument("new", type=Path, help="pasta raiz do build novo")
+    parser.add_argument("-o", "--out-dir", type=Path, required=True,
+                        help=f"recebe os arquivos novos/alterados decifrados e o {DIFF_FILENAME}")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="processos em paralelo (padrão: número de CPUs)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="arquivos por lote enviado a cada processo")
+    parser.add_argument("--tj-bang", action=argparse.BooleanOptionalAction, default=True,
+                        help="comparar tj! (padrão: sim)")
+    parser.add_argument("--tje", action=argparse.BooleanOptionalAction, default=True,
+                        help="comparar tje (padrão: sim)")
+    parser.add_argument("--tjz", action=argparse.BooleanOptionalAction, default=True,
+                        help="comparar tjz (padrão: sim)")
+    parser.add_argument("--base-key", default=None,
+                        help='base key em hex (padrão: BASE_KEY_HEX)')
+    parser.add_argument("--header-size", type=int, default=23,
+                        help="offset do payload no arquivo (padrão: 23)")
+    _add_auto_key_args(parser)
+    parser.add_argument("--json", dest="json_format", choices=JSON_FORMATS, default=None,
+                        help="reformata as saídas JSON (indentado ou minificado)")
+    parser.add_argument("--no-index", action="store_true",
+                        help="não usa/grava o índice SQLite; varre as pastas com os.walk")
+    parser.add_argument("--persist-index", action="store_true",
+                        help="grava o índice dentro das duas pastas (padrão: diretório temporário)")
+    parser.add_argument("--jsonl", action="store_true",
+                        help="uma linha JSON por caminho diferente e o relatório no fim")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="mostra só o relatório, sem listar os caminhos")
+    return parser
+
+
+def diff_main(argv: list[str] | None = None) -> int:
+    from .diff import UNCHANGED, DiffReport, diff_trees, scan_roots
+
+    parser = build_diff_parser()
+    args = parser.parse_args(argv)
+    for root in (args.old, args.new):
+        if not root.is_dir():
+            parser.error(f"pasta não encontrada: {root}")
+    if args.jobs < 1 or args.chunk_size < 1:
+        parser.error("--jobs e --chunk-size precisam ser >= 1")
+    if args.out_dir.resolve() in (args.old.resolve(), args.new.resolve()):
+        parser.error("--out-dir não pode ser uma das raízes comparadas")
+    _check_auto_key(parser, args)
+
+    out = _Reporter(args.jsonl, args.quiet)
+    meter = ThroughputMeter()
+    old_jobs, new_jobs = scan_roots([args.old, args.new], args.tj_bang, args.tje, args.tjz,
+                                    use_index=not args.no_index, persist_index=args.persist_index)
+    args.root = args.new  # a detecção de key amostra o build novo
+    if args.auto_key and not _apply_auto_key(args, out, new_jobs):
+        return 1
+
+    report = DiffReport(args.old, args.new)
+    try:
+        for entry in diff_trees(args.old, args.new, old_jobs, new_jobs, args.out_dir, args.base_key,
+                                args.header_size, args.jobs, args.chunk_size, args.json_format):
+            meter.add(entry.new_size)
+            report.add(entry)
+            if entry.status == UNCHANGED:
+                continue
+            out.emit("entry", path=entry.rel, status=entry.status, type=entry.tj_type,
+                     old_size=entry.old_size, new_size=entry.new_size,
+                     out_path=str(entry.out_path) if entry.out_path else None,
+                     content=entry.content, content_version=entry.content_version, error=entry.error)
+            if entry.ok:
+                label = content_label(entry.content, entry.content_version)
+                out.text(f"[{entry.status.upper()}] {entry.rel}" + (f" [{label}]" if label else ""))
+            else:
+                out.text(f"[ERRO:{entry.status}] {entry.rel}: {entry.error}", error=True)
+    except KeyboardInterrupt:
+        return 130
+
+    report.write(args.out_dir / DIFF_FILENAME)
+    out.emit("report", seconds=round(meter.elapsed, 3), **report.to_dict())
+    for line in report.lines():
+        out.text(line, summary=True)
+    out.text(f"Relatório em {args.out_dir / DIFF_FILENAME} ({meter.elapsed:.1f}s)", summary=True)
+    return 1 if report.errors else 0
+
+
+def build_detect_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m decoder detect",
+        description="Descobre base key (do keyring) e header_size testando os menores arquivos.",
+    )
+    parser.add_argument("root", type=Path, help="pasta raiz com os arquivos do client")
+    parser.add_argument("--keyring", type=Path, default=None,
+                        help="arquivo de base keys candidatas (padrão: decoder/keyring.txt)")
+    parser.add_argument("--no-index", action="store_true",
+                        help="não usa/grava o índice SQLite; varre a pasta com os.walk")
+    parser.add_argument("--jsonl", action="store_true",
+                        help="resultado em uma linha JSON")
+    return parser
+
+
+def detect_main(argv: list[str] | None = None) -> int:
+    parser = build_detect_parser()
+    args = parser.parse_args(argv)
+    if not args.root.is_dir():
+        parser.error(f"pasta não encontrada: {args.root}")
+    if args.keyring is not None and not args.keyring.is_file():
+        parser.error(f"keyring não encontrado: {args.keyring}")
+
+    jobs = None
+    if args.no_index:
+        jobs = list(iter_tj_files(args.root, include_tjz=True))
+    det = _detect_key(args, _Reporter(args.jsonl, False), jobs)
+    return 0 if det is not None else 1
+
+
+COMMANDS = {
+    "repack": repack_main,
+    "verify": verify_main,
+    "detect": detect_main,
+    "diff": diff_main,
+}
+
+
+def main(argv: list[str] | None = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    _validate(parser, args)
+
+    if args.archive:
+        return _decode_archive_main(args)
+
+    out = _Reporter(args.jsonl, args.quiet)
+    if args.no_index:
+        jobs = iter_tj_files(args.root, args.tj_bang, args.tje, args.tjz, with_head=True)
+        if args.auto_key:
+            jobs = list(jobs)
+    else:
+        from .scanner import iter_indexed_tj_files
+
+        jobs = iter_indexed_tj_files(args.root, args.tj_bang, args.tje, args.tjz)
+    if args.auto_key and not _apply_auto_key(args, out, jobs if args.no_index else None):
+        return 1
+
+    sink = None
+    if args.sink:
+        from .sink import open_sink
+
+        sink = open_sink(args.root, args.out_dir, args.out_zip, args.out_tar)
+    decoder = ParallelDecoder(
+        workers=args.jobs,
+        chunk_size=args.chunk_size,
+        base_key_hex=args.base_key,
+        header_size=args.header_size,
+        root=args.root,
+        incremental=args.incremental,
+        out_dir=None if sink is not None else args.out_dir,
+        dedup=args.dedup,
+        sink=sink,
+        profile=("cprofile" if args.pstats else "stages") if args.profile else None,
+        resume=args.resume,
+        max_file_size=int(args.max_file_size * 1024 * 1024) if args.max_file_size else None,
+        file_timeout=args.file_timeout,
+        json_format=args.json_format,
+    )
+    meter = ThroughputMeter()
+    count_ok = count_err = 0
+    contents: Counter = Counter()
+    run_error = False
+    cancelled = False
+
+    events = decoder.start(jobs)
+    try:
+        while True:
+            kind, payload = events.get()
+            if kind == "total":
+                meter.total = payload
+                out.emit("total", files=payload)
+                out.text(f"{payload} arquivos para decodificar.")
+            elif kind == "result":
+                res = payload
+                meter.add(res.size)
+                if res.ok:
+                    count_ok += 1
+                    contents[res.content] += 1
+                else:
+                    count_err += 1
+                _report_result(out, meter, res)
+            elif kind == "skipped":
+                out.emit("skipped", files=payload)
+                out.text(f"{payload} arquivos inalterados pulados.")
+            elif kind == "resumed":
+                out.emit("resumed", files=payload)
+                out.text(f"Retomando: {payload} arquivos já concluídos pulados.")
+            elif kind == "pruned":
+                out.emit("pruned", outputs=[str(p) for p in payload])
+                for path in payload:
+                    out.text(f"[REMOVIDO] {path} (fonte apagada)")
+            elif kind == "key_cache":
+                out.emit("key_cache", **payload)
+            elif kind == "dedup":
+                out.emit("dedup", **payload)
+                out.text(f"Dedup: {payload['unique']} únicos, {payload['duplicates']} duplicados; "
+                         f"{payload['bytes_saved'] / (1024 * 1024):.1f} MB sem decifrar, "
+                         f"{payload['out_bytes_saved'] / (1024 * 1024):.1f} MB sem gravar, "
+                         f"~{payload['cpu_saved']:.1f}s de CPU poupados (hash: {payload['hash_cpu']:.1f}s).")
+            elif kind == "profile":
+                _report_profile(out, args, payload)
+            elif kind == "error":
+                run_error = True
+                out.emit("error", message=payload)
+                out.text(f"[ERRO] {payload}", error=True)
+            elif kind == "done":
+                cancelled = payload
+                break
+    except KeyboardInterrupt:
+        decoder.cancel()
+        while events.get()[0] != "done":
+            pass
+        cancelled = True
+
+    _report_contents(out, contents)
+    if args.pstats is not None and decoder.pstats is not None:
+        decoder.pstats.dump(args.pstats)
+        out.text(f"Dump do cProfile gravado em {args.pstats}", summary=True)
+
+    out.emit("summary", ok=count_ok, errors=count_err, cancelled=cancelled,
+             seconds=round(meter.elapsed, 3), mb_per_sec=round(meter.mb_per_sec, 3))
+    out.text(f"Concluído. Sucesso: {count_ok}, Erros: {count_err} "
+             f"({meter.elapsed:.1f}s, {meter.mb_per_sec:.2f} MB/s)", error=bool(count_err))
+
+    if cancelled:
+        return 130
+    return 1 if (count_err or run_error) else 0
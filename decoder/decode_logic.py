@@ -4,31 +4,64 @@ e decodificar em disco.
 """
 from __future__ import annotations
 
+import hashlib
 import os
+import queue
+import shutil
+import signal
+import sys
+import threading
+import time
+import zipfile
+from array import array
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Literal
+from typing import Iterable, Literal
 
-from .keygen import derive_file_key_from_file
-from .tjxxtea import tj_xxtea_decrypt_bytes
+from .decompress import detect_container, inflate_to_file
+from .keygen import derive_file_key_from_header, key_cache_stats
+from .postprocess import JSON_FORMATS, classify_plain, format_json, write_json
+from .profiling import count, stage
+from .sniff import sniff_plaintext
+from .tjxxtea import tj_xxtea_decrypt_bytes, tj_xxtea_decrypt_inplace, tj_xxtea_decrypt_many
 
 TjType = Literal["tj_bang", "tje", "tjz", "unknown"]
 
 
+# magic (3 bytes) + header da key (16 bytes)
+HEAD_SIZE = 19
+
+# A partir deste tamanho o decode usa o modo de memória limitada
+LOW_MEMORY_THRESHOLD = 8 * 1024 * 1024
+
+_MAGIC_TYPES: dict[bytes, TjType] = {
+    b"tj!": "tj_bang",
+    b"tje": "tje",
+    b"tjz": "tjz",
+}
+
+
+def tj_type_from_bytes(head: bytes) -> TjType:
+    """Detecta o tipo a partir dos primeiros bytes já lidos do arquivo."""
+    return _MAGIC_TYPES.get(bytes(head[:3]), "unknown")
+
+
+def read_tj_head(path: str | Path) -> bytes:
+    """Lê magic + header (HEAD_SIZE bytes) em um único open/read."""
+    with Path(path).open("rb") as f:
+        return f.read(HEAD_SIZE)
+
+
 def detect_tj_type(path: str | Path) -> TjType:
-    p = Path(path)
     try:
-        with p.open("rb") as f:
-            magic = f.read(3)
+        head = read_tj_head(path)
     except OSError:
         return "unknown"
-
-    if magic == b"tj!":
-        return "tj_bang"
-    if magic == b"tje":
-        return "tje"
-    if magic == b"tjz":
-        return "tjz"
-    return "unknown"
+    return tj_type_from_bytes(head)
 
 
 def default_output_path(src: Path) -> Path:
@@ -38,12 +71,318 @@ def default_output_path(src: Path) -> Path:
     return src.with_name(src.name + ".dec")
 
 
+def mirrored_output_path(src: Path, source_root: str | Path, out_dir: str | Path) -> Path:
+    """Saída em out_dir espelhando a árvore de source_root (mesmo nome de arquivo)."""
+    return Path(out_dir) / Path(src).relative_to(source_root)
+
+
+def _output_path(src: Path, out_dir: str | Path | None, source_root: str | Path | None) -> Path:
+    if out_dir is None:
+        return default_output_path(src)
+    return mirrored_output_path(src, source_root, out_dir)
+
+
+def split_tj_buffer(raw: bytes,
+                    base_key_hex: str | None = None,
+                    header_size: int = 23,
+                    name: object = "<buffer>") -> tuple[bytes, bytes]:
+    """Extrai (payload para o XXTEA, FILE KEY) de um arquivo tj!/tje/tjz já em memória.
+
+    Magic, header, key e payload saem todos do mesmo buffer.
+    """
+    magic = bytes(raw[:3])
+    if magic not in _MAGIC_TYPES:
+        raise ValueError(f"Arquivo {name} não parece ser tj!/tje/tjz (magic={magic!r})")
+
+    # header usado pelo jogo = this+3 → no arquivo é offset 3..18
+    header = bytes(raw[3:HEAD_SIZE])
+    if len(header) != 16:
+        raise ValueError(f"Header muito curto em {name}: {len(header)} bytes")
+
+    key_bytes = derive_file_key_from_header(header, base_key_hex)
+    return raw[header_size:], key_bytes
+
+
+def _new_digest():
+    """Hash do arquivo inteiro, o mesmo de manifest.file_digest."""
+    return hashlib.blake2b(digest_size=16)
+
+
+def _load_tj_file(src: Path,
+                  base_key_hex: str | None,
+                  header_size: int,
+                  head: bytes | None = None,
+                  digest=None) -> tuple[bytes, bytes, TjType]:
+    """Lê um arquivo tj!/tje/tjz com um único open e retorna (payload, FILE KEY, tipo).
+
+    O payload é lido direto do offset header_size, sem cópia intermediária do
+    arquivo inteiro. Se `head` (magic + header, vindo do scan) for informado,
+    o início do arquivo nem é relido (exceto com digest).
+    digest: hash (ver _new_digest) atualizado com os mesmos bytes lidos, para
+    o modo incremental não reler a fonte.
+    """
+    with src.open("rb") as f:
+        return _load_tj_stream(f, base_key_hex, header_size, head, src, digest)
+
+
+def _load_tj_stream(f,
+                    base_key_hex: str | None,
+                    header_size: int,
+                    head: bytes | None = None,
+                    name: object = "<stream>",
+                    digest=None) -> tuple[bytes, bytes, TjType]:
+    """Igual a _load_tj_file, para um arquivo já aberto no offset 0
+    (ex.: membro de zip aberto com ZipFile.open)."""
+    with stage("read", files=1):
+        if digest is not None:
+            # o digest cobre o arquivo inteiro: o início é lido mesmo com head
+            start = f.read(max(header_size, HEAD_SIZE))
+            rest = f.read()
+            digest.update(start)
+            digest.update(rest)
+            if head is None or len(head) < HEAD_SIZE:
+                head = start[:HEAD_SIZE]
+            payload = rest if len(start) <= header_size else start[header_size:] + rest
+        else:
+            if head is None or len(head) < HEAD_SIZE:
+                head = f.read(HEAD_SIZE)
+            f.seek(header_size)
+            payload = f.read()
+    count("read", header_size + len(payload))
+
+    _, key_bytes = split_tj_buffer(head, base_key_hex, header_size, name)
+    return payload, key_bytes, tj_type_from_bytes(head)
+
+
+@dataclass
+class DecodeResult:
+    """Resultado de um arquivo decodificado (precisa ser picklable).
+
+    size: bytes da fonte; plain_size: bytes decifrados; out_size: bytes
+    escritos (difere de plain_size quando o tjz foi descomprimido ou o
+    JSON reformatado). content/content_version: tipo do conteúdo e versão
+    do bytecode Lua (ver decoder.postprocess).
+    """
+    path: Path
+    tj_type: str
+    out_path: Path | None
+    size: int
+    error: str | None = None
+    digest: str | None = None
+    plain_size: int = 0
+    out_size: int = 0
+    container: str | None = None
+    duplicate_of: Path | None = None
+    content: str | None = None
+    content_version: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+# pastas de saída já criadas neste processo: um mkdir por pasta, não por arquivo
+_made_dirs: set[Path] = set()
+
+
+def _ensure_dir(path: Path) -> None:
+    """mkdir -p com cache por processo."""
+    if path in _made_dirs:
+        return
+    with stage("mkdir", files=1):
+        path.mkdir(parents=True, exist_ok=True)
+    while path not in _made_dirs and path != path.parent:
+        _made_dirs.add(path)
+        path = path.parent
+
+
+def _temp_path(dst: Path) -> Path:
+    """Arquivo temporário ao lado de dst (mesmo volume, para o rename ser atômico)."""
+    return dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+
+
+def _remove_path(path: Path, strict: bool = False) -> None:
+    """Apaga um arquivo ou uma pasta (saída de tjz com zip); strict: erros da pasta sobem."""
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path, ignore_errors=not strict)
+    else:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _replace_output(tmp: Path, dst: Path) -> None:
+    """Troca dst pelo tmp já completo; pasta e arquivo podem se substituir
+    (tjz com zip dentro vira pasta)."""
+    if dst.is_dir() and not dst.is_symlink():
+        shutil.rmtree(dst)
+    elif tmp.is_dir() and dst.exists():
+        dst.unlink()
+    os.replace(tmp, dst)
+
+
+def _write_output(dst: Path, data, tj_type: str | None = None,
+                  json_format: str | None = None) -> tuple[int, str | None]:
+    """Grava o plaintext; tjz comprimido passa pelo estágio de descompressão.
+
+    json_format: "pretty"/"minify" reformata plaintext JSON (ver decoder.postprocess).
+    A saída é escrita num temporário e só então renomeada para dst: um
+    processo morto no meio nunca deixa um .dec pela metade com cara de pronto.
+    Retorna (bytes escritos, container descomprimido ou None).
+    """
+    if tj_type == "tjz":
+        container = detect_container(data)
+        if container is not None:
+            tmp = _temp_path(dst)
+            try:
+                with stage("inflate", len(data), 1):
+                    size = inflate_to_file(data, tmp, container)
+                    _replace_output(tmp, dst)
+                return size, container
+            except (ValueError, zipfile.BadZipFile):
+                _remove_path(tmp)  # falso positivo do magic: grava o plaintext como está
+            except BaseException:
+                _remove_path(tmp)
+                raise
+    elif json_format is not None and sniff_plaintext(data) == "json":
+        try:
+            with stage("post", len(data), 1):
+                return _write_file(dst, lambda f: write_json(data, f, json_format)), None
+        except (ValueError, RecursionError):
+            pass  # JSON inválido ou aninhado demais: grava como está
+
+    with stage("write", len(data), 1):
+        return _write_file(dst, lambda f: f.write(data)), None
+
+
+def _write_file(dst: Path, fill) -> int:
+    """Cria dst via temporário + rename; fill(f) escreve e retorna os bytes escritos."""
+    tmp = _temp_path(dst)
+    _ensure_dir(dst.parent)
+    try:
+        f = tmp.open("wb")
+    except FileNotFoundError:
+        # pasta apagada depois de entrar no cache (ex.: entre dois Decode All na GUI)
+        _made_dirs.clear()
+        _ensure_dir(dst.parent)
+        f = tmp.open("wb")
+    try:
+        with f:
+            size = fill(f)
+        _replace_output(tmp, dst)
+    except BaseException:
+        _remove_path(tmp)
+        raise
+    return size
+
+
+def _new_word_buffer(n_words: int) -> array:
+    """array de uint32 com n_words zeros (já serve de padding do v49)."""
+    typecode = "I" if array("I").itemsize == 4 else "L"
+    return array(typecode, [0]) * n_words
+
+
+def _decrypt_stream_low_memory(f,
+                               size: int,
+                               base_key_hex: str | None,
+                               header_size: int,
+                               head: bytes | None,
+                               name: object = "<stream>",
+                               digest=None) -> tuple[memoryview, TjType]:
+    """Decifra in-place um arquivo aberto (offset 0) de `size` bytes.
+
+    digest: como em _load_tj_file; o payload entra no hash antes do decrypt.
+    Retorna (memoryview dos v43 bytes do plaintext, tipo).
+    """
+    with stage("read", size, 1):
+        if digest is not None:
+            start = f.read(header_size)
+            digest.update(start)
+            if head is None or len(head) < HEAD_SIZE:
+                head = start[:HEAD_SIZE]
+        if head is None or len(head) < HEAD_SIZE:
+            head = f.read(HEAD_SIZE)
+    _, key_bytes = split_tj_buffer(head, base_key_hex, header_size, name)
+
+    payload_size = max(size - header_size, 0)
+    words = _new_word_buffer((payload_size + 3) // 4)
+    with stage("read"):
+        f.seek(header_size)
+        raw = memoryview(words).cast("B")
+        got = f.readinto(raw)
+        if digest is not None:
+            digest.update(raw[:got])
+
+    # as words do arquivo são little-endian
+    if sys.byteorder == "big":
+        words.byteswap()
+    v43 = tj_xxtea_decrypt_inplace(words, key_bytes)
+    if sys.byteorder == "big":
+        words.byteswap()
+    return memoryview(words).cast("B")[:v43], tj_type_from_bytes(head)
+
+
+def _decode_low_memory(src: Path,
+                       dst: Path,
+                       base_key_hex: str | None,
+                       header_size: int,
+                       head: bytes | None,
+                       digest=None) -> DecodeResult:
+    with src.open("rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        plain, tj_type = _decrypt_stream_low_memory(f, size, base_key_hex, header_size, head, src, digest)
+
+    # sem reformatar JSON: a árvore do json custaria várias vezes o tamanho do arquivo
+    with stage("post", files=1):
+        content, version = classify_plain(plain, tj_type)
+    out_size, container = _write_output(dst, plain, tj_type)
+    return DecodeResult(src, tj_type, dst, size, plain_size=len(plain), out_size=out_size, container=container,
+                        content=content, content_version=version,
+                        digest=digest.hexdigest() if digest is not None else None)
+
+
+def decode_file_low_memory(path: str | Path,
+                           out_path: str | Path | None = None,
+                           base_key_hex: str | None = None,
+                           header_size: int = 23,
+                           head: bytes | None = None) -> Path:
+    """Decodifica um arquivo grande com memória limitada.
+
+    O payload é lido com readinto() direto para um array('I') de v50 words,
+    decifrado in-place e os v43 bytes do resultado são escritos a partir de
+    um memoryview desse mesmo array. Não existe cópia em bytes do arquivo,
+    do payload com padding, lista de ints nem join do resultado: o pico de
+    memória é ~1x o tamanho do arquivo (o buffer de words), bem abaixo do
+    limite de 2x do arquivo.
+    """
+    src = Path(path)
+    if out_path is None:
+        out_path = default_output_path(src)
+    return _decode_low_memory(src, Path(out_path), base_key_hex, header_size, head).out_path
+
+
+def _wants_low_memory(src: Path, low_memory: bool | None) -> bool:
+    if low_memory is not None:
+        return low_memory
+    try:
+        return src.stat().st_size >= LOW_MEMORY_THRESHOLD
+    except OSError:
+        return False
+
+
 def decode_single_file(path: str | Path,
                        out_path: str | Path | None = None,
                        base_key_hex: str | None = None,
-                       header_size: int = 23) -> Path:
+                       header_size: int = 23,
+                       head: bytes | None = None,
+                       low_memory: bool | None = None) -> Path:
     """Decodifica um único arquivo tj!/tje/tjz.
 
+    head: magic + header já lidos (ex.: por iter_tj_files(with_head=True)).
+    low_memory: força (True) ou desliga (False) o decode_file_low_memory;
+    None usa o modo de memória limitada a partir de LOW_MEMORY_THRESHOLD.
+    Arquivos tjz comprimidos (zlib/gzip/zip) saem já descomprimidos.
     Retorna o Path do arquivo de saída.
     """
     src = Path(path)
@@ -51,42 +390,833 @@ def decode_single_file(path: str | Path,
         out_path = default_output_path(src)
     dst = Path(out_path)
 
-    with src.open("rb") as f:
-        raw = f.read()
+    if _wants_low_memory(src, low_memory):
+        return decode_file_low_memory(src, dst, base_key_hex, header_size, head)
 
-    magic = raw[:3]
-    if magic not in (b"tj!", b"tje", b"tjz"):
-        raise ValueError(f"Arquivo {src} não parece ser tj!/tje/tjz (magic={magic!r})")
+    data_for_xxtea, key_bytes, tj_type = _load_tj_file(src, base_key_hex, header_size, head)
+    decrypted = tj_xxtea_decrypt_bytes(data_for_xxtea, key_bytes)
 
-    # header usado pelo jogo = this+3 → no arquivo é offset 3..18
-    header = raw[3:19]
-    if len(header) != 16:
-        raise ValueError(f"Header muito curto em {src}: {len(header)} bytes")
+    _write_output(dst, decrypted, tj_type)
+    return dst
 
-    key_bytes = derive_file_key_from_file(str(src), base_key_hex)
-    data_for_xxtea = raw[header_size:]
-    decrypted = tj_xxtea_decrypt_bytes(data_for_xxtea, key_bytes)
 
-    dst.parent.mkdir(parents=True, exist_ok=True)
-    with dst.open("wb") as f:
-        f.write(decrypted)
+def decrypt_tj_file(path: str | Path,
+                    base_key_hex: str | None = None,
+                    header_size: int = 23,
+                    head: bytes | None = None) -> tuple[bytes, TjType]:
+    """Decifra um arquivo tj!/tje/tjz só em memória, sem gravar saída.
 
-    return dst
+    Retorna (plaintext, tipo); tjz volta ainda comprimido (ver decompress).
+    """
+    payload, key_bytes, tj_type = _load_tj_file(Path(path), base_key_hex, header_size, head)
+    return tj_xxtea_decrypt_bytes(payload, key_bytes), tj_type
+
+
+def _source_size(src: Path) -> int:
+    try:
+        return src.stat().st_size
+    except OSError:
+        return 0
+
+
+def decode_many_files(paths,
+                      base_key_hex: str | None = None,
+                      header_size: int = 23,
+                      backend: str | None = None,
+                      heads=None,
+                      out_dir: str | Path | None = None,
+                      source_root: str | Path | None = None,
+                      json_format: str | None = None,
+                      with_digest: bool = False) -> list[DecodeResult]:
+    """Decodifica um lote de arquivos com uma única chamada ao XXTEA em lote.
+
+    heads: opcional, magic + header já lidos de cada arquivo (mesma ordem).
+    with_digest: DecodeResult.digest recebe o hash da fonte (manifest.file_digest)
+    calculado na mesma leitura do decode.
+    Cada saída vai para default_output_path, ou, com out_dir, para
+    mirrored_output_path (árvore de source_root espelhada em out_dir).
+    Cada plaintext é classificado (DecodeResult.content) e, com
+    json_format, JSON sai reformatado (ver decoder.postprocess).
+    Retorna um DecodeResult por arquivo, na ordem de entrada; falhas vêm
+    com `error` preenchido.
+    """
+    srcs = [Path(p) for p in paths]
+    results: list = [None] * len(srcs)
+    if heads is None:
+        heads = [None] * len(srcs)
+
+    def failed(i: int, e: Exception) -> DecodeResult:
+        head = heads[i] or b""
+        return DecodeResult(srcs[i], tj_type_from_bytes(head), None, _source_size(srcs[i]), str(e))
+
+    pending: list[int] = []
+    types: list[TjType] = []
+    items: list[tuple[bytes, bytes]] = []
+    digests: dict[int, str] = {}
+    for i, src in enumerate(srcs):
+        digest = _new_digest() if with_digest else None
+        # arquivos grandes não entram no lote: vão direto para o modo de memória limitada
+        if _wants_low_memory(src, None):
+            try:
+                dst = _output_path(src, out_dir, source_root)
+                results[i] = _decode_low_memory(src, dst, base_key_hex, header_size, heads[i], digest)
+            except (OSError, ValueError) as e:
+                results[i] = failed(i, e)
+            continue
+        try:
+            payload, key_bytes, tj_type = _load_tj_file(src, base_key_hex, header_size, heads[i], digest)
+        except (OSError, ValueError) as e:
+            results[i] = failed(i, e)
+            continue
+        if digest is not None:
+            digests[i] = digest.hexdigest()
+        pending.append(i)
+        types.append(tj_type)
+        items.append((payload, key_bytes))
+
+    decrypted = tj_xxtea_decrypt_many(items, backend=backend)
+    for i, tj_type, (payload, _), plain in zip(pending, types, items, decrypted):
+        src = srcs[i]
+        size = header_size + len(payload)
+        if isinstance(plain, Exception):
+            results[i] = DecodeResult(src, tj_type, None, size, str(plain))
+            continue
+        dst = _output_path(src, out_dir, source_root)
+        with stage("post", files=1):
+            content, version = classify_plain(plain, tj_type)
+        try:
+            out_size, container = _write_output(dst, plain, tj_type, json_format)
+        except OSError as e:
+            results[i] = DecodeResult(src, tj_type, None, size, str(e))
+            continue
+        results[i] = DecodeResult(src, tj_type, dst, size, plain_size=len(plain), out_size=out_size,
+                                  container=container, content=content, content_version=version,
+                                  digest=digests.get(i))
+
+    return results
+
+
+def decrypt_many_files(jobs: list[tuple[Path, str, bytes | None]],
+                       base_key_hex: str | None = None,
+                       header_size: int = 23,
+                       json_format: str | None = None) -> list[tuple[DecodeResult, bytes | None]]:
+    """Como decode_many_files, mas sem gravar: devolve (resultado, plaintext)
+    por job (path, tipo, head), para um OutputSink gravar depois (ver decoder.sink).
+
+    O plaintext é None nas falhas; tjz volta ainda comprimido. Com
+    json_format, o JSON já volta reformatado (out_size é o tamanho dele).
+    Arquivos a partir de LOW_MEMORY_THRESHOLD voltam como memoryview do
+    buffer decifrado in-place (sem cópia em bytes).
+    """
+    results: list = [None] * len(jobs)
+    pending: list[int] = []
+    items: list[tuple[bytes, bytes]] = []
+    for i, (src, t, head) in enumerate(jobs):
+        try:
+            size = src.stat().st_size
+            if size >= LOW_MEMORY_THRESHOLD:
+                with src.open("rb") as f:
+                    plain, t = _decrypt_stream_low_memory(f, size, base_key_hex, header_size, head, src)
+                results[i] = _post_plain(DecodeResult(src, t, None, size, plain_size=len(plain)), plain, None)
+                continue
+            payload, key_bytes, t = _load_tj_file(src, base_key_hex, header_size, head)
+        except (OSError, ValueError) as e:
+            results[i] = (DecodeResult(src, t, None, _source_size(src), str(e)), None)
+            continue
+        pending.append(i)
+        items.append((payload, key_bytes))
+
+    for i, (payload, _), plain in zip(pending, items, tj_xxtea_decrypt_many(items)):
+        src, t, _ = jobs[i]
+        size = header_size + len(payload)
+        if isinstance(plain, Exception):
+            results[i] = (DecodeResult(src, t, None, size, str(plain)), None)
+        else:
+            results[i] = _post_plain(DecodeResult(src, t, None, size, plain_size=len(plain)), plain, json_format)
+    return results
+
+
+def _post_plain(res: DecodeResult, plain, json_format: str | None) -> tuple[DecodeResult, bytes | memoryview]:
+    """Estágio pós-decrypt de decrypt_many_files: classifica e reformata JSON."""
+    with stage("post", len(plain), 1):
+        res.content, res.content_version = classify_plain(plain, res.tj_type)
+        if json_format is not None and res.content == "json" and res.tj_type != "tjz":
+            try:
+                plain = format_json(plain, json_format)
+            except (ValueError, RecursionError):
+                pass  # JSON inválido ou aninhado demais: segue como está
+    return res, plain
 
 
 def iter_tj_files(root: str | Path,
                   include_tj_bang: bool = True,
                   include_tje: bool = True,
-                  include_tjz: bool = False):
-    """Itera recursivamente arquivos que começam com tj!/tje/tjz."""
+                  include_tjz: bool = False,
+                  with_head: bool = False):
+    """Itera recursivamente arquivos que começam com tj!/tje/tjz.
+
+    Gera (path, tipo) ou, com with_head=True, (path, tipo, head), onde head
+    são os HEAD_SIZE bytes já lidos, para o decode não reabrir o arquivo
+    só para pegar o header.
+    """
+    wanted = {
+        "tj_bang": include_tj_bang,
+        "tje": include_tje,
+        "tjz": include_tjz,
+    }
     root_path = Path(root)
     for dirpath, _, filenames in os.walk(root_path):
         for name in filenames:
             full = Path(dirpath) / name
-            t = detect_tj_type(full)
-            if t == "tj_bang" and include_tj_bang:
-                yield full, t
-            elif t == "tje" and include_tje:
-                yield full, t
-            elif t == "tjz" and include_tjz:
+            try:
+                head = read_tj_head(full)
+            except OSError:
+                continue
+            t = tj_type_from_bytes(head)
+            if not wanted.get(t, False):
+                continue
+            if with_head:
+                yield full, t, head
+            else:
                 yield full, t
+
+
+# ----------------------------------------------------------------------
+# Decode All paralelo
+# ----------------------------------------------------------------------
+DEFAULT_CHUNK_SIZE = 64
+
+
+class DecodeTimeout(Exception):
+    """Um arquivo (ou lote) passou do tempo limite do Decode All."""
+
+
+@contextmanager
+def _time_limit(seconds: float | None):
+    """Levanta DecodeTimeout depois de `seconds` (SIGALRM).
+
+    Só vale na thread principal de sistemas com setitimer (os processos do
+    pool no Linux/macOS); nos demais casos não limita nada.
+    """
+    if not seconds or not hasattr(signal, "setitimer") or \
+            threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise DecodeTimeout(f"tempo limite de {seconds:g}s excedido")
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _decode_chunk(chunk: list[tuple[Path, str, bytes | None]],
+                  base_key_hex: str | None,
+                  header_size: int,
+                  with_digest: bool = False,
+                  out_dir: Path | None = None,
+                  source_root: Path | None = None,
+                  profile: str | None = None,
+                  return_plain: bool = False,
+                  max_file_size: int | None = None,
+                  file_timeout: float | None = None,
+                  json_format: str | None = None) -> tuple[list, dict, float, dict | None]:
+    """Executado nos processos do pool: decodifica um lote de arquivos.
+
+    with_digest: calcula também o hash da fonte (modo incremental).
+    profile: "stages" mede os estágios do lote; "cprofile" também roda o cProfile.
+    return_plain: não grava nada; cada resultado vira (DecodeResult, plaintext)
+    para o OutputSink do processo principal.
+    max_file_size / file_timeout: fontes maiores que o limite viram falha sem
+    serem lidas; um arquivo que passa de file_timeout segundos vira falha sem
+    derrubar o resto do lote.
+    json_format: "pretty"/"minify" reformata as saídas JSON no mesmo passo.
+    Retorna (resultados, hits/misses do cache de keys neste lote, segundos de CPU,
+    {"stages": ..., "pstats": ...} ou None sem profile).
+    """
+    args = (chunk, base_key_hex, header_size, with_digest, out_dir, source_root, return_plain,
+            max_file_size, file_timeout, json_format)
+    if not profile:
+        return (*_decode_chunk_body(*args), None)
+
+    from .profiling import Profiler, activate, run_cprofile
+
+    profiler = Profiler()
+    previous = activate(profiler)
+    try:
+        raw = None
+        if profile == "cprofile":
+            (out, keys, cpu), raw = run_cprofile(_decode_chunk_body, *args)
+        else:
+            out, keys, cpu = _decode_chunk_body(*args)
+    finally:
+        activate(previous)
+    return out, keys, cpu, {"stages": profiler.to_dict(), "pstats": raw}
+
+
+def _failed_job(job: tuple, error: str, return_plain: bool = False):
+    res = DecodeResult(job[0], job[1], None, _source_size(job[0]), error)
+    return (res, None) if return_plain else res
+
+
+def _decode_chunk_body(chunk, base_key_hex, header_size, with_digest, out_dir, source_root, return_plain,
+                       max_file_size=None, file_timeout=None, json_format=None):
+    started = time.process_time()
+    keys_before = key_cache_stats()
+
+    out = []
+    if max_file_size:
+        jobs = []
+        for job in chunk:
+            size = _source_size(job[0])
+            if size > max_file_size:
+                out.append(_failed_job(job, f"arquivo de {size} bytes acima do limite de {max_file_size} bytes",
+                                       return_plain))
+            else:
+                jobs.append(job)
+    else:
+        jobs = chunk
+
+    args = (base_key_hex, header_size, with_digest, out_dir, source_root, return_plain, json_format)
+    try:
+        with _time_limit(file_timeout * len(jobs) if file_timeout else None):
+            out += _decode_jobs(jobs, *args)
+    except DecodeTimeout:
+        # o lote estourou: refaz arquivo por arquivo para isolar o culpado
+        for job in jobs:
+            try:
+                with _time_limit(file_timeout):
+                    out += _decode_jobs([job], *args)
+            except DecodeTimeout as e:
+                out.append(_failed_job(job, str(e), return_plain))
+
+    keys_after = key_cache_stats()
+    keys = {name: keys_after[name] - keys_before[name] for name in ("hits", "misses")}
+    return out, keys, time.process_time() - started
+
+
+def _decode_jobs(jobs, base_key_hex, header_size, with_digest, out_dir, source_root, return_plain,
+                 json_format=None) -> list:
+    if return_plain:
+        # memoryview não é picklable: os grandes viram bytes só na volta ao
+        # processo principal, um por vez (o pickle copiaria de qualquer jeito)
+        out = decrypt_many_files(jobs, base_key_hex, header_size, json_format)
+        for i, (res, plain) in enumerate(out):
+            if isinstance(plain, memoryview):
+                out[i] = (res, plain.tobytes())
+        return out
+
+    types = {p: t for p, t, _ in jobs}
+    # com with_digest o hash sai da mesma leitura do decode (sem reler a fonte)
+    out = decode_many_files([p for p, _, _ in jobs], base_key_hex, header_size,
+                            heads=[h for _, _, h in jobs], out_dir=out_dir, source_root=source_root,
+                            json_format=json_format, with_digest=with_digest)
+    for res in out:
+        res.tj_type = types.get(res.path, res.tj_type)
+    return out
+
+
+class ParallelDecoder:
+    """Distribui decode_many_files em um ProcessPoolExecutor.
+
+    Os eventos são entregues em uma queue.Queue, consumida por quem chamou
+    (ex.: a GUI via after()):
+        ("total", n)             total de arquivos encontrados no scan
+        ("result", DecodeResult) um arquivo processado
+        ("auto_key", Detection)  com auto_key: key/header_size detectados (None: nenhum serviu)
+        ("error", mensagem)      erro fora de um arquivo (execução interrompida, journal,
+                                 prune, detecção de key); a mensagem já diz qual
+        ("skipped", n)           modo incremental: fontes inalteradas puladas
+        ("pruned", [Path])       modo incremental: saídas de fontes apagadas
+        ("key_cache", dict)      hits/misses do cache de keys somados dos processos
+        ("dedup", dict)          modo dedup: DedupStats.to_dict()
+        ("profile", dict)        com profile: tempo/CPU/bytes/arquivos por estágio
+        ("resumed", n)           resume: fontes já concluídas pela execução interrompida
+        ("done", cancelled)      fim da execução
+
+    root: pasta raiz dos jobs; obrigatória com incremental, out_dir ou dedup.
+    incremental: pula fontes inalteradas usando o DecodeManifest da raiz.
+    out_dir: grava as saídas espelhando a árvore da raiz (mirrored_output_path).
+    dedup: "link" ou "manifest" (ver decoder.dedup); fontes com o mesmo
+    conteúdo cifrado + key são decifradas uma vez só.
+    profile: "stages" mede cada estágio (ver decoder.profiling) em todos os
+    processos; "cprofile" junta também um cProfile dos workers em self.pstats.
+    sink: OutputSink (ver decoder.sink); os workers só decifram e as saídas
+    são gravadas por uma thread do processo principal. Não combina com
+    out_dir (o sink já define o destino), incremental nem dedup.
+    resume: com root e sem sink, cada saída concluída entra no journal da
+    pasta de saída (decoder.journal); com resume=True as fontes concluídas
+    por uma execução interrompida são puladas.
+    max_file_size: fontes maiores (bytes) viram falha sem serem lidas.
+    file_timeout: segundos por arquivo; o que passar vira falha (só POSIX).
+    json_format: "pretty" ou "minify" reformata as saídas JSON nos próprios
+    workers (ver decoder.postprocess); todo resultado vem com
+    content/content_version (Lua, bytecode LuaJIT 2.1, JSON, PNG...).
+    auto_key: depois do scan, detecta base key + header_size nos menores
+    arquivos (decoder.autodetect) na thread do decoder, no lugar de
+    base_key_hex/header_size; se nada servir, termina sem decifrar.
+
+    Um processo do pool que morre (falta de memória, crash no backend
+    nativo) não derruba o Decode All: o lote volta arquivo por arquivo, e um
+    arquivo que derruba o pool de novo roda sozinho no fim; se derrubar
+    mais uma vez, vira falha. Uma exceção inesperada vinda de um worker
+    também não: o lote volta arquivo por arquivo e só o culpado vira falha.
+    """
+
+    def __init__(self,
+                 workers: int | None = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 base_key_hex: str | None = None,
+                 header_size: int = 23,
+                 root: str | Path | None = None,
+                 incremental: bool = False,
+                 out_dir: str | Path | None = None,
+                 dedup: str | None = None,
+                 profile: str | None = None,
+                 sink=None,
+                 resume: bool = False,
+                 max_file_size: int | None = None,
+                 file_timeout: float | None = None,
+                 json_format: str | None = None,
+                 auto_key: bool = False):
+        if root is None and (incremental or out_dir is not None or dedup or sink is not None):
+            raise ValueError("root é obrigatório com incremental/out_dir/dedup/sink")
+        if sink is not None and (incremental or dedup or out_dir is not None):
+            raise ValueError("sink não combina com incremental/dedup/out_dir")
+        if dedup not in (None, "link", "manifest"):
+            raise ValueError(f"Modo de dedup inválido: {dedup!r}")
+        if dedup == "manifest" and incremental:
+            # as duplicatas não têm saída própria, então nunca ficariam "em dia"
+            raise ValueError("dedup='manifest' não combina com incremental")
+        if profile not in (None, "stages", "cprofile"):
+            raise ValueError(f"Modo de profile inválido: {profile!r}")
+        if resume and (root is None or sink is not None):
+            raise ValueError("resume precisa de root e não combina com sink")
+        if json_format not in (None, *JSON_FORMATS):
+            raise ValueError(f"Formato de JSON inválido: {json_format!r}")
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self.base_key_hex = base_key_hex
+        self.header_size = header_size
+        self.root = Path(root) if root is not None else None
+        self.incremental = incremental
+        self.out_dir = Path(out_dir) if out_dir is not None else None
+        self.dedup = dedup
+        self.profile = profile
+        self.sink = sink
+        self.resume = resume
+        self.max_file_size = max_file_size
+        self.file_timeout = file_timeout
+        self.json_format = json_format
+        self.auto_key = auto_key
+        self.profiler = None
+        self.pstats = None
+        self.events: queue.Queue = queue.Queue()
+        # hits/misses do cache de FILE KEY somados entre os processos do pool
+        self.key_stats = {"hits": 0, "misses": 0}
+        self._cancel = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._journal = None
+
+    def start(self, jobs: Iterable[tuple]) -> queue.Queue:
+        """Inicia o processamento em uma thread própria e retorna a fila.
+
+        jobs: (path, tipo) ou (path, tipo, head), como gerado por iter_tj_files.
+        """
+        self._thread = threading.Thread(target=self._run, args=(jobs,), daemon=True)
+        self._thread.start()
+        return self.events
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def _chunks(self, jobs: list[tuple[Path, str, bytes | None]]):
+        for i in range(0, len(jobs), self.chunk_size):
+            yield jobs[i:i + self.chunk_size]
+
+    def _filter_unchanged(self, manifest, jobs: list[tuple[Path, str, bytes | None]]):
+        """Separa os jobs cuja saída ainda está em dia com o manifesto."""
+        pending = []
+        self._stat: dict[Path, tuple[int, int, str]] = {}
+        for path, t, head in jobs:
+            try:
+                st = os.stat(path)
+                if head is None or len(head) < HEAD_SIZE:
+                    head = read_tj_head(path)
+                key_fp = manifest.fingerprint(head)
+            except (OSError, ValueError):
+                pending.append((path, t, head))
+                continue
+            out_path = _output_path(path, self.out_dir, self.root)
+            if manifest.is_up_to_date(path, head, st.st_size, st.st_mtime_ns, out_path):
+                continue
+            self._stat[path] = (st.st_size, st.st_mtime_ns, key_fp)
+            pending.append((path, t, head))
+        manifest.commit()
+        return pending
+
+    def _record(self, manifest, res: DecodeResult) -> None:
+        info = self._stat.get(res.path)
+        if info is None or not res.ok or res.digest is None or res.out_path is None:
+            return
+        size, mtime_ns, key_fp = info
+        manifest.record(res.path, size, mtime_ns, res.digest, key_fp, res.out_path)
+
+    def _group_duplicates(self, pool, jobs, with_digest: bool):
+        """Hash de conteúdo em paralelo; devolve só os jobs únicos.
+
+        As duplicatas ficam em self._dups[fonte única] = [(path, tipo, tamanho, digest)].
+        """
+        from .dedup import hash_chunk
+
+        futures = [pool.submit(hash_chunk, chunk, self.base_key_hex, self.header_size, with_digest)
+                   for chunk in self._chunks(jobs)]
+        first: dict[str, Path] = {}
+        unique = []
+        for chunk, fut in zip(self._chunks(jobs), futures):
+            if self._cancel.is_set():
+                fut.cancel()
+                continue
+            hashes, cpu = fut.result()
+            self._dedup_stats.hash_cpu += cpu
+            for job, info in zip(chunk, hashes):
+                if info is None:
+                    unique.append(job)
+                    continue
+                content, size, digest = info
+                canonical = first.setdefault(content, job[0])
+                if canonical == job[0]:
+                    unique.append(job)
+                    continue
+                self._dups.setdefault(canonical, []).append((job[0], job[1], size, digest))
+                self._dedup_stats.duplicates += 1
+                self._dedup_stats.bytes_saved += size
+        self._dedup_stats.unique = len(unique)
+        return unique
+
+    def _emit_duplicates(self, manifest, res: DecodeResult) -> None:
+        """Resultados das duplicatas de `res`, reaproveitando a saída dela."""
+        from .dedup import link_output
+
+        for path, tj_type, size, digest in self._dups.get(res.path, ()):
+            dup = DecodeResult(path, tj_type, None, size, res.error, digest, res.plain_size,
+                               res.out_size, res.container, duplicate_of=res.path,
+                               content=res.content, content_version=res.content_version)
+            if res.ok:
+                self._dedup_stats.out_bytes_saved += res.out_size
+                if self.dedup == "link":
+                    dst = _output_path(path, self.out_dir, self.root)
+                    try:
+                        link_output(res.out_path, dst)
+                        dup.out_path = dst
+                    except OSError as e:
+                        dup.error = str(e)
+            if manifest is not None:
+                self._record(manifest, dup)
+            self._emit(dup)
+
+    def _emit(self, res: DecodeResult) -> None:
+        if self._journal is not None and res.ok and res.out_path is not None:
+            self._journal.record(res.path, res.out_path)
+        self.events.put(("result", res))
+
+    def _open_journal(self, jobs: list) -> list:
+        """Abre o journal da pasta de saída; com resume, tira dos jobs o que já foi concluído."""
+        from .journal import JOURNAL_FILENAME, DecodeJournal
+
+        config = {"base_key": self.base_key_hex, "header_size": self.header_size,
+                  "out_dir": str(self.out_dir) if self.out_dir is not None else None,
+                  "json_format": self.json_format}
+        journal = DecodeJournal((self.out_dir or self.root) / JOURNAL_FILENAME, self.root, config)
+        kept = {}
+        if self.resume:
+            jobs, kept = journal.completed(jobs, journal.load())
+            self.events.put(("resumed", len(kept)))
+        journal.open(kept)
+        self._journal = journal
+        return jobs
+
+    def _detect_key(self, jobs: list) -> bool:
+        """auto_key: troca base_key_hex/header_size pelos detectados nos jobs."""
+        from .autodetect import detect_for_root
+
+        try:
+            det = detect_for_root(self.root, jobs)
+        except (OSError, ValueError) as e:
+            det = None
+            self.events.put(("error", f"Detecção de key: {e}"))
+        self.events.put(("auto_key", det))
+        if det is None:
+            return False
+        self.base_key_hex, self.header_size = det.base_key_hex, det.header_size
+        return True
+
+    def _submit(self, pool, chunk, with_digest: bool, return_plain: bool):
+        return pool.submit(_decode_chunk, chunk, self.base_key_hex, self.header_size, with_digest,
+                           self.out_dir, self.root, self.profile, return_plain,
+                           self.max_file_size, self.file_timeout, self.json_format)
+
+    def _finish_dedup(self, decode_cpu: float, decoded_bytes: int) -> None:
+        from .dedup import DUPLICATES_FILENAME, write_duplicates
+
+        stats = self._dedup_stats
+        if decoded_bytes:
+            # custo médio de CPU por byte decifrado, aplicado aos bytes pulados
+            stats.cpu_saved = decode_cpu / decoded_bytes * stats.bytes_saved
+        if self.dedup == "manifest":
+            groups = {src: [d[0] for d in dups] for src, dups in self._dups.items()}
+            write_duplicates((self.out_dir or self.root) / DUPLICATES_FILENAME, groups)
+        self.events.put(("dedup", stats.to_dict()))
+
+    def _run(self, jobs: Iterable[tuple]) -> None:
+        manifest = None
+        writer = None
+        finished = False
+        started = time.perf_counter()
+        previous_profiler = None
+        if self.profile:
+            from .profiling import Profiler, PstatsCollector, activate
+
+            self.profiler = Profiler()
+            self.pstats = PstatsCollector() if self.profile == "cprofile" else None
+            # mede os estágios da thread do decoder (scan, manifesto, hash)
+            previous_profiler = activate(self.profiler)
+        try:
+            with stage("scan"):
+                jobs = [(j[0], j[1], j[2] if len(j) > 2 else None) for j in jobs]
+            count("scan", files=len(jobs))
+            sources = {path for path, _, _ in jobs}
+
+            if self.auto_key and not self._detect_key(jobs):
+                return
+
+            if self.incremental:
+                from .manifest import DecodeManifest
+
+                manifest = DecodeManifest(self.root, self.base_key_hex, self.header_size,
+                                          json_format=self.json_format)
+                before = len(jobs)
+                with stage("manifest", files=before):
+                    jobs = self._filter_unchanged(manifest, jobs)
+                self.events.put(("skipped", before - len(jobs)))
+
+            if self.root is not None and self.sink is None:
+                jobs = self._open_journal(jobs)
+
+            self.events.put(("total", len(jobs)))
+
+            # limita lotes em voo para o cancelamento ser rápido
+            max_in_flight = self.workers * 2
+            with_digest = manifest is not None
+            decode_cpu = 0.0
+            decoded_bytes = 0
+            if self.sink is not None:
+                from .sink import SinkWriter
+
+                writer = SinkWriter(self.sink, lambda res: self.events.put(("result", res)),
+                                    profile=self.profiler is not None)
+            pool = ProcessPoolExecutor(max_workers=self.workers)
+            try:
+                if self.dedup:
+                    from .dedup import DedupStats
+
+                    self._dups: dict[Path, list] = {}
+                    self._dedup_stats = DedupStats()
+                    with stage("dedup_hash", files=len(jobs)):
+                        jobs = self._group_duplicates(pool, jobs, with_digest)
+                    if self.profiler is not None:
+                        # CPU do hash gasta nos workers
+                        self.profiler.add("dedup_hash", cpu=self._dedup_stats.hash_cpu)
+
+                def handle(out) -> None:
+                    nonlocal decode_cpu, decoded_bytes
+                    results, key_stats, cpu, prof = out
+                    decode_cpu += cpu
+                    if prof is not None:
+                        self._merge_profile(prof)
+                    for name, value in key_stats.items():
+                        self.key_stats[name] += value
+                    for res in results:
+                        if writer is not None:
+                            res, plain = res
+                            decoded_bytes += res.size
+                            if res.ok:
+                                writer.put(res, plain)  # o writer emite o "result"
+                            else:
+                                self.events.put(("result", res))
+                            continue
+                        decoded_bytes += res.size
+                        if manifest is not None:
+                            self._record(manifest, res)
+                        self._emit(res)
+                        if self.dedup:
+                            self._emit_duplicates(manifest, res)
+
+                def give_up(job, error: str) -> None:
+                    """Falha definitiva de um arquivo; as duplicatas dele falham junto."""
+                    res = _failed_job(job, error)
+                    if writer is not None:
+                        self.events.put(("result", res))
+                        return
+                    if manifest is not None:
+                        self._record(manifest, res)
+                    self._emit(res)
+                    if self.dedup:
+                        self._emit_duplicates(manifest, res)
+
+                def crashed(chunk, isolated: bool) -> None:
+                    """Lote cujo processo morreu: reparte, isola ou dá como falha."""
+                    if len(chunk) > 1:
+                        pending.extendleft([job] for job in reversed(chunk))
+                    elif not isolated:
+                        quarantine.append(chunk)
+                    else:
+                        give_up(chunk[0], "o processo do worker morreu decodificando "
+                                          "este arquivo (falta de memória?)")
+
+                def collect(fut, chunk, isolated: bool) -> bool:
+                    """Trata um lote concluído; True se o processo dele derrubou o pool."""
+                    try:
+                        out = fut.result()
+                    except BrokenProcessPool:
+                        crashed(chunk, isolated)
+                        return True
+                    except Exception as e:
+                        # exceção inesperada no worker: o lote volta arquivo por
+                        # arquivo e só o culpado vira falha; o Decode All segue
+                        if len(chunk) > 1:
+                            pending.extendleft([job] for job in reversed(chunk))
+                        else:
+                            give_up(chunk[0], f"erro no worker: {type(e).__name__}: {e}")
+                        return False
+                    handle(out)
+                    return False
+
+                pending = deque(self._chunks(jobs))
+                # arquivos que derrubaram o pool: rodam sozinhos, no fim
+                quarantine: deque = deque()
+                in_flight: dict = {}  # future -> (lote, rodando isolado)
+                while not self._cancel.is_set():
+                    if not in_flight and not pending and quarantine:
+                        chunk = quarantine.popleft()
+                        in_flight[self._submit(pool, chunk, with_digest, writer is not None)] = (chunk, True)
+                    while pending and len(in_flight) < max_in_flight:
+                        chunk = pending.popleft()
+                        try:
+                            in_flight[self._submit(pool, chunk, with_digest, writer is not None)] = (chunk, False)
+                        except BrokenProcessPool:
+                            # o pool caiu com lotes em voo; o wait abaixo trata deles
+                            pending.appendleft(chunk)
+                            break
+                    if not in_flight:
+                        break
+
+                    done, _ = wait(in_flight, timeout=0.2, return_when=FIRST_COMPLETED)
+                    if not done:
+                        continue
+                    broken = False
+                    for fut in done:
+                        chunk, isolated = in_flight.pop(fut)
+                        broken = collect(fut, chunk, isolated) or broken
+                    if broken:
+                        # o pool inteiro caiu: os outros lotes em voo voltam para a fila
+                        for fut, (chunk, isolated) in in_flight.items():
+                            collect(fut, chunk, isolated)
+                        in_flight.clear()
+                        pool.shutdown(wait=True)
+                        pool = ProcessPoolExecutor(max_workers=self.workers)
+                    if manifest is not None:
+                        manifest.commit()
+            finally:
+                pool.shutdown(wait=True, cancel_futures=True)
+            if writer is not None:
+                if self._cancel.is_set():
+                    writer.abort()
+                else:
+                    writer.close()
+                if writer.profiler is not None:
+                    self.profiler.merge(writer.profiler.to_dict())
+                writer = None
+
+            if manifest is not None and not self._cancel.is_set():
+                pruned, failed = manifest.prune(sources)
+                self.events.put(("pruned", pruned))
+                for out_path, error in failed.items():
+                    self.events.put(("error", f"Saída de fonte apagada não removida: {out_path}: {error}"))
+            if self.dedup and not self._cancel.is_set():
+                self._finish_dedup(decode_cpu, decoded_bytes)
+            finished = not self._cancel.is_set()
+            self.events.put(("key_cache", dict(self.key_stats)))
+            if self.profiler is not None:
+                self.events.put(("profile", {
+                    "wall": round(time.perf_counter() - started, 6),
+                    "workers": self.workers,
+                    "stages": self.profiler.to_dict(),
+                }))
+        except Exception as e:
+            self.events.put(("error", f"Decode All interrompido: {e}"))
+        finally:
+            if self.profile:
+                activate(previous_profiler)
+            if self._journal is not None:
+                try:
+                    self._journal.close(finished)
+                except OSError as e:
+                    self.events.put(("error", f"Falha ao fechar o journal: {e}"))
+                self._journal = None
+            if writer is not None:
+                # só chega aqui com erro: o zip/tar pela metade é descartado
+                try:
+                    writer.abort()
+                except OSError as e:
+                    self.events.put(("error", f"Falha ao descartar a saída incompleta: {e}"))
+            if manifest is not None:
+                manifest.close()
+            self.events.put(("done", self._cancel.is_set()))
+
+    def _merge_profile(self, prof: dict) -> None:
+        self.profiler.merge(prof["stages"])
+        if self.pstats is not None:
+            self.pstats.add(prof["pstats"])
+
+
+class ThroughputMeter:
+    """Acumula arquivos/bytes processados e calcula arquivos/s, MB/s e ETA."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.total: int | None = None
+        self.files = 0
+        self.bytes = 0
+
+    def add(self, size: int) -> None:
+        self.files += 1
+        self.bytes += size
+
+    @property
+    def elapsed(self) -> float:
+        return max(time.monotonic() - self.started, 1e-6)
+
+    @property
+    def files_per_sec(self) -> float:
+        return self.files / self.elapsed
+
+    @property
+    def mb_per_sec(self) -> float:
+        return self.bytes / self.elapsed / (1024 * 1024)
+
+    @property
+    def eta(self) -> float | None:
+        """Segundos restantes estimados, ou None se ainda não há base."""
+        if self.total is None or self.files == 0:
+            return None
+        return (self.total - self.files) / self.files_per_sec
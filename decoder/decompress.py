@@ -0,0 +1,120 @@
+"""
+Estágio pós-decrypt dos arquivos tjz: detecta o container de compressão
+do plaintext (zlib/gzip/zip) e descomprime em streaming direto para o disco.
+
+O plaintext decifrado já está em memória (o XXTEA precisa do bloco
+inteiro), mas a saída inflada nunca é montada inteira: o decompressobj é
+alimentado em blocos e cada pedaço é escrito assim que sai.
+"""
+from __future__ import annotations
+
+import shutil
+import zipfile
+import zlib
+from io import BytesIO
+from pathlib import Path, PurePosixPath
+
+# tamanho dos blocos de entrada/saída do decompressobj
+STREAM_CHUNK = 256 * 1024
+
+# cocos2d costuma prefixar o zlib com o tamanho inflado (uint32)
+_SIZE_PREFIX = 4
+
+
+def _is_zlib_header(b: bytes) -> bool:
+    # CMF/FLG: método 8 (deflate) e checksum do header múltiplo de 31
+    return len(b) >= 2 and (b[0] & 0x0F) == 8 and (b[0] >> 4) <= 7 and ((b[0] << 8) | b[1]) % 31 == 0
+
+
+def detect_container(plain) -> str | None:
+    """Retorna "gzip", "zip", "zlib", "zlib+size" ou None se não for comprimido."""
+    head = bytes(plain[:_SIZE_PREFIX + 2])
+    if head[:2] == b"\x1f\x8b":
+        return "gzip"
+    if head[:4] == b"PK\x03\x04":
+        return "zip"
+    if _is_zlib_header(head[:2]):
+        return "zlib"
+    if _is_zlib_header(head[_SIZE_PREFIX:_SIZE_PREFIX + 2]):
+        return "zlib+size"
+    return None
+
+
+def _stream_inflate(data: memoryview, out, wbits: int) -> int:
+    d = zlib.decompressobj(wbits)
+    written = 0
+    for start in range(0, len(data), STREAM_CHUNK):
+        chunk = data[start:start + STREAM_CHUNK]
+        while chunk:
+            piece = d.decompress(chunk, STREAM_CHUNK)
+            out.write(piece)
+            written += len(piece)
+            chunk = d.unconsumed_tail
+        if d.eof:
+            break
+    piece = d.flush()
+    out.write(piece)
+    written += len(piece)
+    if not d.eof:
+        raise ValueError("Stream comprimido truncado")
+    return written
+
+
+def _extract_zip(data, dst: Path) -> int:
+    """Extrai os membros para a pasta dst (ignora nomes absolutos ou com '..')."""
+    written = 0
+    with zipfile.ZipFile(BytesIO(data)) as zf:
+        for info in zf.infolist():
+            name = PurePosixPath(info.filename)
+            if info.is_dir() or name.is_absolute() or ".." in name.parts:
+                continue
+            target = dst.joinpath(*name.parts)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with zf.open(info) as src, target.open("wb") as out:
+                shutil.copyfileobj(src, out, STREAM_CHUNK)
+            written += info.file_size
+    return written
+
+
+def inflate_to_file(plain, dst: Path, container: str) -> int:
+    """Descomprime `plain` em dst e retorna o tamanho inflado.
+
+    Para "zip", dst vira uma pasta com os membros do arquivo.
+    """
+    dst.parent.mkdir(parents=True, exist_ok=True)
+
+    if container == "zip":
+        return _extract_zip(memoryview(plain).cast("B"), dst)
+
+    with dst.open("wb") as out:
+        return inflate_to_stream(plain, out, container)
+
+
+def _zlib_stream(plain, container: str) -> tuple[memoryview, int]:
+    """(dados a partir do stream comprimido, wbits do decompressobj)."""
+    data = memoryview(plain).cast("B")
+    if container == "gzip":
+        return data, 16 + zlib.MAX_WBITS
+    if container == "zlib":
+        return data, zlib.MAX_WBITS
+    if container == "zlib+size":
+        return data[_SIZE_PREFIX:], zlib.MAX_WBITS
+    raise ValueError(f"Container desconhecido: {container!r}")
+
+
+def inflate_to_stream(plain, out, container: str) -> int:
+    """Descomprime um container gzip/zlib em streaming para o arquivo `out`."""
+    data, wbits = _zlib_stream(plain, container)
+    try:
+        return _stream_inflate(data, out, wbits)
+    except zlib.error as e:
+        raise ValueError(f"Falha ao descomprimir ({container}): {e}") from None
+
+
+def inflate_bytes(plain, container: str, limit: int | None = None) -> bytes:
+    """Descomprime gzip/zlib em memória; com limit, para nesse tamanho (preview)."""
+    data, wbits = _zlib_stream(plain, container)
+    try:
+        return zlib.decompressobj(wbits).decompress(data, limit or 0)
+    except zlib.error as e:
+        raise ValueError(f"Falha ao descomprimir ({container}): {e}") from None
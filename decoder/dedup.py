@@ -0,0 +1,114 @@
+"""
+Deduplicação por conteúdo no Decode All.
+
+Builds do client repetem o mesmo asset em vários caminhos (atlas de UI,
+módulos Lua copiados entre cenas). Antes do decode, cada fonte recebe um
+hash de magic + FILE KEY + payload cifrado: fontes com o mesmo hash geram
+exatamente a mesma saída, então só a primeira é decifrada. As demais viram
+hardlinks para a saída dela (modo "link") ou só entram em um JSON de
+duplicatas (modo "manifest").
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from .decode_logic import HEAD_SIZE, split_tj_buffer
+
+DEDUP_MODES = ("link", "manifest")
+
+# JSON de duplicatas do modo "manifest" (na pasta de saída ou na raiz)
+DUPLICATES_FILENAME = "tj_duplicates.json"
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def content_hash(path: Path,
+                 base_key_hex: str | None,
+                 header_size: int,
+                 with_digest: bool = False) -> tuple[str, int, str | None]:
+    """(hash de magic + FILE KEY + payload, tamanho, blake2b do arquivo ou None).
+
+    O arquivo é lido uma vez em blocos; with_digest devolve também o mesmo
+    hash de manifest.file_digest, para o modo incremental não reler a fonte.
+    """
+    with open(path, "rb") as f:
+        prefix = f.read(max(header_size, HEAD_SIZE))
+        _, key_bytes = split_tj_buffer(prefix, base_key_hex, header_size, path)
+        h = hashlib.blake2b(prefix[:3] + key_bytes, digest_size=16)
+        h.update(prefix[header_size:])
+        whole = hashlib.blake2b(prefix, digest_size=16) if with_digest else None
+        size = len(prefix)
+        while True:
+            block = f.read(_HASH_CHUNK)
+            if not block:
+                break
+            h.update(block)
+            if whole is not None:
+                whole.update(block)
+            size += len(block)
+    return h.hexdigest(), size, whole.hexdigest() if whole is not None else None
+
+
+def hash_chunk(chunk: list[tuple[Path, str, bytes | None]],
+               base_key_hex: str | None,
+               header_size: int,
+               with_digest: bool = False) -> tuple[list, float]:
+    """Executado nos processos do pool: content_hash de um lote.
+
+    Retorna (um resultado ou None por job, segundos de CPU gastos).
+    """
+    started = time.process_time()
+    out = []
+    for path, _, _ in chunk:
+        try:
+            out.append(content_hash(path, base_key_hex, header_size, with_digest))
+        except (OSError, ValueError):
+            out.append(None)  # vai para o decode normal, que reporta o erro
+    return out, time.process_time() - started
+
+
+def link_output(src_out: Path, dst: Path) -> None:
+    """Cria dst apontando para a saída já gravada (hardlink; cópia se não der)."""
+    if dst == src_out:
+        return
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if src_out.is_dir():
+        # tjz com zip dentro vira pasta: diretório não tem hardlink
+        shutil.copytree(src_out, dst, dirs_exist_ok=True)
+        return
+    if dst.exists():
+        dst.unlink()
+    try:
+        os.link(src_out, dst)
+    except OSError:
+        shutil.copyfile(src_out, dst)
+
+
+@dataclass
+class DedupStats:
+    """Resumo do modo dedup (enviado no evento ("dedup", dict))."""
+    unique: int = 0
+    duplicates: int = 0
+    bytes_saved: int = 0        # bytes de fonte que não foram decifrados
+    out_bytes_saved: int = 0    # bytes de saída que não foram gravados
+    cpu_saved: float = 0.0      # segundos de CPU de decode estimados
+    hash_cpu: float = 0.0       # segundos de CPU gastos no hash
+
+    def to_dict(self) -> dict:
+        d = asdict(self)
+        d["cpu_saved"] = round(d["cpu_saved"], 3)
+        d["hash_cpu"] = round(d["hash_cpu"], 3)
+        return d
+
+
+def write_duplicates(path: Path, groups: dict[Path, list[Path]]) -> None:
+    """Grava o JSON {fonte decifrada: [fontes idênticas]}."""
+    data = {str(src): [str(p) for p in dups] for src, dups in groups.items() if dups}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=1, ensure_ascii=False) + "\n", encoding="utf-8")
@@ -0,0 +1,267 @@
+"""
+Diff de dois dumps do client (build antigo x patch novo) sem decifrar tudo.
+
+Os arquivos são pareados pelo caminho relativo. Um par só é decifrado se a
+parte cifrada indicar mudança:
+- tamanho diferente: mudou (decifra só o novo);
+- mesmo tamanho e mesmo magic + header (mesma FILE KEY): compara o
+  ciphertext em blocos nos processos do pool, parando no primeiro byte
+  diferente; igual = inalterado, sem decrypt;
+- mesmo tamanho e header diferente (key nova): decifra os dois e compara
+  o plaintext; igual = só recifrado ("rekeyed"), sem saída.
+Arquivos novos e alterados são decifrados para out_dir (árvore do build
+novo) e a lista completa vai para DIFF_FILENAME.
+"""
+from __future__ import annotations
+
+import json
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from .decode_logic import (
+    DEFAULT_CHUNK_SIZE,
+    HEAD_SIZE,
+    _write_output,
+    decrypt_many_files,
+    iter_tj_files,
+    read_tj_head,
+)
+from .postprocess import classify_plain
+
+# relatório do diff na pasta de saída
+DIFF_FILENAME = "tj_diff.json"
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+REKEYED = "rekeyed"        # mesmo plaintext, recifrado com outro header/key
+UNCHANGED = "unchanged"
+STATUSES = (ADDED, REMOVED, CHANGED, REKEYED, UNCHANGED)
+
+_COMPARE_CHUNK = 1024 * 1024
+
+
+@dataclass
+class DiffEntry:
+    """Um caminho relativo comparado entre os dois builds (precisa ser picklable)."""
+    rel: str
+    status: str
+    tj_type: str
+    old_size: int = 0
+    new_size: int = 0
+    out_path: Path | None = None
+    content: str | None = None
+    content_version: str | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def scan_roots(roots: list[Path],
+               include_tj_bang: bool = True,
+               include_tje: bool = True,
+               include_tjz: bool = True,
+               use_index: bool = True,
+               persist_index: bool = False) -> list[list[tuple[Path, str, bytes | None]]]:
+    """Jobs (path, tipo, head) de cada raiz, varridas ao mesmo tempo (uma thread por raiz).
+
+    O índice de cada raiz fica no diretório temporário, para o diff não
+    gravar nada dentro dos dumps; persist_index usa o índice padrão
+    (INDEX_FILENAME dentro da raiz, o mesmo do Decode All).
+    """
+    def scan(root: Path) -> list:
+        if use_index:
+            from .scanner import iter_indexed_tj_files, temp_index_path
+
+            index_path = None if persist_index else temp_index_path(root)
+            return list(iter_indexed_tj_files(root, include_tj_bang, include_tje, include_tjz,
+                                              index_path=index_path))
+        return list(iter_tj_files(root, include_tj_bang, include_tje, include_tjz, with_head=True))
+
+    with ThreadPoolExecutor(max_workers=len(roots)) as threads:
+        return list(threads.map(scan, roots))
+
+
+def _same_bytes(a: Path, b: Path) -> bool:
+    with open(a, "rb") as fa, open(b, "rb") as fb:
+        while True:
+            block = fa.read(_COMPARE_CHUNK)
+            if block != fb.read(_COMPARE_CHUNK):
+                return False
+            if not block:
+                return True
+
+
+def compare_chunk(pairs: list[tuple[Path, Path]]) -> list[bool | str]:
+    """Executado nos processos do pool: True se os dois arquivos são idênticos
+    (ou a mensagem de erro de leitura)."""
+    out: list[bool | str] = []
+    for old, new in pairs:
+        try:
+            out.append(_same_bytes(old, new))
+        except OSError as e:
+            out.append(str(e))
+    return out
+
+
+def diff_decode_chunk(chunk: list[tuple[str, str, tuple | None, tuple]],
+                      base_key_hex: str | None,
+                      header_size: int,
+                      out_dir: Path,
+                      json_format: str | None = None) -> list[DiffEntry]:
+    """Executado nos processos do pool: decifra (rel, status, job antigo ou None, job novo).
+
+    Com job antigo (header mudou, tamanho igual) os dois plaintexts são
+    comparados e um par idêntico vira REKEYED sem gravar nada.
+    """
+    new_plain = decrypt_many_files([c[3] for c in chunk], base_key_hex, header_size, json_format)
+    old_jobs = [c[2] for c in chunk if c[2] is not None]
+    old_plain = iter(decrypt_many_files(old_jobs, base_key_hex, header_size, json_format))
+
+    out = []
+    for (rel, status, old_job, _), (res, plain) in zip(chunk, new_plain):
+        entry = DiffEntry(rel, status, res.tj_type, new_size=res.size)
+        if old_job is not None:
+            old_res, old = next(old_plain)
+            entry.old_size = old_res.size
+            if res.ok and old_res.ok and old == plain:
+                entry.status = REKEYED
+                out.append(entry)
+                continue
+        if not res.ok:
+            entry.error = res.error
+            out.append(entry)
+            continue
+        dst = out_dir.joinpath(*rel.split("/"))
+        try:
+            _write_output(dst, plain, res.tj_type)
+        except OSError as e:
+            entry.error = str(e)
+        else:
+            entry.out_path = dst
+            entry.content, entry.content_version = classify_plain(plain, res.tj_type)
+        out.append(entry)
+    return out
+
+
+def _stat_size(path: Path) -> int:
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return -1
+
+
+def _head(job: tuple) -> bytes:
+    head = job[2]
+    if head is None or len(head) < HEAD_SIZE:
+        head = read_tj_head(job[0])
+    return bytes(head[:HEAD_SIZE])
+
+
+def diff_trees(old_root: str | Path,
+               new_root: str | Path,
+               old_jobs,
+               new_jobs,
+               out_dir: str | Path,
+               base_key_hex: str | None = None,
+               header_size: int = 23,
+               workers: int | None = None,
+               chunk_size: int = DEFAULT_CHUNK_SIZE,
+               json_format: str | None = None):
+    """Compara dois builds e decifra só o que mudou; gera um DiffEntry por caminho.
+
+    old_jobs/new_jobs: (path, tipo[, head]) de cada raiz (ver scan_roots).
+    Novos e alterados são decifrados em out_dir espelhando new_root.
+    """
+    old_root, new_root, out_dir = Path(old_root), Path(new_root), Path(out_dir)
+    old = {Path(j[0]).relative_to(old_root).as_posix(): (Path(j[0]), j[1], j[2] if len(j) > 2 else None)
+           for j in old_jobs}
+    new = {Path(j[0]).relative_to(new_root).as_posix(): (Path(j[0]), j[1], j[2] if len(j) > 2 else None)
+           for j in new_jobs}
+
+    for rel in sorted(old.keys() - new.keys()):
+        yield DiffEntry(rel, REMOVED, old[rel][1], old_size=_stat_size(old[rel][0]))
+
+    to_decode = [(rel, ADDED, None, new[rel]) for rel in sorted(new.keys() - old.keys())]
+    to_compare = []
+    for rel in sorted(old.keys() & new.keys()):
+        o, n = old[rel], new[rel]
+        try:
+            same_size = _stat_size(o[0]) == _stat_size(n[0])
+            same_head = same_size and _head(o) == _head(n)
+        except OSError:
+            same_size = same_head = False
+        if not same_size:
+            to_decode.append((rel, CHANGED, None, n))
+        elif not same_head:
+            to_decode.append((rel, CHANGED, o, n))
+        else:
+            to_compare.append(rel)
+
+    step = max(1, chunk_size)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        futures = [(rels, pool.submit(compare_chunk, [(old[r][0], new[r][0]) for r in rels]))
+                   for rels in (to_compare[i:i + step] for i in range(0, len(to_compare), step))]
+        for rels, fut in futures:
+            for rel, same in zip(rels, fut.result()):
+                size = _stat_size(new[rel][0])
+                if same is True:
+                    yield DiffEntry(rel, UNCHANGED, new[rel][1], size, size)
+                elif same is False:
+                    to_decode.append((rel, CHANGED, None, new[rel]))
+                else:
+                    yield DiffEntry(rel, CHANGED, new[rel][1], size, size, error=same)
+
+        futures = [pool.submit(diff_decode_chunk, to_decode[i:i + step], base_key_hex, header_size,
+                               out_dir, json_format)
+                   for i in range(0, len(to_decode), step)]
+        for fut in futures:
+            for entry in fut.result():
+                if entry.status != ADDED and not entry.old_size:
+                    entry.old_size = _stat_size(old[entry.rel][0])
+                yield entry
+
+
+class DiffReport:
+    """Listas por status e erros; vira o DIFF_FILENAME."""
+
+    def __init__(self, old_root: str | Path, new_root: str | Path):
+        self.old_root = Path(old_root)
+        self.new_root = Path(new_root)
+        self.paths: dict[str, list[str]] = {status: [] for status in STATUSES if status != UNCHANGED}
+        self.counts: Counter = Counter()
+        self.errors: dict[str, str] = {}
+
+    def add(self, entry: DiffEntry) -> None:
+        self.counts[entry.status] += 1
+        if entry.status != UNCHANGED:
+            self.paths[entry.status].append(entry.rel)
+        if not entry.ok:
+            self.errors[entry.rel] = entry.error
+
+    def to_dict(self) -> dict:
+        return {
+            "old": str(self.old_root),
+            "new": str(self.new_root),
+            **{status: sorted(paths) for status, paths in self.paths.items()},
+            "unchanged": self.counts[UNCHANGED],
+            "errors": dict(sorted(self.errors.items())),
+        }
+
+    def write(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=1, ensure_ascii=False) + "\n", encoding="utf-8")
+
+    def lines(self) -> list[str]:
+        c = self.counts
+        out = [f"{sum(c.values())} caminhos: {c[ADDED]} novos, {c[REMOVED]} removidos, "
+               f"{c[CHANGED]} alterados, {c[REKEYED]} só recifrados, {c[UNCHANGED]} iguais."]
+        if self.errors:
+            out.append(f"{len(self.errors)} com erro (ver \"errors\" em {DIFF_FILENAME}).")
+        return out
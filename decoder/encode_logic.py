@@ -0,0 +1,167 @@
+"""
+Encode (repack) de arquivos tj!/tje/tjz: o inverso de decode_logic.
+
+Um arquivo cifrado é  magic (3) + header da key (16) + bytes reservados
+até header_size + XXTEA(plaintext + word de tamanho v43).  No repack de
+um asset modificado, o prefixo (magic + header + reservados) é reusado do
+arquivo original, então a FILE KEY continua a mesma que o jogo espera.
+
+Obs.: tjz que saiu descomprimido do decode precisa ser recomprimido antes
+do repack; aqui o plaintext é cifrado como está.
+"""
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from .decode_logic import DEFAULT_CHUNK_SIZE, HEAD_SIZE, TjType, tj_type_from_bytes
+from .keygen import derive_file_key_from_header
+from .tjxxtea import tj_xxtea_encrypt_bytes, tj_xxtea_encrypt_many
+
+TJ_MAGICS: dict[str, bytes] = {
+    "tj_bang": b"tj!",
+    "tje": b"tje",
+    "tjz": b"tjz",
+}
+
+
+@dataclass
+class EncodeResult:
+    """Resultado de um arquivo no repack (precisa ser picklable)."""
+    path: Path
+    out_path: Path | None
+    size: int
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def make_prefix(tj_type: TjType, header: bytes | None = None, header_size: int = 23) -> bytes:
+    """Prefixo novo: magic + header (aleatório se None) + reservados zerados."""
+    if tj_type not in TJ_MAGICS:
+        raise ValueError(f"Tipo tj inválido: {tj_type!r}")
+    if header is None:
+        header = os.urandom(16)
+    if len(header) != 16:
+        raise ValueError(f"header precisa ter 16 bytes, veio {len(header)}")
+    if header_size < HEAD_SIZE:
+        raise ValueError(f"header_size precisa ser >= {HEAD_SIZE}")
+    return TJ_MAGICS[tj_type] + bytes(header) + b"\x00" * (header_size - HEAD_SIZE)
+
+
+def read_prefix(path: str | Path, header_size: int = 23) -> bytes:
+    """Lê o prefixo (magic + header + reservados) de um arquivo cifrado original."""
+    with Path(path).open("rb") as f:
+        prefix = f.read(header_size)
+    if len(prefix) < max(header_size, HEAD_SIZE) or tj_type_from_bytes(prefix) == "unknown":
+        raise ValueError(f"Arquivo {path} não parece ser tj!/tje/tjz")
+    return prefix
+
+
+def encode_buffer(plain: bytes, prefix: bytes, base_key_hex: str | None = None) -> bytes:
+    """Arquivo cifrado completo para `plain` usando o prefixo informado."""
+    key = derive_file_key_from_header(bytes(prefix[3:HEAD_SIZE]), base_key_hex)
+    return bytes(prefix) + tj_xxtea_encrypt_bytes(plain, key)
+
+
+def encode_single_file(path: str | Path,
+                       out_path: str | Path,
+                       original: str | Path | None = None,
+                       tj_type: TjType = "tj_bang",
+                       header: bytes | None = None,
+                       base_key_hex: str | None = None,
+                       header_size: int = 23) -> Path:
+    """Cifra um arquivo plaintext no formato tj!/tje/tjz.
+
+    original: arquivo cifrado de onde reusar magic + header (recomendado
+    para repack); sem ele, usa tj_type + header (aleatório se None).
+    Retorna o Path do arquivo de saída.
+    """
+    src = Path(path)
+    dst = Path(out_path)
+    if original is not None:
+        prefix = read_prefix(original, header_size)
+    else:
+        prefix = make_prefix(tj_type, header, header_size)
+
+    data = encode_buffer(src.read_bytes(), prefix, base_key_hex)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    with dst.open("wb") as f:
+        f.write(data)
+    return dst
+
+
+def _encode_chunk(chunk: list[tuple[Path, Path, Path]],
+                  base_key_hex: str | None,
+                  header_size: int) -> list[EncodeResult]:
+    """Executado nos processos do pool: cifra um lote com o XXTEA em lote."""
+    results: list = [None] * len(chunk)
+    pending: list[int] = []
+    prefixes: list[bytes] = []
+    items: list[tuple[bytes, bytes]] = []
+    for i, (src, original, dst) in enumerate(chunk):
+        try:
+            prefix = read_prefix(original, header_size)
+            key = derive_file_key_from_header(prefix[3:HEAD_SIZE], base_key_hex)
+            items.append((src.read_bytes(), key))
+        except (OSError, ValueError) as e:
+            results[i] = EncodeResult(src, None, 0, str(e))
+            continue
+        pending.append(i)
+        prefixes.append(prefix)
+
+    for i, prefix, (plain, _), cipher in zip(pending, prefixes, items,
+                                             tj_xxtea_encrypt_many(items)):
+        src, _, dst = chunk[i]
+        try:
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            with dst.open("wb") as f:
+                f.write(prefix)
+                f.write(cipher)
+        except OSError as e:
+            results[i] = EncodeResult(src, None, len(plain), str(e))
+            continue
+        results[i] = EncodeResult(src, dst, len(plain))
+    return results
+
+
+def iter_repack_jobs(mod_root: str | Path, orig_root: str | Path, out_root: str | Path):
+    """(plaintext modificado, original cifrado, destino) para cada arquivo de
+    mod_root que tem correspondente tj!/tje/tjz no mesmo caminho de orig_root."""
+    mod_root, orig_root, out_root = Path(mod_root), Path(orig_root), Path(out_root)
+    for dirpath, _, filenames in os.walk(mod_root):
+        for name in filenames:
+            src = Path(dirpath) / name
+            rel = src.relative_to(mod_root)
+            original = orig_root / rel
+            try:
+                with original.open("rb") as f:
+                    if tj_type_from_bytes(f.read(3)) == "unknown":
+                        continue
+            except OSError:
+                continue
+            yield src, original, out_root / rel
+
+
+def repack_tree(mod_root: str | Path,
+                orig_root: str | Path,
+                out_root: str | Path,
+                workers: int | None = None,
+                chunk_size: int = DEFAULT_CHUNK_SIZE,
+                base_key_hex: str | None = None,
+                header_size: int = 23):
+    """Recifra uma árvore modificada em todos os núcleos; gera EncodeResult.
+
+    Cada arquivo reusa o prefixo do original de mesmo caminho relativo, e a
+    saída espelha a árvore em out_root (pronta para voltar ao client).
+    """
+    jobs = list(iter_repack_jobs(mod_root, orig_root, out_root))
+    chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), max(1, chunk_size))]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        futures = [pool.submit(_encode_chunk, chunk, base_key_hex, header_size) for chunk in chunks]
+        for fut in futures:
+            yield from fut.result()
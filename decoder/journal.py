@@ -0,0 +1,125 @@
+"""
+Journal de checkpoint do Decode All.
+
+Durante o Decode All cada fonte concluída (saída já renomeada para o lugar
+final) entra em um arquivo JSON lines na pasta de saída; a cada
+CHECKPOINT_SECONDS o arquivo recebe flush + fsync. Se o processo morrer
+(falta de memória, GUI fechada, reboot), o próximo Decode All com resume
+pula as fontes do journal que não mudaram e cuja saída ainda existe. Uma
+execução que chega ao fim apaga o journal.
+
+A primeira linha guarda a configuração (base key, header_size, saída): um
+journal de outra configuração é descartado.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+
+JOURNAL_FILENAME = ".tj_decode_journal.jsonl"
+
+# intervalo entre checkpoints (flush + fsync) do journal
+CHECKPOINT_SECONDS = 2.0
+
+
+class DecodeJournal:
+    """Journal JSON lines de uma pasta de saída (usado só pela thread do decoder)."""
+
+    def __init__(self, path: str | Path, root: str | Path, config: dict):
+        self.path = Path(path)
+        self.root = Path(root)
+        self.config = config
+        self._f = None
+        self._last_checkpoint = 0.0
+
+    def _rel(self, src: Path) -> str:
+        return Path(src).relative_to(self.root).as_posix()
+
+    def load(self) -> dict[str, dict]:
+        """Entradas {caminho relativo: {size, mtime_ns, out}} de um journal
+        da mesma configuração; {} se não houver."""
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except (OSError, UnicodeDecodeError):
+            return {}
+        done: dict[str, dict] = {}
+        for i, line in enumerate(lines):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                if i == 0:
+                    return {}
+                continue  # última linha cortada pelo crash
+            if i == 0:
+                if entry.get("config") != self.config:
+                    return {}
+                continue
+            if "path" in entry:
+                done[entry["path"]] = entry
+        return done
+
+    def completed(self, jobs: list, done: dict[str, dict]) -> tuple[list, dict[str, dict]]:
+        """Separa os jobs em (pendentes, entradas concluídas): concluído é o
+        que está no journal com mesmo tamanho/mtime e saída ainda presente."""
+        pending, kept = [], {}
+        for job in jobs:
+            rel = self._rel(job[0])
+            entry = done.get(rel)
+            try:
+                ok = (entry is not None
+                      and os.path.exists(entry["out"])
+                      and _stat_key(job[0]) == (entry["size"], entry["mtime_ns"]))
+            except OSError:
+                ok = False
+            if ok:
+                kept[rel] = entry
+            else:
+                pending.append(job)
+        return pending, kept
+
+    def open(self, kept: dict[str, dict]) -> None:
+        """Recomeça o arquivo com a configuração e as entradas que continuam
+        valendo (troca atômica: um crash aqui não perde o journal anterior)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            f.write(json.dumps({"config": self.config}) + "\n")
+            for entry in kept.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._f = self.path.open("a", encoding="utf-8")
+        self._last_checkpoint = time.monotonic()
+
+    def record(self, src: Path, out_path: Path) -> None:
+        try:
+            size, mtime_ns = _stat_key(src)
+        except OSError:
+            return
+        entry = {"path": self._rel(src), "size": size, "mtime_ns": mtime_ns, "out": str(out_path)}
+        self._f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        if time.monotonic() - self._last_checkpoint >= CHECKPOINT_SECONDS:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._last_checkpoint = time.monotonic()
+
+    def close(self, finished: bool) -> None:
+        """finished: a execução foi até o fim e o journal não serve mais."""
+        if self._f is None:
+            return
+        self.checkpoint()
+        self._f.close()
+        self._f = None
+        if finished:
+            self.path.unlink(missing_ok=True)
+
+
+def _stat_key(path: str | Path) -> tuple[int, int]:
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
@@ -3,13 +3,39 @@ Lógica de geração de chave por arquivo (FILE KEY) baseada em:
 - s_xxteaKey (capturada via hook)
 - header de 16 bytes (offset 3..18 no arquivo "tj!"/"tje"/"tjz")
 """
-from typing import List
+from functools import lru_cache
+from typing import Dict, List
+
+from .profiling import stage
 
 # Base key fixa (s_xxteaKey) capturada no jogo via Frida.
 # Se em outro client a base mudar, basta editar esta constante.
 BASE_KEY_HEX = "67 1c b6 06 83 8b 3b 78 3f 47 5b b2 a3 14 d3 1f"
 
 
+# máscaras fixas da função Hot_Draw_Box (índice 3 não tem máscara)
+HOT_DRAW_BOX_MASKS = {
+    0: 0xD6,
+    1: 0x34,
+    2: 0x9B,
+    4: 0x40,
+    5: 0xAA,
+    6: 0x0D,
+    7: 0x95,
+    8: 0xE2,
+    9: 0x48,
+    10: 0xD7,
+    11: 0x23,
+    12: 0x8C,
+    13: 0x1E,
+    14: 0x69,
+    15: 0xF9,
+}
+
+# Tamanho padrão do cache header -> FILE KEY de cada KeyDeriver
+KEY_CACHE_SIZE = 4096
+
+
 def parse_hex_bytes(s: str) -> bytes:
     """Converte string tipo '67 1c b6 06 ...' em bytes."""
     parts = [p for p in s.replace(",", " ").split() if p]
@@ -37,44 +63,109 @@ def derive_file_key(base_key: bytes, header: bytes) -> bytes:
         v[i] ^= base_key[i] ^ header[i]
 
     # aplica as máscaras fixas da função Hot_Draw_Box
-    masks = {
-        0: 0xD6,
-        1: 0x34,
-        2: 0x9B,
-        4: 0x40,
-        5: 0xAA,
-        6: 0x0D,
-        7: 0x95,
-        8: 0xE2,
-        9: 0x48,
-        10: 0xD7,
-        11: 0x23,
-        12: 0x8C,
-        13: 0x1E,
-        14: 0x69,
-        15: 0xF9,
-    }
-    for i, m in masks.items():
+    for i, m in HOT_DRAW_BOX_MASKS.items():
         v[i] &= m
 
     return bytes(v)
 
 
-def derive_file_key_from_file(path: str, base_key_hex: str | None = None) -> bytes:
+class KeyDeriver:
     """
-    Lê um arquivo 'tj!'/'tje'/'tjz' do disco, pega header = bytes[3:19],
-    aplica a derive_file_key e retorna a FILE KEY de 16 bytes.
+    derive_file_key pré-calculado para uma base key.
+
+    Como a derivação é só XOR + AND byte a byte, ela vira uma operação
+    sobre inteiros de 128 bits:  key = (header ^ xor_mask) & and_mask
+    com xor_mask = 0x01..01 ^ base_key e and_mask = máscaras Hot_Draw_Box.
+    Resultados ficam num LRU limitado (headers se repetem muito).
+    """
+
+    def __init__(self, base_key: bytes, cache_size: int = KEY_CACHE_SIZE):
+        if len(base_key) != 16:
+            raise ValueError(f"base_key precisa ter 16 bytes, veio {len(base_key)}")
+        self.base_key = bytes(base_key)
+        self.xor_mask = int.from_bytes(bytes(b ^ 1 for b in base_key), "little")
+        self.and_mask = int.from_bytes(
+            bytes(HOT_DRAW_BOX_MASKS.get(i, 0xFF) for i in range(16)), "little")
+        self._cached = lru_cache(maxsize=cache_size)(self._derive)
+
+    @classmethod
+    def from_hex(cls, base_key_hex: str, cache_size: int = KEY_CACHE_SIZE) -> "KeyDeriver":
+        return cls(parse_hex_bytes(base_key_hex), cache_size)
+
+    def _derive(self, header: bytes) -> bytes:
+        x = (int.from_bytes(header, "little") ^ self.xor_mask) & self.and_mask
+        return x.to_bytes(16, "little")
+
+    def derive(self, header: bytes) -> bytes:
+        """FILE KEY para o header de 16 bytes (offset [3:19])."""
+        if len(header) != 16:
+            raise ValueError(f"Header muito curto: {len(header)} bytes")
+        return self._cached(bytes(header))
+
+    def cache_info(self):
+        """hits/misses/currsize do LRU (functools._CacheInfo)."""
+        return self._cached.cache_info()
+
+    def cache_clear(self) -> None:
+        self._cached.cache_clear()
+
+
+# Um KeyDeriver por base key (bytes já interpretados); permite vários
+# clients. _BY_HEX só lembra a grafia do hex já vista para não reinterpretar
+# a string a cada arquivo; grafias diferentes da mesma key caem no mesmo
+# KeyDeriver (e no mesmo cache).
+_DERIVERS: Dict[bytes, KeyDeriver] = {}
+_BY_HEX: Dict[str, KeyDeriver] = {}
+
+
+def get_key_deriver(base_key_hex: str | None = None) -> KeyDeriver:
+    """KeyDeriver compartilhado da base key (BASE_KEY_HEX se None).
+
+    O hex só é interpretado na primeira chamada para cada grafia; "67 1C ..."
+    e "67,1c,..." usam o mesmo KeyDeriver.
     """
     if base_key_hex is None:
         base_key_hex = BASE_KEY_HEX
 
-    base_key = parse_hex_bytes(base_key_hex)
+    deriver = _BY_HEX.get(base_key_hex)
+    if deriver is None:
+        base_key = parse_hex_bytes(base_key_hex)
+        deriver = _DERIVERS.get(base_key)
+        if deriver is None:
+            deriver = KeyDeriver(base_key)
+            _DERIVERS[base_key] = deriver
+        _BY_HEX[base_key_hex] = deriver
+    return deriver
+
+
+def key_cache_stats() -> Dict[str, int]:
+    """Soma hits/misses dos caches de todos os KeyDeriver deste processo."""
+    hits = misses = size = 0
+    for deriver in _DERIVERS.values():
+        info = deriver.cache_info()
+        hits += info.hits
+        misses += info.misses
+        size += info.currsize
+    return {"hits": hits, "misses": misses, "size": size}
+
+
+def derive_file_key_from_header(header: bytes, base_key_hex: str | None = None) -> bytes:
+    """
+    Calcula a FILE KEY a partir do header de 16 bytes (offset [3:19]) já lido,
+    sem tocar no disco.
+    """
+    with stage("keygen", files=1):
+        return get_key_deriver(base_key_hex).derive(header)
 
-    with open(path, "rb") as f:
-        data = f.read()
 
-    header = data[3:19]
-    if len(header) != 16:
-        raise ValueError(f"Header muito curto: {len(header)} bytes")
+def derive_file_key_from_file(path: str, base_key_hex: str | None = None) -> bytes:
+    """
+    Lê um arquivo 'tj!'/'tje'/'tjz' do disco, pega header = bytes[3:19],
+    aplica a derive_file_key e retorna a FILE KEY de 16 bytes.
+
+    Só os 19 primeiros bytes são lidos.
+    """
+    with open(path, "rb") as f:
+        data = f.read(19)
 
-    return derive_file_key(base_key, header)
+    return derive_file_key_from_header(data[3:19], base_key_hex)
@@ -0,0 +1,164 @@
+"""
+Manifesto do Decode All incremental.
+
+Para cada arquivo decodificado guarda tamanho, mtime, hash do conteúdo,
+fingerprint da FILE KEY derivada e caminho de saída. Num novo Decode All:
+- fonte com mesmo tamanho/mtime (ou mesmo hash) e mesma key → pulada;
+- saída cuja fonte foi apagada → removida (prune).
+
+Fica no mesmo arquivo SQLite do índice do scanner, em uma tabela própria.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+from pathlib import Path
+
+from .keygen import derive_file_key_from_header
+from .scanner import default_index_path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS manifest (
+    path     TEXT PRIMARY KEY,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest   TEXT NOT NULL,
+    key_fp   TEXT NOT NULL,
+    out_path TEXT NOT NULL
+);
+"""
+
+_DIGEST_CHUNK = 1024 * 1024
+
+
+def file_digest(path: str | Path) -> str:
+    """blake2b do conteúdo inteiro do arquivo (lido em blocos)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(_DIGEST_CHUNK)
+            if not block:
+                break
+            h.update(block)
+    return h.hexdigest()
+
+
+def key_fingerprint(head: bytes, base_key_hex: str | None, header_size: int,
+                    json_format: str | None = None) -> str:
+    """Fingerprint da FILE KEY derivada (+ header_size e formato de JSON) sem expor a key."""
+    key = derive_file_key_from_header(bytes(head[3:19]), base_key_hex)
+    data = key + header_size.to_bytes(4, "little")
+    if json_format is not None:
+        # saídas de outro formato de JSON não estão em dia
+        data += json_format.encode("ascii")
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+class DecodeManifest:
+    """Manifesto SQLite de uma pasta raiz (uma conexão por thread)."""
+
+    def __init__(self,
+                 root: str | Path,
+                 base_key_hex: str | None = None,
+                 header_size: int = 23,
+                 path: str | Path | None = None,
+                 json_format: str | None = None):
+        self.root = Path(root)
+        self.base_key_hex = base_key_hex
+        self.header_size = header_size
+        self.json_format = json_format
+        self.path = Path(path) if path else default_index_path(self.root)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=PERSIST")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self) -> DecodeManifest:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _rel(self, src: Path) -> str:
+        return Path(src).relative_to(self.root).as_posix()
+
+    def fingerprint(self, head: bytes) -> str:
+        return key_fingerprint(head, self.base_key_hex, self.header_size, self.json_format)
+
+    def is_up_to_date(self,
+                       src: Path,
+                       head: bytes,
+                       size: int,
+                       mtime_ns: int,
+                       expected_out: Path | None = None) -> bool:
+        """True se a saída registrada ainda corresponde à fonte e à key atuais.
+
+        expected_out: se informado, a saída registrada também precisa ser essa.
+        """
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, digest, key_fp, out_path FROM manifest WHERE path = ?",
+            (self._rel(src),)).fetchone()
+        if row is None:
+            return False
+
+        old_size, old_mtime, digest, key_fp, out_path = row
+        if key_fp != self.fingerprint(head) or not os.path.exists(out_path):
+            return False
+        if expected_out is not None and Path(out_path) != Path(expected_out):
+            return False
+        if (old_size, old_mtime) == (size, mtime_ns):
+            return True
+        if old_size != size:
+            return False
+
+        # mtime mudou mas o tamanho não: confere o conteúdo
+        try:
+            if file_digest(src) != digest:
+                return False
+        except OSError:
+            return False
+        self.conn.execute("UPDATE manifest SET mtime_ns = ? WHERE path = ?", (mtime_ns, self._rel(src)))
+        return True
+
+    def record(self, src: Path, size: int, mtime_ns: int, digest: str, key_fp: str, out_path: Path) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO manifest (path, size, mtime_ns, digest, key_fp, out_path) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (self._rel(src), size, mtime_ns, digest, key_fp, str(out_path)),
+        )
+
+    def commit(self) -> None:
+        self.conn.commit()
+
+    def prune(self, keep: set[Path]) -> tuple[list[Path], dict[Path, str]]:
+        """Remove saídas (e entradas) cuja fonte não existe mais.
+
+        keep: fontes vistas neste scan; só as demais são conferidas no disco.
+        Retorna (saídas apagadas, {saída: erro} das que não deu para apagar);
+        as que falharam continuam no manifesto e são tentadas de novo.
+        """
+        from .decode_logic import _remove_path
+
+        keep_rel = {self._rel(p) for p in keep}
+        removed: list[Path] = []
+        failed: dict[Path, str] = {}
+        for rel, out_path in self.conn.execute("SELECT path, out_path FROM manifest").fetchall():
+            if rel in keep_rel or (self.root / rel).exists():
+                continue
+            out_path = Path(out_path)
+            existed = out_path.exists() or out_path.is_symlink()
+            try:
+                # tjz com zip dentro vira pasta
+                _remove_path(out_path, strict=True)
+            except OSError as e:
+                failed[out_path] = str(e)
+                continue
+            if existed:
+                removed.append(out_path)
+            self.conn.execute("DELETE FROM manifest WHERE path = ?", (rel,))
+        self.conn.commit()
+        return removed, failed
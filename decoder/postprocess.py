@@ -0,0 +1,103 @@
+"""
+Estágio pós-decrypt do Decode All: classificação do conteúdo e JSON legível.
+
+Roda nos mesmos processos do decrypt, logo depois dele, com o plaintext
+ainda em memória (nada de segunda varredura da pasta de saída):
+- classify_plain: tipo do conteúdo (lua, luajit, lua_bytecode, json, png...)
+  e, para bytecode, a versão ("LuaJIT 2.1 (stripped)"). tjz comprimido é
+  classificado pelo início do conteúdo inflado.
+- write_json: reformata JSON (pretty com indentação ou minify) direto no
+  arquivo de saída, em blocos. A árvore do JSON fica em memória, o texto
+  formatado não (no pretty). JSON inválido, ou aninhado demais para o
+  json do Python, é gravado como está.
+
+O reformat é lossy: a saída é o mesmo documento para um parser JSON, não
+os mesmos bytes. Números saem normalizados pelo json do Python (1.50 ->
+1.5, 1E2 -> 100.0), escapes viram o caractere ("\\u00e9" -> "é") e espaços e
+quebras de linha originais se perdem. Objetos com chave duplicada (que o
+dict colapsaria na última) não são reformatados: saem como estão.
+"""
+from __future__ import annotations
+
+import io
+import json
+
+from .decompress import STREAM_CHUNK, detect_container, inflate_bytes
+from .sniff import bytecode_version, sniff_plaintext
+
+JSON_FORMATS = ("pretty", "minify")
+
+# indentação do modo pretty
+JSON_INDENT = 2
+
+# bytes inflados de um tjz para classificar o conteúdo
+_CLASSIFY_SAMPLE = 4096
+
+
+def classify_plain(plain, tj_type: str | None = None) -> tuple[str, str | None]:
+    """(tipo do conteúdo, versão do bytecode ou None) de um plaintext decifrado."""
+    if tj_type == "tjz":
+        container = detect_container(plain)
+        if container not in (None, "zip"):
+            try:
+                plain = inflate_bytes(plain, container, _CLASSIFY_SAMPLE)
+            except ValueError:
+                pass
+    kind = sniff_plaintext(plain)
+    version = bytecode_version(bytes(plain[:8])) if kind in ("luajit", "lua_bytecode") else None
+    return kind, version
+
+
+def _encoder(json_format: str) -> json.JSONEncoder:
+    if json_format == "pretty":
+        return json.JSONEncoder(ensure_ascii=False, indent=JSON_INDENT)
+    if json_format == "minify":
+        return json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    raise ValueError(f"Formato de JSON inválido: {json_format!r}")
+
+
+def _unique_keys(pairs: list[tuple[str, object]]) -> dict:
+    obj = dict(pairs)
+    if len(obj) != len(pairs):
+        raise ValueError("JSON com chave duplicada")
+    return obj
+
+
+def write_json(plain, f, json_format: str) -> int:
+    """Reformata o JSON de `plain` em f (binário) e retorna os bytes escritos.
+
+    ValueError se o plaintext não for JSON UTF-8 válido ou tiver chave
+    duplicada em algum objeto (nada é escrito); RecursionError se for
+    aninhado demais para o json do Python (parte pode ter sido escrita).
+    """
+    encoder = _encoder(json_format)
+    obj = json.loads(bytes(plain).decode("utf-8-sig"), object_pairs_hook=_unique_keys)
+    if json_format == "minify":
+        # sem indentação o encoder em C monta o texto de uma vez; a saída é menor que a entrada
+        return f.write(encoder.encode(obj).encode("utf-8"))
+
+    written = pending = 0
+    parts: list[str] = []
+    for piece in encoder.iterencode(obj):
+        parts.append(piece)
+        pending += len(piece)
+        if pending >= STREAM_CHUNK:
+            written += f.write("".join(parts).encode("utf-8"))
+            parts.clear()
+            pending = 0
+    parts.append("\n")
+    return written + f.write("".join(parts).encode("utf-8"))
+
+
+def format_json(plain, json_format: str) -> bytes:
+    """write_json em memória (saídas que vão para um OutputSink)."""
+    out = io.BytesIO()
+    write_json(plain, out, json_format)
+    return out.getvalue()
+
+
+def content_label(content: str | None, version: str | None) -> str:
+    """Rótulo curto para log: "lua", "luajit: LuaJIT 2.1 (stripped)"..."""
+    if content is None:
+        return ""
+    return f"{content}: {version}" if version else content
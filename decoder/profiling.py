@@ -0,0 +1,204 @@
+"""
+Instrumentação opcional do pipeline de decode, por estágio.
+
+Cada estágio (scan, read, keygen, xxtea, post, mkdir, write, inflate...) acumula
+tempo de parede, tempo de CPU, bytes e arquivos. Os tempos são exclusivos:
+um estágio aninhado em outro (keygen dentro de read) é descontado do pai,
+então a soma dos estágios fecha com o tempo total medido.
+
+Desligado (o padrão), stage() devolve um context manager nulo compartilhado
+e o custo por chamada é só o teste do profiler ativo. O profiler ativo é
+por thread (o preview da GUI não entra na medição do Decode All); o
+ParallelDecoder liga um em cada lote enviado ao pool e soma os dicts
+devolvidos (os tempos dos workers somam entre processos, como CPU).
+"""
+from __future__ import annotations
+
+import cProfile
+import json
+import pstats
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+# ordem de exibição; estágios fora da lista vão para o fim
+STAGE_ORDER = ("scan", "manifest", "dedup_hash", "read", "keygen", "xxtea",
+               "post", "mkdir", "write", "inflate")
+
+_NULL = nullcontext()
+
+
+@dataclass
+class StageStats:
+    wall: float = 0.0
+    cpu: float = 0.0
+    bytes: int = 0
+    files: int = 0
+    calls: int = 0
+
+    def merge(self, other: dict) -> None:
+        self.wall += other.get("wall", 0.0)
+        self.cpu += other.get("cpu", 0.0)
+        self.bytes += other.get("bytes", 0)
+        self.files += other.get("files", 0)
+        self.calls += other.get("calls", 0)
+
+
+class _Stage:
+    """Um estágio em execução (entrada na pilha do Profiler)."""
+
+    __slots__ = ("profiler", "name", "nbytes", "files", "wall", "cpu", "child_wall", "child_cpu")
+
+    def __init__(self, profiler: Profiler, name: str, nbytes: int, files: int):
+        self.profiler = profiler
+        self.name = name
+        self.nbytes = nbytes
+        self.files = files
+        self.child_wall = self.child_cpu = 0.0
+
+    def __enter__(self) -> _Stage:
+        self.profiler._stack.append(self)
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        stack = self.profiler._stack
+        stack.pop()
+        if stack:
+            stack[-1].child_wall += wall
+            stack[-1].child_cpu += cpu
+        st = self.profiler.stages.setdefault(self.name, StageStats())
+        st.wall += wall - self.child_wall
+        st.cpu += cpu - self.child_cpu
+        st.bytes += self.nbytes
+        st.files += self.files
+        st.calls += 1
+
+
+class Profiler:
+    """Acumula StageStats por nome de estágio."""
+
+    def __init__(self):
+        self.stages: dict[str, StageStats] = {}
+        self._stack: list[_Stage] = []
+
+    def stage(self, name: str, nbytes: int = 0, files: int = 0) -> _Stage:
+        return _Stage(self, name, nbytes, files)
+
+    def add(self, name: str, wall: float = 0.0, cpu: float = 0.0, nbytes: int = 0, files: int = 0) -> None:
+        """Soma uma medida feita fora de stage() (ex.: CPU devolvida por um worker)."""
+        self.stages.setdefault(name, StageStats()).merge(
+            {"wall": wall, "cpu": cpu, "bytes": nbytes, "files": files, "calls": 1})
+
+    def count(self, name: str, nbytes: int = 0, files: int = 0) -> None:
+        """Soma bytes/arquivos a um estágio sem medir tempo (tamanho só conhecido depois)."""
+        st = self.stages.setdefault(name, StageStats())
+        st.bytes += nbytes
+        st.files += files
+
+    def merge(self, stages: dict) -> None:
+        """Soma o to_dict() de outro Profiler (ex.: de um processo do pool)."""
+        for name, data in stages.items():
+            self.stages.setdefault(name, StageStats()).merge(data)
+
+    def to_dict(self) -> dict[str, dict]:
+        return {name: asdict(self.stages[name]) for name in _ordered(self.stages)}
+
+
+def _ordered(names) -> list[str]:
+    rank = {name: i for i, name in enumerate(STAGE_ORDER)}
+    return sorted(names, key=lambda n: (rank.get(n, len(rank)), n))
+
+
+# ----------------------------------------------------------------------
+# Profiler ativo da thread
+# ----------------------------------------------------------------------
+_local = threading.local()
+
+
+def stage(name: str, nbytes: int = 0, files: int = 0):
+    """Mede um estágio no profiler ativo; no-op se não houver nenhum."""
+    profiler = getattr(_local, "profiler", None)
+    if profiler is None:
+        return _NULL
+    return profiler.stage(name, nbytes, files)
+
+
+def count(name: str, nbytes: int = 0, files: int = 0) -> None:
+    profiler = getattr(_local, "profiler", None)
+    if profiler is not None:
+        profiler.count(name, nbytes, files)
+
+
+def activate(profiler: Profiler | None) -> Profiler | None:
+    """Troca o profiler ativo da thread e devolve o anterior."""
+    previous = getattr(_local, "profiler", None)
+    _local.profiler = profiler
+    return previous
+
+
+# ----------------------------------------------------------------------
+# cProfile entre processos
+# ----------------------------------------------------------------------
+class _RawStats:
+    """Stats já coletados, no formato que pstats.Stats.add aceita."""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+def run_cprofile(func, *args, **kwargs):
+    """Roda func sob cProfile; devolve (retorno, dict de stats picklable)."""
+    prof = cProfile.Profile()
+    result = prof.runcall(func, *args, **kwargs)
+    prof.create_stats()
+    return result, prof.stats
+
+
+class PstatsCollector:
+    """Junta os stats do cProfile vindos de vários processos."""
+
+    def __init__(self):
+        self.stats: pstats.Stats | None = None
+
+    def add(self, raw: dict) -> None:
+        if not raw:
+            return
+        if self.stats is None:
+            self.stats = pstats.Stats(_RawStats(raw))
+        else:
+            self.stats.add(_RawStats(raw))
+
+    def dump(self, path: str | Path) -> None:
+        """Grava no formato de pstats (abrir com pstats.Stats(path) ou snakeviz)."""
+        if self.stats is not None:
+            self.stats.dump_stats(str(path))
+
+
+# ----------------------------------------------------------------------
+# Relatório
+# ----------------------------------------------------------------------
+def write_profile_json(path: str | Path, report: dict) -> None:
+    Path(path).write_text(json.dumps(report, indent=1) + "\n", encoding="utf-8")
+
+
+def stage_lines(report: dict) -> list[str]:
+    """Tabela de estágios do evento ("profile", dict) para log/terminal."""
+    stages = report.get("stages", {})
+    total = sum(st["wall"] for st in stages.values()) or 1e-9
+    out = [f"{'estágio':12s} {'parede':>9s} {'%':>5s} {'CPU':>9s} {'MB':>9s} {'arquivos':>9s}"]
+    for name in _ordered(stages):
+        st = stages[name]
+        out.append(f"{name:12s} {st['wall']:8.2f}s {100 * st['wall'] / total:5.1f} "
+                   f"{st['cpu']:8.2f}s {st['bytes'] / (1024 * 1024):9.1f} {st['files']:9d}")
+    out.append(f"(execução: {report.get('wall', 0.0):.2f}s de parede, "
+               f"{report.get('workers', 1)} processo(s); estágios dos workers somados entre processos)")
+    return out
@@ -0,0 +1,297 @@
+"""
+Scanner de diretórios com índice persistente (SQLite) do magic de cada arquivo.
+
+O índice fica dentro da pasta raiz (INDEX_FILENAME, ou no diretório
+temporário se a raiz não for gravável) e guarda, para cada
+arquivo, tamanho, mtime, tipo tj detectado e os HEAD_SIZE primeiros bytes.
+Em scans seguintes:
+- diretórios com o mesmo mtime reaproveitam a listagem do índice (sem
+  scandir); cada arquivo ainda recebe um stat, porque sobrescrever um
+  arquivo in-place não muda o mtime da pasta;
+- arquivos com mesmo tamanho/mtime não são reabertos para ler o magic
+  (use refresh(full=True) para reler tudo).
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+from .decode_logic import HEAD_SIZE, TjType, read_tj_head, tj_type_from_bytes
+
+INDEX_FILENAME = ".tj_index.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path     TEXT PRIMARY KEY,
+    parent   TEXT,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs(parent);
+CREATE TABLE IF NOT EXISTS files (
+    path     TEXT PRIMARY KEY,
+    dir      TEXT NOT NULL,
+    name     TEXT NOT NULL,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    tj_type  TEXT NOT NULL,
+    head     BLOB
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+CREATE INDEX IF NOT EXISTS files_type ON files(tj_type);
+"""
+
+
+@dataclass
+class IndexEntry:
+    """Um filho de diretório, como listado pelo índice."""
+    name: str
+    path: Path
+    is_dir: bool
+    size: int = 0
+    mtime_ns: int = 0
+    tj_type: TjType = "unknown"
+
+
+@dataclass
+class ScanStats:
+    dirs_scanned: int = 0
+    dirs_reused: int = 0
+    files_probed: int = 0
+    files_reused: int = 0
+    files_removed: int = 0
+
+
+def default_index_path(root: str | Path) -> Path:
+    """Índice dentro da raiz; se a pasta não for gravável, vai para o diretório temporário."""
+    root = Path(root)
+    if os.access(root, os.W_OK):
+        return root / INDEX_FILENAME
+    return temp_index_path(root)
+
+
+def temp_index_path(root: str | Path) -> Path:
+    """Índice de root no diretório temporário (nada é gravado dentro da raiz)."""
+    digest = hashlib.sha1(str(Path(root).resolve()).encode("utf-8")).hexdigest()[:16]
+    return Path(tempfile.gettempdir()) / f"tj_index_{digest}.sqlite3"
+
+
+def _join(rel_dir: str, name: str) -> str:
+    return f"{rel_dir}/{name}" if rel_dir else name
+
+
+def _parent(rel: str) -> str:
+    return rel.rpartition("/")[0]
+
+
+class ScanIndex:
+    """Índice SQLite dos arquivos de uma pasta raiz.
+
+    A conexão é de uma única thread; threads diferentes devem abrir o seu
+    próprio ScanIndex para a mesma raiz.
+    """
+
+    def __init__(self, root: str | Path, index_path: str | Path | None = None):
+        self.root = Path(root)
+        self.index_path = Path(index_path) if index_path else default_index_path(self.root)
+        self.conn = sqlite3.connect(str(self.index_path))
+        # PERSIST mantém o arquivo -journal entre transações; com o modo padrão
+        # ele é criado/apagado a cada commit e muda o mtime da raiz.
+        self.conn.execute("PRAGMA journal_mode=PERSIST")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> ScanIndex:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def abspath(self, rel: str) -> Path:
+        return self.root / rel if rel else self.root
+
+    # ------------------------------------------------------------------
+    # Scan
+    # ------------------------------------------------------------------
+    def refresh(self, full: bool = False) -> ScanStats:
+        """Atualiza o índice com o estado atual do disco."""
+        stats = ScanStats()
+        cur = self.conn.cursor()
+        known_dirs = dict(cur.execute("SELECT path, mtime_ns FROM dirs"))
+        seen_dirs: set[str] = set()
+
+        stack = [""]
+        while stack:
+            rel_dir = stack.pop()
+            try:
+                mtime_ns = os.stat(self.abspath(rel_dir)).st_mtime_ns
+            except OSError:
+                continue
+            seen_dirs.add(rel_dir)
+
+            if not full and known_dirs.get(rel_dir) == mtime_ns:
+                stats.dirs_reused += 1
+                stack.extend(r for (r,) in cur.execute(
+                    "SELECT path FROM dirs WHERE parent = ?", (rel_dir,)))
+                self._restat_dir(cur, rel_dir, stats)
+                continue
+
+            stats.dirs_scanned += 1
+            self._scan_dir(cur, rel_dir, stack, stats)
+            cur.execute(
+                "INSERT OR REPLACE INTO dirs (path, parent, mtime_ns) VALUES (?, ?, ?)",
+                (rel_dir, _parent(rel_dir) if rel_dir else None, mtime_ns),
+            )
+
+        for rel_dir in set(known_dirs) - seen_dirs:
+            cur.execute("DELETE FROM dirs WHERE path = ?", (rel_dir,))
+            stats.files_removed += cur.execute(
+                "DELETE FROM files WHERE dir = ?", (rel_dir,)).rowcount
+
+        self.conn.commit()
+        return stats
+
+    def _restat_dir(self, cur: sqlite3.Cursor, rel_dir: str, stats: ScanStats) -> None:
+        """Pasta reaproveitada: confere tamanho/mtime de cada arquivo indexado
+        e relê o magic dos que foram sobrescritos in-place."""
+        rows = cur.execute("SELECT name, size, mtime_ns FROM files WHERE dir = ?", (rel_dir,)).fetchall()
+        for name, size, mtime_ns in rows:
+            rel = _join(rel_dir, name)
+            try:
+                st = os.stat(self.abspath(rel))
+            except OSError:
+                cur.execute("DELETE FROM files WHERE path = ?", (rel,))
+                stats.files_removed += 1
+                continue
+            if (st.st_size, st.st_mtime_ns) == (size, mtime_ns):
+                stats.files_reused += 1
+                continue
+            stats.files_probed += 1
+            self._store(cur, rel_dir, name, str(self.abspath(rel)), st)
+
+    def _store(self, cur: sqlite3.Cursor, rel_dir: str, name: str, path: str, st: os.stat_result) -> None:
+        """Lê o magic + header do arquivo e grava a linha no índice."""
+        try:
+            head = read_tj_head(path)
+        except OSError:
+            head = b""
+        cur.execute(
+            "INSERT OR REPLACE INTO files (path, dir, name, size, mtime_ns, tj_type, head) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (_join(rel_dir, name), rel_dir, name, st.st_size, st.st_mtime_ns,
+             tj_type_from_bytes(head), head[:HEAD_SIZE]),
+        )
+
+    def _scan_dir(self, cur: sqlite3.Cursor, rel_dir: str, stack: list[str], stats: ScanStats) -> None:
+        old = {
+            name: (size, mtime_ns)
+            for name, size, mtime_ns in cur.execute(
+                "SELECT name, size, mtime_ns FROM files WHERE dir = ?", (rel_dir,))
+        }
+        present: set[str] = set()
+
+        try:
+            it = os.scandir(self.abspath(rel_dir))
+        except OSError:
+            return
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(_join(rel_dir, entry.name))
+                        continue
+                    if not entry.is_file() or entry.name.startswith(INDEX_FILENAME):
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+
+                present.add(entry.name)
+                if old.get(entry.name) == (st.st_size, st.st_mtime_ns):
+                    stats.files_reused += 1
+                    continue
+
+                stats.files_probed += 1
+                self._store(cur, rel_dir, entry.name, entry.path, st)
+
+        for name in set(old) - present:
+            cur.execute("DELETE FROM files WHERE path = ?", (_join(rel_dir, name),))
+            stats.files_removed += 1
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+    def children(self, directory: str | Path) -> list[IndexEntry]:
+        """Filhos de um diretório: primeiro subpastas, depois arquivos (por nome)."""
+        rel_dir = self._rel(directory)
+        dirs = [
+            IndexEntry(rel.rpartition("/")[2], self.abspath(rel), True)
+            for (rel,) in self.conn.execute("SELECT path FROM dirs WHERE parent = ?", (rel_dir,))
+        ]
+        files = [
+            IndexEntry(name, self.abspath(rel), False, size, mtime_ns, tj_type)
+            for rel, name, size, mtime_ns, tj_type in self.conn.execute(
+                "SELECT path, name, size, mtime_ns, tj_type FROM files WHERE dir = ?", (rel_dir,))
+        ]
+        dirs.sort(key=lambda e: e.name.lower())
+        files.sort(key=lambda e: e.name.lower())
+        return dirs + files
+
+    def iter_subdirs(self):
+        """(pasta pai, subpasta) relativos de todas as pastas abaixo da raiz."""
+        yield from self.conn.execute("SELECT parent, path FROM dirs WHERE parent IS NOT NULL")
+
+    def iter_file_entries(self):
+        """(pasta relativa, IndexEntry) de todos os arquivos indexados."""
+        for rel, rel_dir, name, size, mtime_ns, tj_type in self.conn.execute(
+                "SELECT path, dir, name, size, mtime_ns, tj_type FROM files"):
+            yield rel_dir, IndexEntry(name, self.abspath(rel), False, size, mtime_ns, tj_type)
+
+    def iter_tj_files(self,
+                      include_tj_bang: bool = True,
+                      include_tje: bool = True,
+                      include_tjz: bool = False):
+        """Mesmo contrato de decode_logic.iter_tj_files(with_head=True), lido do índice."""
+        types = [t for t, on in (("tj_bang", include_tj_bang),
+                                 ("tje", include_tje),
+                                 ("tjz", include_tjz)) if on]
+        if not types:
+            return
+        marks = ",".join("?" * len(types))
+        rows = self.conn.execute(
+            f"SELECT path, tj_type, head FROM files WHERE tj_type IN ({marks}) ORDER BY path", types)
+        for rel, t, head in rows:
+            yield self.abspath(rel), t, bytes(head) if head is not None else None
+
+    def smallest_tj_files(self, n: int, min_size: int = 0) -> list[tuple[Path, str, bytes | None]]:
+        """Os n menores arquivos tj!/tje/tjz com pelo menos min_size bytes (path, tipo, head)."""
+        rows = self.conn.execute(
+            "SELECT path, tj_type, head FROM files WHERE tj_type != 'unknown' AND size >= ? "
+            "ORDER BY size LIMIT ?", (min_size, n))
+        return [(self.abspath(rel), t, bytes(head) if head is not None else None) for rel, t, head in rows]
+
+    def _rel(self, directory: str | Path) -> str:
+        rel = Path(directory).relative_to(self.root).as_posix()
+        return "" if rel == "." else rel
+
+
+def iter_indexed_tj_files(root: str | Path,
+                          include_tj_bang: bool = True,
+                          include_tje: bool = True,
+                          include_tjz: bool = False,
+                          refresh: bool = True,
+                          index_path: str | Path | None = None):
+    """Atualiza o índice de `root` e itera (path, tipo, head) a partir dele.
+
+    Abre sua própria conexão, então pode ser consumido em qualquer thread
+    (ex.: dentro do ParallelDecoder). index_path: ver ScanIndex.
+    """
+    with ScanIndex(root, index_path) as index:
+        if refresh:
+            index.refresh()
+        yield from index.iter_tj_files(include_tj_bang, include_tje, include_tjz)
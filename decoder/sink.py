@@ -0,0 +1,304 @@
+"""
+Destinos de saída (output sinks) do Decode All.
+
+Por padrão cada worker grava as próprias saídas (decode_many_files). Com
+um sink, os workers só decifram e devolvem o plaintext; o processo
+principal grava tudo por uma única thread (SinkWriter) com fila limitada,
+o que tira o mkdir/open/close por arquivo dos workers. Em shares de rede
+isso costuma dominar o tempo.
+
+- DirectorySink: mesma árvore de arquivos do modo normal.
+- ZipSink / TarSink: um único arquivo sem compressão com todas as saídas,
+  bom para transferir. O último membro (INDEX_NAME) é um JSON com o
+  offset e o tamanho dos dados de cada saída, para leitura aleatória
+  direta com seek (ver read_index / read_entry).
+"""
+from __future__ import annotations
+
+import io
+import json
+import os
+import queue
+import shutil
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+from .decode_logic import _output_path, _temp_path, _write_output
+from .decompress import STREAM_CHUNK, detect_container, inflate_to_stream
+from .profiling import Profiler, activate, stage
+
+# membro com o índice {nome: offset/tamanho} no fim do zip/tar
+INDEX_NAME = ".tj_index.json"
+
+# tjz inflado para o arquivo de saída fica em memória até este tamanho
+_SPOOL_MAX = 16 * 1024 * 1024
+
+# saídas esperando a thread de gravação; cheia, o decode espera (backpressure)
+WRITER_QUEUE_SIZE = 256
+
+
+class _ViewReader(io.RawIOBase):
+    """Leitura em blocos de um buffer sem copiá-lo (io.BytesIO copia tudo o
+    que não é bytes, ex.: o memoryview de um arquivo grande)."""
+
+    def __init__(self, data):
+        self._view = memoryview(data).cast("B")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = min(len(b), len(self._view) - self._pos)
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+
+def _reader(plain):
+    return io.BytesIO(plain) if isinstance(plain, bytes) else _ViewReader(plain)
+
+
+class DirectorySink:
+    """Grava cada saída como arquivo (foo.dec.ext ao lado da fonte ou em out_dir)."""
+
+    def __init__(self, root: str | Path, out_dir: str | Path | None = None):
+        self.root = Path(root)
+        self.out_dir = Path(out_dir) if out_dir is not None else None
+
+    def write(self, src: Path, plain, tj_type: str) -> tuple[Path, int, str | None]:
+        """Grava a saída de src; retorna (caminho, bytes gravados, container descomprimido)."""
+        dst = _output_path(src, self.out_dir, self.root)
+        out_size, container = _write_output(dst, plain, tj_type)
+        return dst, out_size, container
+
+    def close(self) -> None:
+        pass
+
+    def abort(self) -> None:
+        pass  # cada saída já foi gravada de forma atômica
+
+
+class _ArchiveSink:
+    """Base de ZipSink/TarSink: tjz gzip/zlib entra descomprimido e o
+    índice é gravado no close().
+
+    O arquivo é montado em um temporário ao lado e só vira `path` no
+    close(); abort() (erro ou cancelamento) apaga o temporário e não toca
+    em `path`: um Decode All interrompido não deixa um zip/tar truncado.
+    """
+
+    format = ""
+
+    def __init__(self, path: str | Path, root: str | Path):
+        self.path = Path(path)
+        self.root = Path(root)
+        self.index: dict[str, dict] = {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp_path = _temp_path(self.path)
+
+    def _add(self, name: str, fileobj, size: int) -> int:
+        """Grava um membro e retorna o offset dos dados no arquivo."""
+        raise NotImplementedError
+
+    def write(self, src: Path, plain, tj_type: str) -> tuple[Path, int, str | None]:
+        name = Path(src).relative_to(self.root).as_posix()
+        with stage("write", len(plain), 1):
+            size, container = self._write_member(name, plain, tj_type)
+        return self.path / name, size, container
+
+    def _write_member(self, name: str, plain, tj_type: str) -> tuple[int, str | None]:
+        if tj_type == "tjz":
+            container = detect_container(plain)
+            # tjz cujo plaintext é um zip vai como está (zip dentro do arquivo)
+            if container not in (None, "zip"):
+                # infla num spool antes: um falso positivo do magic não deixa
+                # um membro pela metade no arquivo de saída
+                with tempfile.SpooledTemporaryFile(_SPOOL_MAX) as spool:
+                    try:
+                        size = inflate_to_stream(plain, spool, container)
+                    except ValueError:
+                        pass  # grava o plaintext como está
+                    else:
+                        spool.seek(0)
+                        self._record(name, self._add(name, spool, size), size, tj_type, container)
+                        return size, container
+        size = len(plain)
+        self._record(name, self._add(name, _reader(plain), size), size, tj_type, None)
+        return size, None
+
+    def _record(self, name: str, offset: int, size: int, tj_type: str, container: str | None) -> None:
+        self.index[name] = {"offset": offset, "size": size, "tj_type": tj_type, "container": container}
+
+    def _index_bytes(self) -> bytes:
+        data = {"format": self.format, "entries": self.index}
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+    def _close_tmp(self) -> None:
+        """Fecha o arquivo temporário sem gravar o índice."""
+        raise NotImplementedError
+
+    def abort(self) -> None:
+        """Descarta o arquivo em montagem; um `path` anterior continua intacto."""
+        try:
+            self._close_tmp()
+        except (OSError, ValueError):
+            pass  # o temporário vai embora de qualquer jeito
+        self.tmp_path.unlink(missing_ok=True)
+
+
+class ZipSink(_ArchiveSink):
+    """Todas as saídas em um zip ZIP_STORED (os dados ficam contíguos no arquivo)."""
+
+    format = "zip"
+
+    def __init__(self, path: str | Path, root: str | Path):
+        super().__init__(path, root)
+        self.zf = zipfile.ZipFile(self.tmp_path, "w", zipfile.ZIP_STORED, allowZip64=True)
+
+    def _add(self, name: str, fileobj, size: int) -> int:
+        info = zipfile.ZipInfo(name, time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_STORED
+        info.file_size = size
+        with self.zf.open(info, "w") as f:
+            offset = self.zf.fp.tell()
+            shutil.copyfileobj(fileobj, f, STREAM_CHUNK)
+        return offset
+
+    def close(self) -> None:
+        if self.zf.fp is None:
+            return
+        data = self._index_bytes()
+        self._add(INDEX_NAME, io.BytesIO(data), len(data))
+        self.zf.close()
+        os.replace(self.tmp_path, self.path)
+
+    def _close_tmp(self) -> None:
+        if self.zf.fp is not None:
+            self.zf.close()
+
+
+class TarSink(_ArchiveSink):
+    """Todas as saídas em um tar sem compressão (formato PAX)."""
+
+    format = "tar"
+
+    def __init__(self, path: str | Path, root: str | Path):
+        super().__init__(path, root)
+        self.tar = tarfile.open(self.tmp_path, "w", format=tarfile.PAX_FORMAT)
+
+    def _add(self, name: str, fileobj, size: int) -> int:
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = int(time.time())
+        self.tar.addfile(info, fileobj)
+        # addfile deixa tar.offset no fim dos dados, alinhado em blocos de 512
+        padded = (size + tarfile.BLOCKSIZE - 1) // tarfile.BLOCKSIZE * tarfile.BLOCKSIZE
+        return self.tar.offset - padded
+
+    def close(self) -> None:
+        if self.tar.closed:
+            return
+        data = self._index_bytes()
+        self._add(INDEX_NAME, io.BytesIO(data), len(data))
+        self.tar.close()
+        os.replace(self.tmp_path, self.path)
+
+    def _close_tmp(self) -> None:
+        if not self.tar.closed:
+            self.tar.close()
+
+
+def open_sink(root: str | Path,
+              out_dir: str | Path | None = None,
+              out_zip: str | Path | None = None,
+              out_tar: str | Path | None = None):
+    """Sink para as opções de saída (no máximo uma de out_zip / out_tar)."""
+    if out_zip is not None:
+        return ZipSink(out_zip, root)
+    if out_tar is not None:
+        return TarSink(out_tar, root)
+    return DirectorySink(root, out_dir)
+
+
+class SinkWriter:
+    """Thread única que grava no sink o que os workers decifraram.
+
+    put() bloqueia quando a fila está cheia, então o plaintext em memória
+    fica limitado. on_written(res) é chamado na thread de gravação depois
+    de cada saída (com res.out_path/out_size/container ou res.error).
+    profile: mede os estágios da thread de gravação em self.profiler.
+    """
+
+    def __init__(self, sink, on_written, maxsize: int = WRITER_QUEUE_SIZE, profile: bool = False):
+        self.sink = sink
+        self.on_written = on_written
+        self.profiler = Profiler() if profile else None
+        self.queue: queue.Queue = queue.Queue(maxsize)
+        self._aborted = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, res, plain) -> None:
+        self.queue.put((res, plain))
+
+    def _run(self) -> None:
+        activate(self.profiler)
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            if self._aborted.is_set():
+                continue  # abort(): o que sobrou na fila é descartado
+            res, plain = item
+            try:
+                res.out_path, res.out_size, res.container = self.sink.write(res.path, plain, res.tj_type)
+            except Exception as e:  # qualquer erro vira falha do arquivo; a thread não pode morrer
+                res.error = str(e)
+            self.on_written(res)
+
+    def close(self) -> None:
+        """Espera a fila esvaziar e fecha o sink (grava o índice do zip/tar)."""
+        self.queue.put(None)
+        self._thread.join()
+        self.sink.close()
+
+    def abort(self) -> None:
+        """Erro ou cancelamento: descarta a fila e o arquivo em montagem (sink.abort())."""
+        self._aborted.set()
+        self.queue.put(None)
+        self._thread.join()
+        self.sink.abort()
+
+
+# ----------------------------------------------------------------------
+# Leitura aleatória do zip/tar de saída
+# ----------------------------------------------------------------------
+def read_index(path: str | Path) -> dict:
+    """Índice {"format", "entries": {nome: {offset, size, tj_type, container}}}."""
+    path = Path(path)
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            return json.loads(zf.read(INDEX_NAME))
+    with tarfile.open(path, "r:") as tar:
+        f = tar.extractfile(INDEX_NAME)
+        if f is None:
+            raise KeyError(INDEX_NAME)
+        return json.loads(f.read())
+
+
+def read_entry(path: str | Path, name: str, index: dict | None = None) -> bytes:
+    """Lê uma saída direto pelo offset do índice, sem percorrer o arquivo."""
+    if index is None:
+        index = read_index(path)
+    entry = index["entries"][name]
+    with open(path, "rb") as f:
+        f.seek(entry["offset"])
+        return f.read(entry["size"])
@@ -0,0 +1,87 @@
+"""
+Identificação do tipo de um plaintext decifrado pelos primeiros bytes.
+
+Usado pelo modo verify (relatório por tipo), pela detecção de key (um
+plaintext com magic conhecido é forte indício de que a key está certa) e
+pelo estágio pós-decrypt (decoder.postprocess).
+"""
+from __future__ import annotations
+
+import re
+
+from .decompress import detect_container
+
+# magics fortes, conferidos antes de tudo
+_MAGICS = (
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x1bLJ", "luajit"),
+    (b"\x1bLua", "lua_bytecode"),
+    (b"GIF8", "gif"),
+    (b"PKM ", "pkm"),
+    (b"\xabKTX", "ktx"),
+)
+
+# bytes inspecionados para decidir entre texto e binário
+_TEXT_SAMPLE = 4096
+
+_CONTROL = frozenset(range(32)) - {9, 10, 13}
+
+# início de linha típico de código Lua (local x, function a.b(, return, require, comentário)
+_LUA_LINE = re.compile(rb"^[ \t]*(?:local[ \t]+[\w(]|function[ \t]+[\w.:]+[ \t]*\(|return\b|"
+                       rb"require[ \t]*[(\"']|--)", re.MULTILINE)
+
+# versões do bytecode: byte logo depois do magic
+_LUAJIT_VERSIONS = {1: "2.0", 2: "2.1"}
+_LUAJIT_FLAGS = ((0x01, "big-endian"), (0x02, "stripped"), (0x04, "ffi"), (0x08, "gc64"))
+
+# tipos que indicam um decrypt certo (usados no score da detecção de key)
+KNOWN_KINDS = frozenset(kind for _, kind in _MAGICS) | {"gzip", "zip", "zlib", "json", "lua", "text"}
+
+
+def _looks_like_text(sample: bytes) -> bool:
+    try:
+        text = sample.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # caractere multibyte cortado no fim da amostra ainda é texto
+        if e.reason != "unexpected end of data" or e.start < len(sample) - 3:
+            return False
+        text = sample[:e.start].decode("utf-8")
+    return not any(ord(c) in _CONTROL for c in text)
+
+
+def bytecode_version(head: bytes) -> str | None:
+    """Versão de um bytecode Lua/LuaJIT pelo header: "LuaJIT 2.1 (stripped)",
+    "Lua 5.1"...; None se head não for bytecode."""
+    if head.startswith(b"\x1bLJ") and len(head) >= 5:
+        version = _LUAJIT_VERSIONS.get(head[3], f"BC{head[3]}")
+        flags = [name for bit, name in _LUAJIT_FLAGS if head[4] & bit]
+        return f"LuaJIT {version}" + (f" ({', '.join(flags)})" if flags else "")
+    if head.startswith(b"\x1bLua") and len(head) >= 5:
+        return f"Lua {head[4] >> 4}.{head[4] & 0x0F}"
+    return None
+
+
+def sniff_plaintext(plain) -> str:
+    """Retorna png, jpeg, gif, pkm, ktx, luajit, lua_bytecode, gzip, zip,
+    json, lua, text, zlib, binary ou empty."""
+    head = bytes(plain[:_TEXT_SAMPLE])
+    if not head:
+        return "empty"
+    for magic, kind in _MAGICS:
+        if head.startswith(magic):
+            return kind
+
+    container = detect_container(head)
+    if container in ("gzip", "zip"):
+        return container
+
+    # texto antes do zlib: o header zlib ("x\x9c"...) também casa com "x" de texto
+    if _looks_like_text(head):
+        stripped = head.lstrip(b"\xef\xbb\xbf \t\r\n")
+        if stripped[:1] in (b"{", b"["):
+            return "json"
+        return "lua" if _LUA_LINE.search(head) else "text"
+    if container is not None:
+        return "zlib"
+    return "binary"
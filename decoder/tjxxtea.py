@@ -1,8 +1,22 @@
 """
 Implementação em Python do XXTEA customizado (sub_4D1DB4) + wrapper tj_xxtea_decrypt.
+
+Há dois backends:
+- "python": laço fiel ao decompilado, usado como referência e fallback.
+- "numpy":  as mesmas rodadas sobre arrays uint32, vetorizadas em lote
+            (várias mensagens com o mesmo número de words por vez).
 """
 import struct
 
+from .profiling import stage
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    np = None
+    NUMPY_AVAILABLE = False
+
 MASK = 0xFFFFFFFF
 DELTA = 0x61C88647  # 1640531527
 
@@ -11,26 +25,14 @@ def _u32(x: int) -> int:
     return x & MASK
 
 
-def _sub_4D1DB4(data: bytes, key16: bytes) -> bytes:
-    """Versão fiel do sub_4D1DB4 decompilado."""
-    a2 = len(data)
-    if a2 == 0:
-        return b""
+def _xxtea_rounds(v, k) -> None:
+    """Rodadas do sub_4D1DB4, in-place sobre uma sequência mutável de uint32.
 
-    # v5 = a2 >> 2; if (a2 & 3) v5++
-    v50 = (a2 + 3) // 4
-    v49 = 4 * v50  # tamanho em bytes arredondado
+    v: list ou array('I') com as v50 words; k: 4 words da key.
+    """
+    v50 = len(v)
     v31 = v50 - 1
 
-    # monta vetor de uint32 little-endian com padding de zero
-    padded = data.ljust(v49, b"\x00")
-    v = list(struct.unpack("<%dI" % v50, padded))
-
-    # monta key em 4 x uint32 little-endian
-    if len(key16) != 16:
-        raise ValueError("key16 precisa ter 16 bytes aqui")
-    k = list(struct.unpack("<4I", key16))
-
     # if (v50 != 1) { ... }
     if v50 != 1:
         # v33 = -1253254570 - 1640531527 * (0x34 / v50);
@@ -74,24 +76,326 @@ def _sub_4D1DB4(data: bytes, key16: bytes) -> bytes:
 
                 v33 = _u32(v33 + DELTA)
 
-    v43 = v[v31]
 
+def _check_v43(v43: int, v49: int) -> None:
     if not (v43 >= v49 - 7 and v43 <= v49 - 4):
         raise ValueError(f"Tamanho decodificado inválido: v43={v43}, v49={v49}")
 
+
+def _sub_4D1DB4(data: bytes, key16: bytes) -> bytes:
+    """Versão fiel do sub_4D1DB4 decompilado."""
+    a2 = len(data)
+    if a2 == 0:
+        return b""
+
+    # v5 = a2 >> 2; if (a2 & 3) v5++
+    v50 = (a2 + 3) // 4
+    v49 = 4 * v50  # tamanho em bytes arredondado
+    v31 = v50 - 1
+
+    # monta vetor de uint32 little-endian com padding de zero
+    padded = data.ljust(v49, b"\x00")
+    v = list(struct.unpack("<%dI" % v50, padded))
+
+    # monta key em 4 x uint32 little-endian
+    if len(key16) != 16:
+        raise ValueError("key16 precisa ter 16 bytes aqui")
+    k = list(struct.unpack("<4I", key16))
+
+    _xxtea_rounds(v, k)
+
+    v43 = v[v31]
+    _check_v43(v43, v49)
+
     full_bytes = b"".join(struct.pack("<I", x) for x in v)
     return full_bytes[:v43]
 
 
-def tj_xxtea_decrypt_bytes(data: bytes, key: bytes) -> bytes:
-    """Wrapper equivalente ao tj_xxtea_decrypt do jogo."""
+def _xxtea_rounds_numpy(v, k) -> None:
+    """Rodadas do sub_4D1DB4 sobre arrays uint32, in-place.
+
+    v: array (linhas, v50) com as words de cada mensagem
+    k: array (linhas, 4) com a key de cada mensagem
+
+    O XXTEA é sequencial dentro de uma mensagem (cada word depende da
+    anterior), então a vetorização acontece no eixo das linhas.
+    """
+    v50 = v.shape[1]
+    if v50 == 1:
+        return
+
+    v31 = v50 - 1
+    v33 = _u32(-1253254570 - DELTA * (0x34 // v50))
+
+    with np.errstate(over="ignore"):
+        v34 = v[:, 0].copy()
+        while v33 != 0:
+            sum_ = np.uint32(v33)
+            v36 = (v33 >> 2) & 3
+
+            for v38 in range(v31, -1, -1):
+                # v38 == 0 usa z = v[v31] (já atualizado) e k[v36]
+                v40 = v[:, v38 - 1] if v38 else v[:, v31]
+                v41 = (v38 & 3) ^ v36
+
+                mx = ((v40 >> 5) ^ (v34 << 2)) + ((v40 << 4) ^ (v34 >> 3))
+                mx ^= (k[:, v41] ^ v40) + (v34 ^ sum_)
+
+                v[:, v38] -= mx
+                v34 = v[:, v38]
+
+            v33 = _u32(v33 + DELTA)
+
+
+def _sub_4D1DB4_numpy(data: bytes, key16: bytes) -> bytes:
+    """sub_4D1DB4 usando o motor numpy (mesma saída byte a byte)."""
+    a2 = len(data)
+    if a2 == 0:
+        return b""
+
+    v50 = (a2 + 3) // 4
+    v49 = 4 * v50
+    if len(key16) != 16:
+        raise ValueError("key16 precisa ter 16 bytes aqui")
+
+    v = np.frombuffer(data.ljust(v49, b"\x00"), dtype="<u4").astype(np.uint32).reshape(1, v50)
+    k = np.frombuffer(key16, dtype="<u4").astype(np.uint32).reshape(1, 4)
+    _xxtea_rounds_numpy(v, k)
+
+    v43 = int(v[0, v50 - 1])
+    _check_v43(v43, v49)
+
+    return v.astype("<u4").tobytes()[:v43]
+
+
+BACKENDS = {
+    "python": _sub_4D1DB4,
+}
+if NUMPY_AVAILABLE:
+    BACKENDS["numpy"] = _sub_4D1DB4_numpy
+
+# Com uma única mensagem o numpy paga overhead por word sem ter o que
+# vetorizar; ele só compensa a partir de algumas linhas por lote.
+NUMPY_MIN_ROWS = 8
+
+
+def pick_backend(rows: int = 1) -> str:
+    """Escolhe o backend para decifrar `rows` mensagens de mesmo tamanho."""
+    if NUMPY_AVAILABLE and rows >= NUMPY_MIN_ROWS:
+        return "numpy"
+    return "python"
+
+
+def _effective_key(key: bytes) -> bytes:
     key_len = len(key)
     if key_len == 0:
         raise ValueError("Key vazia não é suportada.")
 
     if key_len > 0xF:
-        key_effective = key[:16]
-    else:
-        key_effective = key.ljust(16, b"\x00")
+        return key[:16]
+    return key.ljust(16, b"\x00")
+
+
+def tj_xxtea_decrypt_bytes(data: bytes, key: bytes, backend: str | None = None) -> bytes:
+    """Wrapper equivalente ao tj_xxtea_decrypt do jogo.
+
+    backend: "python", "numpy" ou None (escolha automática via pick_backend).
+    """
+    key_effective = _effective_key(key)
+
+    if backend is None:
+        backend = pick_backend()
+    try:
+        impl = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Backend XXTEA indisponível: {backend!r}") from None
+
+    return impl(data, key_effective)
+
+
+def tj_xxtea_decrypt_many(items, backend: str | None = None) -> list:
+    """Decifra vários pares (data, key) de uma vez.
+
+    As mensagens são agrupadas pelo número de words (v50), de modo que o
+    número de rodadas (0x34 // v50) é o mesmo dentro do grupo e cada grupo
+    roda como uma única operação de array.
+
+    Retorna uma lista na ordem de entrada; cada posição é o plaintext em
+    bytes ou a exceção (ValueError) daquela mensagem, para que um arquivo
+    inválido não derrube o lote inteiro.
+    """
+    items = list(items)
+    with stage("xxtea", sum(len(data) for data, _ in items), len(items)):
+        return _decrypt_many(items, backend)
+
+
+def _decrypt_many(items: list, backend: str | None) -> list:
+    results: list = [None] * len(items)
+
+    groups: dict[int, list[int]] = {}
+    keys: list = [None] * len(items)
+    for i, (data, key) in enumerate(items):
+        try:
+            keys[i] = _effective_key(key)
+        except ValueError as e:
+            results[i] = e
+            continue
+        if not data:
+            results[i] = b""
+            continue
+        groups.setdefault((len(data) + 3) // 4, []).append(i)
+
+    for v50, idxs in groups.items():
+        group_backend = backend if backend is not None else pick_backend(len(idxs))
+        if group_backend not in BACKENDS:
+            raise ValueError(f"Backend XXTEA indisponível: {group_backend!r}")
+
+        if group_backend != "numpy":
+            impl = BACKENDS[group_backend]
+            for i in idxs:
+                try:
+                    results[i] = impl(items[i][0], keys[i])
+                except ValueError as e:
+                    results[i] = e
+            continue
+
+        v49 = 4 * v50
+        v = np.frombuffer(
+            b"".join(items[i][0].ljust(v49, b"\x00") for i in idxs), dtype="<u4"
+        ).astype(np.uint32).reshape(len(idxs), v50)
+        k = np.frombuffer(b"".join(keys[i] for i in idxs), dtype="<u4").astype(np.uint32).reshape(len(idxs), 4)
+        _xxtea_rounds_numpy(v, k)
+
+        out = v.astype("<u4").tobytes()
+        for row, i in enumerate(idxs):
+            v43 = int(v[row, v50 - 1])
+            try:
+                _check_v43(v43, v49)
+            except ValueError as e:
+                results[i] = e
+                continue
+            start = row * v49
+            results[i] = out[start:start + v43]
+
+    return results
+
+
+def tj_xxtea_decrypt_inplace(words, key: bytes) -> int:
+    """Decifra in-place um buffer de words uint32 e retorna v43.
+
+    words: array('I') (ou outra sequência mutável de uint32) já com os
+    valores little-endian do payload, com padding de zero até v49 bytes.
+    Nenhuma cópia do payload é feita; o plaintext são os v43 primeiros
+    bytes do buffer (ex.: memoryview(words).cast("B")[:v43]).
+    """
+    if len(words) == 0:
+        return 0
+
+    k = struct.unpack("<4I", _effective_key(key))
+    with stage("xxtea", 4 * len(words), 1):
+        _xxtea_rounds(words, k)
+
+    v43 = words[len(words) - 1]
+    _check_v43(v43, 4 * len(words))
+    return v43
+
+
+# ----------------------------------------------------------------------
+# Encrypt (inverso do sub_4D1DB4), para repack de assets modificados
+# ----------------------------------------------------------------------
+def _xxtea_encrypt_rounds(v, k) -> None:
+    """Inverso de _xxtea_rounds, in-place (XXTEA encrypt padrão).
+
+    sum começa em 0 e anda -DELTA por rodada, terminando exatamente no
+    v33 inicial do decrypt.
+    """
+    n = len(v)
+    if n == 1:
+        return
+
+    rounds = 6 + 0x34 // n
+    sum_ = 0
+    z = v[n - 1]
+    for _ in range(rounds):
+        sum_ = _u32(sum_ - DELTA)
+        e = (sum_ >> 2) & 3
+        for p in range(n):
+            y = v[p + 1] if p != n - 1 else v[0]
+            mx = (((z >> 5) ^ _u32(4 * y)) + ((y >> 3) ^ _u32(16 * z))) & MASK
+            mx ^= ((sum_ ^ y) + (k[(p & 3) ^ e] ^ z)) & MASK
+            z = _u32(v[p] + mx)
+            v[p] = z
+
+
+def _xxtea_encrypt_rounds_numpy(v, k) -> None:
+    """_xxtea_encrypt_rounds vetorizado no eixo das linhas (ver _xxtea_rounds_numpy)."""
+    n = v.shape[1]
+    if n == 1:
+        return
+
+    rounds = 6 + 0x34 // n
+    sum_ = 0
+    with np.errstate(over="ignore"):
+        z = v[:, n - 1].copy()
+        for _ in range(rounds):
+            sum_ = _u32(sum_ - DELTA)
+            s = np.uint32(sum_)
+            e = (sum_ >> 2) & 3
+            for p in range(n):
+                y = v[:, p + 1] if p != n - 1 else v[:, 0]
+                mx = ((z >> 5) ^ (y << 2)) + ((y >> 3) ^ (z << 4))
+                mx ^= (s ^ y) + (k[:, (p & 3) ^ e] ^ z)
+                v[:, p] += mx
+                z = v[:, p]
+
+
+def _plain_words(data: bytes) -> list:
+    """Words do plaintext com padding de zero + word final com o tamanho (v43)."""
+    n = (len(data) + 3) // 4
+    return list(struct.unpack("<%dI" % n, data.ljust(4 * n, b"\x00"))) + [len(data)]
+
+
+def tj_xxtea_encrypt_bytes(data: bytes, key: bytes) -> bytes:
+    """Inverso de tj_xxtea_decrypt_bytes: cifra e inclui a word de tamanho v43.
+
+    tj_xxtea_decrypt_bytes(tj_xxtea_encrypt_bytes(d, k), k) == d.
+    """
+    k = struct.unpack("<4I", _effective_key(key))
+    v = _plain_words(data)
+    _xxtea_encrypt_rounds(v, k)
+    return struct.pack("<%dI" % len(v), *v)
+
+
+def tj_xxtea_encrypt_many(items, backend: str | None = None) -> list:
+    """Cifra vários pares (data, key), agrupando por número de words.
+
+    Mesma estratégia de tj_xxtea_decrypt_many; retorna os ciphertexts na
+    ordem de entrada.
+    """
+    items = list(items)
+    results: list = [None] * len(items)
+
+    groups: dict[int, list[int]] = {}
+    for i, (data, _) in enumerate(items):
+        groups.setdefault((len(data) + 3) // 4 + 1, []).append(i)
+
+    for n, idxs in groups.items():
+        group_backend = backend if backend is not None else pick_backend(len(idxs))
+        if group_backend not in BACKENDS:
+            raise ValueError(f"Backend XXTEA indisponível: {group_backend!r}")
+
+        if group_backend != "numpy":
+            for i in idxs:
+                results[i] = tj_xxtea_encrypt_bytes(*items[i])
+            continue
+
+        v = np.array([_plain_words(items[i][0]) for i in idxs], dtype=np.uint32).reshape(len(idxs), n)
+        k = np.frombuffer(b"".join(_effective_key(items[i][1]) for i in idxs),
+                          dtype="<u4").astype(np.uint32).reshape(len(idxs), 4)
+        _xxtea_encrypt_rounds_numpy(v, k)
+
+        out = v.astype("<u4").tobytes()
+        for row, i in enumerate(idxs):
+            results[i] = out[row * 4 * n:(row + 1) * 4 * n]
 
-    return _sub_4D1DB4(data, key_effective)
+    return results
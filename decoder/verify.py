@@ -0,0 +1,150 @@
+"""
+Modo verify (dry-run): decifra em memória, sem gravar nada, e confere
+cada arquivo — header, word de tamanho (v43) do sub_4D1DB4 e tipo do
+plaintext — para descobrir em segundos se a base key / header_size servem
+para um build novo antes de um dump de vários minutos.
+"""
+from __future__ import annotations
+
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from .decode_logic import (
+    DEFAULT_CHUNK_SIZE,
+    LOW_MEMORY_THRESHOLD,
+    _decrypt_stream_low_memory,
+    _load_tj_file,
+)
+from .sniff import sniff_plaintext
+from .tjxxtea import tj_xxtea_decrypt_many
+
+# motivos de falha do relatório
+REASON_IO = "io"            # não deu para ler o arquivo
+REASON_HEADER = "header"    # magic/header curto ou inválido
+REASON_LENGTH = "length"    # word de tamanho (v43) fora do intervalo: key/header_size errados
+
+
+@dataclass
+class VerifyResult:
+    """Resultado do verify de um arquivo (precisa ser picklable)."""
+    path: Path
+    tj_type: str
+    size: int
+    plain_kind: str | None = None
+    plain_size: int = 0
+    error: str | None = None
+    reason: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def verify_chunk(chunk: list[tuple[Path, str, bytes | None]],
+                 base_key_hex: str | None,
+                 header_size: int) -> list[VerifyResult]:
+    """Executado nos processos do pool: verifica um lote com o XXTEA em lote."""
+    results: list = [None] * len(chunk)
+    pending: list[int] = []
+    items: list[tuple[bytes, bytes]] = []
+    sizes: dict[int, int] = {}
+
+    for i, (path, t, head) in enumerate(chunk):
+        try:
+            sizes[i] = size = os.stat(path).st_size
+            if size >= LOW_MEMORY_THRESHOLD:
+                with open(path, "rb") as f:
+                    plain, t = _decrypt_stream_low_memory(f, size, base_key_hex, header_size, head, path)
+                results[i] = VerifyResult(path, t, size, sniff_plaintext(plain), len(plain))
+                continue
+            payload, key_bytes, t = _load_tj_file(path, base_key_hex, header_size, head)
+        except OSError as e:
+            results[i] = VerifyResult(path, t, sizes.get(i, 0), error=str(e), reason=REASON_IO)
+            continue
+        except ValueError as e:
+            reason = REASON_LENGTH if "Tamanho decodificado" in str(e) else REASON_HEADER
+            results[i] = VerifyResult(path, t, sizes[i], error=str(e), reason=reason)
+            continue
+        pending.append(i)
+        items.append((payload, key_bytes))
+
+    for i, plain in zip(pending, tj_xxtea_decrypt_many(items)):
+        path, t, _ = chunk[i]
+        if isinstance(plain, Exception):
+            results[i] = VerifyResult(path, t, sizes[i], error=str(plain), reason=REASON_LENGTH)
+        else:
+            results[i] = VerifyResult(path, t, sizes[i], sniff_plaintext(plain), len(plain))
+    return results
+
+
+def sample_jobs(jobs: list, n: int) -> list:
+    """n jobs espaçados igualmente pela lista (amostra determinística)."""
+    if n <= 0 or n >= len(jobs):
+        return jobs
+    step = len(jobs) / n
+    return [jobs[int(i * step)] for i in range(n)]
+
+
+def verify_files(jobs,
+                 base_key_hex: str | None = None,
+                 header_size: int = 23,
+                 workers: int | None = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Verifica os jobs (path, tipo[, head]) em todos os núcleos; gera VerifyResult."""
+    jobs = [(Path(j[0]), j[1], j[2] if len(j) > 2 else None) for j in jobs]
+    step = max(1, chunk_size)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        futures = [pool.submit(verify_chunk, jobs[i:i + step], base_key_hex, header_size)
+                   for i in range(0, len(jobs), step)]
+        for fut in futures:
+            yield from fut.result()
+
+
+class VerifyReport:
+    """Contagens por tipo tj × tipo do plaintext e falhas por motivo."""
+
+    def __init__(self):
+        self.kinds: Counter = Counter()
+        self.failures: Counter = Counter()
+        self.files = 0
+        self.bytes = 0
+
+    def add(self, res: VerifyResult) -> None:
+        self.files += 1
+        self.bytes += res.size
+        if res.ok:
+            self.kinds[(res.tj_type, res.plain_kind)] += 1
+        else:
+            self.failures[(res.tj_type, res.reason)] += 1
+
+    @property
+    def ok(self) -> int:
+        return sum(self.kinds.values())
+
+    @property
+    def failed(self) -> int:
+        return sum(self.failures.values())
+
+    def to_dict(self) -> dict:
+        return {
+            "files": self.files,
+            "ok": self.ok,
+            "failed": self.failed,
+            "kinds": {f"{t}/{k}": n for (t, k), n in sorted(self.kinds.items())},
+            "failures": {f"{t}/{r}": n for (t, r), n in sorted(self.failures.items())},
+        }
+
+    def lines(self) -> list[str]:
+        out = [f"{self.files} arquivos verificados: {self.ok} ok, {self.failed} com falha."]
+        if self.kinds:
+            out.append("Plaintext por tipo:")
+            out.extend(f"  {t:8s} {k:14s} {n:8d}" for (t, k), n in sorted(self.kinds.items()))
+        if self.failures:
+            out.append("Falhas por motivo:")
+            out.extend(f"  {t:8s} {r:14s} {n:8d}" for (t, r), n in sorted(self.failures.items()))
+            if not self.kinds:
+                out.append("Nenhum arquivo passou: base key ou header_size provavelmente errados.")
+        return out
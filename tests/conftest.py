@@ -0,0 +1,50 @@
+"""Fixtures comuns: arquivos tj sintéticos cifrados com a base key padrão."""
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+import pytest
+
+from .synthetic import make_tj_bytes, synthetic_plain
+from decoder.keygen import BASE_KEY_HEX, parse_hex_bytes
+
+BASE_KEY = parse_hex_bytes(BASE_KEY_HEX)
+
+
+@pytest.fixture
+def rng() -> random.Random:
+    return random.Random(99)
+
+
+@pytest.fixture
+def make_tj(rng):
+    """make_tj(path, plain, magic=b"tj!", header=None, header_size=23) -> Path."""
+    def make(path: Path, plain: bytes, magic: bytes = b"tj!", header: bytes | None = None,
+             header_size: int = 23) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(make_tj_bytes(magic, plain, header or rng.randbytes(16), BASE_KEY, header_size))
+        return path
+    return make
+
+
+@pytest.fixture
+def plain(rng) -> bytes:
+    return synthetic_plain("lua", 5000, rng)
+
+
+@pytest.fixture
+def src(tmp_path, make_tj, plain) -> Path:
+    """Um .lua tj! com `plain` dentro de tmp_path/src."""
+    return make_tj(tmp_path / "src" / "a.lua", plain)
+
+
+def run_decoder(decoder, jobs) -> dict[str, list]:
+    """Roda o ParallelDecoder até o "done" e agrupa os eventos por tipo."""
+    events: dict[str, list] = {}
+    q = decoder.start(jobs)
+    while True:
+        kind, value = q.get(timeout=60)
+        events.setdefault(kind, []).append(value)
+        if kind == "done":
+            return events
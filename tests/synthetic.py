@@ -0,0 +1,71 @@
+"""
+Arquivos tj!/tje/tjz sintéticos para os testes e os benchmarks.
+
+xxtea_encrypt é um encrypt (inverso do sub_4D1DB4) separado do
+tj_xxtea_encrypt_bytes, usado como referência para os backends de decrypt
+e para o próprio encrypt do repack.
+"""
+from __future__ import annotations
+
+import json
+import random
+import struct
+import zlib
+
+from decoder import tjxxtea
+from decoder.keygen import derive_file_key
+
+
+def xxtea_encrypt(plain: bytes, key16: bytes) -> bytes:
+    """XXTEA encrypt com a word de tamanho (v43) no final, como o jogo espera."""
+    n_bytes = len(plain)
+    words = (n_bytes + 3) // 4
+    v = list(struct.unpack("<%dI" % words, plain.ljust(4 * words, b"\x00"))) + [n_bytes]
+    k = struct.unpack("<4I", key16)
+    n = len(v)
+
+    # com uma única word o sub_4D1DB4 não roda nenhuma rodada
+    rounds = 6 + 52 // n if n > 1 else 0
+    total = 0
+    z = v[n - 1]
+    for _ in range(rounds):
+        total = (total - tjxxtea.DELTA) & tjxxtea.MASK
+        e = (total >> 2) & 3
+        for p in range(n):
+            y = v[(p + 1) % n]
+            mx = ((((z >> 5) ^ (y << 2)) + ((y >> 3) ^ (z << 4))) ^
+                  ((total ^ y) + (k[(p & 3) ^ e] ^ z))) & tjxxtea.MASK
+            v[p] = (v[p] + mx) & tjxxtea.MASK
+            z = v[p]
+    return struct.pack("<%dI" % n, *v)
+
+
+def make_tj_bytes(magic: bytes, plain: bytes, header: bytes,
+                  base_key: bytes, header_size: int = 23) -> bytes:
+    """Arquivo completo: magic + header + padding até header_size + payload cifrado."""
+    key = derive_file_key(base_key, header)
+    return magic + header + b"\x00" * (header_size - 19) + xxtea_encrypt(plain, key)
+
+
+# ----------------------------------------------------------------------
+# Corpus sintético
+# ----------------------------------------------------------------------
+def synthetic_plain(kind: str, size: int, rng: random.Random) -> bytes:
+    """Plaintext com cara de asset real: Lua, JSON, PNG ou bundle zlib."""
+    if kind == "lua":
+        line = b'local t = { id = %d, name = "npc_%d" }\n'
+        out = bytearray()
+        i = 0
+        while len(out) < size:
+            out += line % (i, rng.randrange(10000))
+            i += 1
+        return bytes(out[:size])
+    if kind == "json":
+        body = json.dumps([{"id": i, "v": rng.random()} for i in range(size // 24 + 1)])
+        return body.encode()[:size]
+    if kind == "png":
+        return b"\x89PNG\r\n\x1a\n" + rng.randbytes(max(size - 8, 0))
+    if kind == "zlib":
+        raw = synthetic_plain("lua", size * 4, rng)
+        return zlib.compress(raw)
+    raise ValueError(kind)
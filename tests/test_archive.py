@@ -0,0 +1,16 @@
+import zipfile
+
+from decoder.archive import decode_archive
+
+
+def test_decode_archive(tmp_path, src, plain):
+    apk = tmp_path / "client.apk"
+    with zipfile.ZipFile(apk, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.write(src, "assets/a.lua")
+
+    [res] = decode_archive(apk, out_dir=tmp_path / "apk_dir", workers=1)
+    assert res.out_path.read_bytes() == plain
+
+    [_] = decode_archive(apk, out_zip=tmp_path / "apk.zip", workers=1)
+    with zipfile.ZipFile(tmp_path / "apk.zip") as zf:
+        assert zf.read("assets/a.lua") == plain
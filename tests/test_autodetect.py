@@ -0,0 +1,32 @@
+from decoder.autodetect import detect_key
+from decoder.keygen import BASE_KEY_HEX
+
+from .synthetic import synthetic_plain
+
+WRONG_KEY = bytes(range(16)).hex(" ")
+
+
+def _samples(tmp_path, make_tj, rng, header_size=27):
+    return [make_tj(tmp_path / f"s{i}", synthetic_plain(kind, 200, rng), header_size=header_size)
+            for i, kind in enumerate(("lua", "json", "png"))]
+
+
+def test_detects_key_and_header_size(tmp_path, make_tj, rng):
+    det = detect_key(_samples(tmp_path, make_tj, rng), [WRONG_KEY, BASE_KEY_HEX])
+    assert det is not None
+    assert (det.base_key_hex, det.header_size, det.exact) == (BASE_KEY_HEX, 27, True)
+
+
+def test_wrong_keyring(tmp_path, make_tj, rng):
+    assert detect_key(_samples(tmp_path, make_tj, rng), [WRONG_KEY]) is None
+
+
+def test_one_bad_sample_does_not_reject_the_key(tmp_path, make_tj, rng):
+    samples = _samples(tmp_path, make_tj, rng, header_size=23)
+    # a menor amostra (a primeira testada) está corrompida
+    bad = tmp_path / "s_bad"
+    bad.write_bytes(samples[0].read_bytes()[:19] + rng.randbytes(40))
+    det = detect_key([bad] + samples, [WRONG_KEY, BASE_KEY_HEX])
+    assert det is not None
+    assert (det.base_key_hex, det.header_size) == (BASE_KEY_HEX, 23)
+    assert not det.exact
@@ -0,0 +1,19 @@
+from decoder import cli
+from decoder.manifest import DecodeManifest
+
+
+def test_prune_failure_is_not_a_pool_failure(tmp_path, src, monkeypatch, capsys):
+    out = tmp_path / "out"
+    prune = DecodeManifest.prune
+
+    def failing_prune(self, keep):
+        removed, failed = prune(self, keep)
+        failed[out / "gone.lua"] = "Permission denied"
+        return removed, failed
+
+    monkeypatch.setattr(DecodeManifest, "prune", failing_prune)
+    code = cli.main([str(src.parent), "-o", str(out), "--incremental", "-j", "1", "-q"])
+    err = capsys.readouterr().err
+    assert code == 1
+    assert "[ERRO] Saída de fonte apagada não removida" in err
+    assert "pool" not in err
@@ -0,0 +1,53 @@
+import time
+
+from decoder import decode_logic
+from decoder.decode_logic import _decode_chunk, decode_many_files, decode_single_file
+from decoder.profiling import Profiler, activate
+
+
+def test_decode_single_file(tmp_path, src, plain):
+    for low_memory in (False, True):
+        out = decode_single_file(src, tmp_path / f"out_{low_memory}", low_memory=low_memory)
+        assert out.read_bytes() == plain
+
+
+def test_atomic_write_leaves_no_temp(tmp_path, src, plain):
+    out = decode_single_file(src, tmp_path / "atomic")
+    assert out.read_bytes() == plain
+    assert not any(p.suffix == ".tmp" for p in out.parent.iterdir())
+
+
+def test_profiling_stages(tmp_path, src, plain):
+    profiler = Profiler()
+    previous = activate(profiler)
+    try:
+        [res] = decode_many_files([src], out_dir=tmp_path / "prof", source_root=src.parent)
+    finally:
+        activate(previous)
+    stages = profiler.to_dict()
+    assert res.ok and res.out_path.read_bytes() == plain
+    for name in ("read", "keygen", "xxtea", "write"):
+        assert stages[name]["files"] == 1
+
+
+def test_max_file_size(tmp_path, make_tj, rng):
+    big = make_tj(tmp_path / "src" / "big.lua", rng.randbytes(4000))
+    small = make_tj(tmp_path / "src" / "small.lua", rng.randbytes(100))
+    jobs = [(big, "tj_bang", None), (small, "tj_bang", None)]
+    results, _, _, _ = _decode_chunk(jobs, None, 23, out_dir=tmp_path / "out", source_root=tmp_path / "src",
+                                     max_file_size=small.stat().st_size)
+    by_path = {res.path: res for res in results}
+    assert not by_path[big].ok and "limite" in by_path[big].error
+    assert by_path[small].ok
+
+
+def test_file_timeout(tmp_path, src, monkeypatch):
+    def slow(*args, **kwargs):
+        time.sleep(5)
+
+    monkeypatch.setattr(decode_logic, "_decode_jobs", slow)
+    started = time.monotonic()
+    [res], _, _, _ = _decode_chunk([(src, "tj_bang", None)], None, 23, out_dir=tmp_path / "out",
+                                   source_root=src.parent, file_timeout=0.2)
+    assert not res.ok
+    assert time.monotonic() - started < 4
@@ -0,0 +1,48 @@
+import gzip
+import io
+import struct
+import zipfile
+import zlib
+
+import pytest
+
+from decoder.decompress import detect_container, inflate_bytes, inflate_to_file
+
+DATA = b"local t = {}\n" * 2000
+
+
+def _zip_bytes() -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("dir/a.lua", DATA)
+        zf.writestr("../fora.lua", b"x")
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("container, packed", [
+    ("zlib", zlib.compress(DATA)),
+    ("gzip", gzip.compress(DATA)),
+    ("zlib+size", struct.pack("<I", len(DATA)) + zlib.compress(DATA)),
+])
+def test_inflate(tmp_path, container, packed):
+    assert detect_container(packed) == container
+    assert inflate_to_file(packed, tmp_path / "out", container) == len(DATA)
+    assert (tmp_path / "out").read_bytes() == DATA
+    assert inflate_bytes(packed, container, 100) == DATA[:100]
+
+
+def test_zip_extracts_to_directory(tmp_path):
+    packed = _zip_bytes()
+    assert detect_container(packed) == "zip"
+    inflate_to_file(packed, tmp_path / "out", "zip")
+    assert (tmp_path / "out" / "dir" / "a.lua").read_bytes() == DATA
+    assert not (tmp_path / "fora.lua").exists()
+
+
+def test_plain_is_not_a_container():
+    assert detect_container(b"return 1\n") is None
+
+
+def test_truncated_stream(tmp_path):
+    with pytest.raises(ValueError):
+        inflate_to_file(zlib.compress(DATA)[:50], tmp_path / "out", "zlib")
@@ -0,0 +1,44 @@
+import shutil
+
+from decoder.decode_logic import iter_tj_files
+from decoder.diff import diff_trees, scan_roots
+from decoder.scanner import INDEX_FILENAME, temp_index_path
+
+
+def test_diff_trees(tmp_path, src, plain, make_tj, rng):
+    old, new = tmp_path / "v1", tmp_path / "v2"
+    for tree in (old, new):
+        tree.mkdir()
+        shutil.copyfile(src, tree / "same.lua")
+    shutil.copyfile(src, old / "gone.lua")
+    make_tj(new / "new.json", b'{"a": 1}')
+    header = src.read_bytes()[3:19]
+    make_tj(old / "edit.lua", plain, header=header)
+    make_tj(new / "edit.lua", plain[::-1], header=header)
+    make_tj(old / "rekey.lua", plain)
+    make_tj(new / "rekey.lua", plain)
+
+    entries = {e.rel: e for e in diff_trees(old, new, iter_tj_files(old, with_head=True),
+                                            iter_tj_files(new, with_head=True), tmp_path / "diff", workers=1)}
+    assert {rel: e.status for rel, e in entries.items()} == {
+        "same.lua": "unchanged", "gone.lua": "removed", "new.json": "added",
+        "edit.lua": "changed", "rekey.lua": "rekeyed"}
+    assert entries["edit.lua"].out_path.read_bytes() == plain[::-1]
+    assert sorted(p.name for p in (tmp_path / "diff").iterdir()) == ["edit.lua", "new.json"]
+
+
+def test_scan_roots_does_not_write_into_roots(tmp_path, src):
+    old, new = tmp_path / "v1", tmp_path / "v2"
+    for tree in (old, new):
+        tree.mkdir()
+        shutil.copyfile(src, tree / "a.lua")
+    try:
+        old_jobs, new_jobs = scan_roots([old, new])
+        assert [j[0] for j in old_jobs] == [old / "a.lua"] and [j[0] for j in new_jobs] == [new / "a.lua"]
+        assert sorted(p.name for p in old.iterdir()) == sorted(p.name for p in new.iterdir()) == ["a.lua"]
+
+        scan_roots([old, new], persist_index=True)
+        assert (old / INDEX_FILENAME).exists() and (new / INDEX_FILENAME).exists()
+    finally:
+        for tree in (old, new):
+            temp_index_path(tree).unlink(missing_ok=True)
@@ -0,0 +1,22 @@
+from decoder.decode_logic import decode_single_file
+from decoder.encode_logic import encode_single_file, repack_tree
+
+from .synthetic import synthetic_plain
+
+
+def test_encode_keeps_original_header(tmp_path, src, rng):
+    modded = synthetic_plain("json", 3000, rng)
+    (tmp_path / "mod").mkdir()
+    (tmp_path / "mod" / "a.lua").write_bytes(modded)
+    packed = encode_single_file(tmp_path / "mod" / "a.lua", tmp_path / "packed.lua", original=src)
+    assert packed.read_bytes()[:23] == src.read_bytes()[:23]
+    assert decode_single_file(packed, tmp_path / "out").read_bytes() == modded
+
+
+def test_repack_tree(tmp_path, src, rng):
+    modded = synthetic_plain("json", 3000, rng)
+    (tmp_path / "mod").mkdir()
+    (tmp_path / "mod" / "a.lua").write_bytes(modded)
+    [res] = repack_tree(tmp_path / "mod", src.parent, tmp_path / "repacked", workers=1)
+    assert res.ok
+    assert decode_single_file(res.out_path, tmp_path / "out").read_bytes() == modded
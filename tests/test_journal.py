@@ -0,0 +1,29 @@
+from decoder.journal import DecodeJournal
+
+
+def test_journal_round_trip(tmp_path, src, make_tj):
+    other = make_tj(src.parent / "b.lua", b"return 2\n" * 10)
+    out = tmp_path / "a.lua"
+    out.write_bytes(b"")
+    journal_path = tmp_path / "journal.jsonl"
+    journal = DecodeJournal(journal_path, src.parent, {"header_size": 23})
+    journal.open({})
+    journal.record(src, out)
+    journal.close(finished=False)
+
+    jobs = [(src, "tj_bang", None), (other, "tj_bang", None)]
+    pending, kept = journal.completed(jobs, journal.load())
+    assert [j[0] for j in pending] == [other]
+    assert list(kept) == ["a.lua"]
+    # outra configuração não reaproveita o journal
+    assert DecodeJournal(journal_path, src.parent, {"header_size": 27}).load() == {}
+
+
+def test_finished_journal_is_not_resumed(tmp_path, src):
+    out = tmp_path / "a.lua"
+    out.write_bytes(b"")
+    journal = DecodeJournal(tmp_path / "journal.jsonl", src.parent, {})
+    journal.open({})
+    journal.record(src, out)
+    journal.close(finished=True)
+    assert journal.load() == {}
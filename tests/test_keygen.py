@@ -0,0 +1,9 @@
+from decoder.keygen import BASE_KEY_HEX, get_key_deriver
+
+
+def test_deriver_shared_across_hex_spellings():
+    spellings = [BASE_KEY_HEX, BASE_KEY_HEX.upper(), BASE_KEY_HEX.replace(" ", ","),
+                 "  " + BASE_KEY_HEX.replace(" ", "   ") + "\n"]
+    derivers = {id(get_key_deriver(h)) for h in spellings}
+    assert len(derivers) == 1
+
@@ -0,0 +1,90 @@
+from decoder.manifest import DecodeManifest, file_digest
+
+
+def _record(manifest, src, out):
+    st = src.stat()
+    head = src.read_bytes()[:19]
+    manifest.record(src, st.st_size, st.st_mtime_ns, file_digest(src), manifest.fingerprint(head), out)
+    return head, st
+
+
+def test_up_to_date(tmp_path, src):
+    out = tmp_path / "out.lua"
+    out.write_bytes(b"x")
+    with DecodeManifest(src.parent, path=tmp_path / "m.sqlite3") as manifest:
+        head, st = _record(manifest, src, out)
+        assert manifest.is_up_to_date(src, head, st.st_size, st.st_mtime_ns, out)
+        # mesmo conteúdo com mtime novo: confere o digest
+        assert manifest.is_up_to_date(src, head, st.st_size, st.st_mtime_ns + 1)
+        assert not manifest.is_up_to_date(src, head, st.st_size + 1, st.st_mtime_ns)
+        assert not manifest.is_up_to_date(src, head, st.st_size, st.st_mtime_ns, tmp_path / "outro.lua")
+        out.unlink()
+        assert not manifest.is_up_to_date(src, head, st.st_size, st.st_mtime_ns)
+
+
+def test_key_change_invalidates(tmp_path, src):
+    out = tmp_path / "out.lua"
+    out.write_bytes(b"x")
+    with DecodeManifest(src.parent, path=tmp_path / "m.sqlite3") as manifest:
+        head, st = _record(manifest, src, out)
+    with DecodeManifest(src.parent, header_size=27, path=tmp_path / "m.sqlite3") as manifest:
+        assert not manifest.is_up_to_date(src, head, st.st_size, st.st_mtime_ns)
+
+
+def test_prune_removes_outputs_of_deleted_sources(tmp_path, src):
+    out = tmp_path / "out.lua"
+    out.write_bytes(b"x")
+    with DecodeManifest(src.parent, path=tmp_path / "m.sqlite3") as manifest:
+        _record(manifest, src, out)
+        assert manifest.prune({src}) == ([], {})
+        src.unlink()
+        assert manifest.prune(set()) == ([out], {})
+    assert not out.exists()
+
+
+def test_prune_removes_directory_outputs(tmp_path, src):
+    out = tmp_path / "out.tjz"  # tjz com zip dentro vira pasta
+    (out / "dir").mkdir(parents=True)
+    (out / "dir" / "a.lua").write_bytes(b"x")
+    with DecodeManifest(src.parent, path=tmp_path / "m.sqlite3") as manifest:
+        _record(manifest, src, out)
+        src.unlink()
+        assert manifest.prune(set()) == ([out], {})
+    assert not out.exists()
+
+
+def test_prune_reports_failures_and_retries(tmp_path, src):
+    blocker = tmp_path / "arquivo"
+    blocker.write_bytes(b"")
+    out = blocker / "out.lua"  # pai não é pasta: o remove falha com NotADirectoryError
+    with DecodeManifest(src.parent, path=tmp_path / "m.sqlite3") as manifest:
+        _record(manifest, src, out)
+        src.unlink()
+        removed, failed = manifest.prune(set())
+        assert removed == [] and list(failed) == [out]
+        # a entrada continua no manifesto para a próxima execução
+        assert list(manifest.prune(set())[1]) == [out]
+
+
+def test_decode_digest_matches_file_digest(tmp_path, make_tj, rng, monkeypatch):
+    from decoder import decode_logic
+
+    small = make_tj(tmp_path / "src" / "small.lua", rng.randbytes(3000))
+    big = make_tj(tmp_path / "src" / "big.lua", rng.randbytes(6000))
+    monkeypatch.setattr(decode_logic, "LOW_MEMORY_THRESHOLD", 5000)  # big vai pelo modo de memória limitada
+    heads = [p.read_bytes()[:19] for p in (small, big)]
+    results = decode_logic.decode_many_files([small, big], heads=heads, out_dir=tmp_path / "out",
+                                             source_root=small.parent, with_digest=True)
+    assert [res.digest for res in results] == [file_digest(small), file_digest(big)]
+
+
+def test_incremental_reads_each_source_once(tmp_path, src, monkeypatch):
+    from decoder import decode_logic, manifest
+
+    def no_reread(path):
+        raise AssertionError(f"{path} relido para o digest")
+
+    monkeypatch.setattr(manifest, "file_digest", no_reread)
+    [res] = decode_logic._decode_jobs([(src, "tj_bang", None)], None, 23, True, tmp_path / "out",
+                                      src.parent, False)
+    assert res.ok and res.digest is not None
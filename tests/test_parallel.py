@@ -0,0 +1,190 @@
+import multiprocessing
+import os
+import shutil
+
+import pytest
+
+from decoder import decode_logic
+from decoder.decode_logic import ParallelDecoder, iter_tj_files
+from decoder.dedup import DUPLICATES_FILENAME
+from decoder.journal import JOURNAL_FILENAME, DecodeJournal
+
+from .conftest import run_decoder
+
+
+@pytest.fixture
+def tree(tmp_path, make_tj, rng):
+    """Raiz com três fontes .lua; devolve (raiz, {nome: plaintext})."""
+    root = tmp_path / "src"
+    plains = {}
+    for name in ("a.lua", "sub/b.lua", "sub/c.lua"):
+        plains[name] = rng.randbytes(rng.randrange(100, 3000))
+        make_tj(root / name, plains[name])
+    return root, plains
+
+
+def _jobs(root):
+    return list(iter_tj_files(root, with_head=True))
+
+
+def _results(events):
+    return {res.path.name: res for res in events.get("result", [])}
+
+
+def test_decode_all(tmp_path, tree):
+    root, plains = tree
+    out = tmp_path / "out"
+    events = run_decoder(ParallelDecoder(workers=2, chunk_size=1, root=root, out_dir=out), _jobs(root))
+    assert events["total"] == [3] and events["done"] == [False]
+    assert "error" not in events
+    for name, plain in plains.items():
+        assert (out / name).read_bytes() == plain
+    assert not (out / JOURNAL_FILENAME).exists()  # execução completa apaga o journal
+
+
+def test_incremental_skips_and_prunes(tmp_path, tree, make_tj):
+    root, plains = tree
+    out = tmp_path / "out"
+
+    def run():
+        return run_decoder(ParallelDecoder(workers=1, root=root, out_dir=out, incremental=True), _jobs(root))
+
+    assert run()["total"] == [3]
+    events = run()
+    assert events["skipped"] == [3] and events["total"] == [0]
+
+    make_tj(root / "a.lua", b"return 42\n" * 20)
+    (root / "sub" / "c.lua").unlink()
+    events = run()
+    assert events["skipped"] == [1] and list(_results(events)) == ["a.lua"]
+    assert events["pruned"] == [[out / "sub" / "c.lua"]]
+    assert (out / "a.lua").read_bytes() == b"return 42\n" * 20
+    assert not (out / "sub" / "c.lua").exists()
+
+
+def test_dedup_link(tmp_path, tree):
+    root, plains = tree
+    shutil.copyfile(root / "a.lua", root / "copy.lua")
+    out = tmp_path / "out"
+    events = run_decoder(ParallelDecoder(workers=1, root=root, out_dir=out, dedup="link"), _jobs(root))
+    [stats] = events["dedup"]
+    assert stats["duplicates"] == 1 and stats["unique"] == 3
+    results = _results(events)
+    dup = results["copy.lua"] if results["copy.lua"].duplicate_of else results["a.lua"]
+    assert dup.ok and dup.duplicate_of is not None
+    assert os.path.samefile(out / "a.lua", out / "copy.lua")
+    assert (out / "copy.lua").read_bytes() == plains["a.lua"]
+
+
+def test_dedup_manifest(tmp_path, tree):
+    root, _ = tree
+    shutil.copyfile(root / "a.lua", root / "copy.lua")
+    out = tmp_path / "out"
+    run_decoder(ParallelDecoder(workers=1, root=root, out_dir=out, dedup="manifest"), _jobs(root))
+    assert len([p for p in (out / "a.lua", out / "copy.lua") if p.exists()]) == 1
+    assert (out / DUPLICATES_FILENAME).exists()
+
+
+def test_resume_after_interrupted_run(tmp_path, tree, monkeypatch):
+    root, plains = tree
+    out = tmp_path / "out"
+    # simula uma execução morta depois de gravar tudo: o journal fica para trás
+    close = DecodeJournal.close
+    monkeypatch.setattr(DecodeJournal, "close", lambda self, finished: close(self, False))
+    run_decoder(ParallelDecoder(workers=1, root=root, out_dir=out, resume=True), _jobs(root))
+    monkeypatch.undo()
+    assert (out / JOURNAL_FILENAME).exists()
+
+    (out / "sub" / "b.lua").unlink()  # saída perdida: volta para a fila
+    events = run_decoder(ParallelDecoder(workers=1, root=root, out_dir=out, resume=True), _jobs(root))
+    assert events["resumed"] == [2] and events["total"] == [1]
+    assert list(_results(events)) == ["b.lua"]
+    assert (out / "sub" / "b.lua").read_bytes() == plains["sub/b.lua"]
+    assert not (out / JOURNAL_FILENAME).exists()
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="o patch do worker só chega aos processos com fork")
+def test_worker_crash_is_isolated(tmp_path, tree, make_tj, monkeypatch):
+    root, plains = tree
+    make_tj(root / "crash.lua", b"boom")
+    decode_jobs = decode_logic._decode_jobs
+
+    def crashing(jobs, *args):
+        if any(path.name == "crash.lua" for path, _, _ in jobs):
+            os._exit(1)
+        return decode_jobs(jobs, *args)
+
+    monkeypatch.setattr(decode_logic, "_decode_jobs", crashing)
+    out = tmp_path / "out"
+    events = run_decoder(ParallelDecoder(workers=1, chunk_size=4, root=root, out_dir=out), _jobs(root))
+    results = _results(events)
+    assert not results["crash.lua"].ok
+    assert all(results[name.split("/")[-1]].ok for name in plains)
+
+
+def test_auto_key_runs_in_decoder_thread(tmp_path, make_tj, rng):
+    root = tmp_path / "src"
+    plains = {f"{i}.lua": rng.randbytes(200) for i in range(3)}
+    for name, plain in plains.items():
+        make_tj(root / name, plain, header_size=27)
+    out = tmp_path / "out"
+    events = run_decoder(ParallelDecoder(workers=1, root=root, out_dir=out, auto_key=True), _jobs(root))
+    [det] = events["auto_key"]
+    assert det is not None and det.header_size == 27
+    for name, plain in plains.items():
+        assert (out / name).read_bytes() == plain
+
+
+def test_auto_key_without_match_decodes_nothing(tmp_path):
+    root = tmp_path / "src"
+    root.mkdir()
+    (root / "a.lua").write_bytes(b"tj!" + bytes(60))
+    events = run_decoder(ParallelDecoder(workers=1, root=root, out_dir=tmp_path / "out", auto_key=True),
+                         _jobs(root))
+    assert events["auto_key"] == [None]
+    assert "result" not in events and "total" not in events
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="o patch do worker só chega aos processos com fork")
+def test_worker_exception_fails_only_that_file(tmp_path, tree, make_tj, monkeypatch):
+    root, plains = tree
+    make_tj(root / "bad.lua", b"return 0\n")
+    decode_jobs = decode_logic._decode_jobs
+
+    def raising(jobs, *args):
+        if any(path.name == "bad.lua" for path, _, _ in jobs):
+            raise RecursionError("maximum recursion depth exceeded")
+        return decode_jobs(jobs, *args)
+
+    monkeypatch.setattr(decode_logic, "_decode_jobs", raising)
+    out = tmp_path / "out"
+    events = run_decoder(ParallelDecoder(workers=1, chunk_size=4, root=root, out_dir=out), _jobs(root))
+    results = _results(events)
+    assert "error" not in events and events["done"] == [False]
+    assert not results["bad.lua"].ok and "RecursionError" in results["bad.lua"].error
+    for name, plain in plains.items():
+        assert (out / name).read_bytes() == plain
+    assert not (out / JOURNAL_FILENAME).exists()
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="o patch do worker só chega aos processos com fork")
+def test_crashed_file_fails_its_duplicates_too(tmp_path, tree, make_tj, monkeypatch):
+    root, _ = tree
+    make_tj(root / "crash.lua", b"boom")
+    shutil.copyfile(root / "crash.lua", root / "crash_copy.lua")
+    decode_jobs = decode_logic._decode_jobs
+
+    def crashing(jobs, *args):
+        if any(path.name.startswith("crash") for path, _, _ in jobs):
+            os._exit(1)
+        return decode_jobs(jobs, *args)
+
+    monkeypatch.setattr(decode_logic, "_decode_jobs", crashing)
+    events = run_decoder(ParallelDecoder(workers=1, root=root, out_dir=tmp_path / "out", dedup="link"),
+                         _jobs(root))
+    results = _results(events)
+    assert len(results) == 5 == events["total"][0]
+    assert not results["crash.lua"].ok and not results["crash_copy.lua"].ok
@@ -0,0 +1,49 @@
+import json
+
+from decoder.decode_logic import decode_many_files, decrypt_many_files
+
+
+def test_json_pretty_and_minify(tmp_path, make_tj):
+    doc = {"npc": [{"id": i, "nome": f"npc_{i}"} for i in range(50)]}
+    src = make_tj(tmp_path / "src" / "c.json", json.dumps(doc).encode())
+    [pretty] = decode_many_files([src], out_dir=tmp_path / "out", source_root=src.parent, json_format="pretty")
+    text = pretty.out_path.read_text(encoding="utf-8")
+    assert pretty.content == "json"
+    assert json.loads(text) == doc and '\n  "npc"' in text
+
+    [(_, minified)] = decrypt_many_files([(src, "tj_bang", None)], json_format="minify")
+    assert json.loads(minified) == doc and b", " not in minified
+
+
+def test_invalid_json_written_as_is(tmp_path, make_tj):
+    raw = b'{"a": 1,'
+    src = make_tj(tmp_path / "src" / "c.json", raw)
+    [res] = decode_many_files([src], out_dir=tmp_path / "out", source_root=src.parent, json_format="pretty")
+    assert res.ok and res.out_path.read_bytes() == raw
+
+
+def test_bytecode_version(tmp_path, make_tj, rng):
+    src = make_tj(tmp_path / "src" / "d.lua", b"\x1bLJ\x02\x02" + rng.randbytes(300))
+    [res] = decode_many_files([src], out_dir=tmp_path / "out", source_root=src.parent)
+    assert (res.content, res.content_version) == ("luajit", "LuaJIT 2.1 (stripped)")
+
+
+def test_duplicate_keys_written_as_is(tmp_path, make_tj):
+    raw = b'{"id": 1, "id": 2, "sub": {"a": 1}}'
+    src = make_tj(tmp_path / "src" / "c.json", raw)
+    for json_format in ("pretty", "minify"):
+        [res] = decode_many_files([src], out_dir=tmp_path / json_format, source_root=src.parent,
+                                  json_format=json_format)
+        assert res.ok and res.out_path.read_bytes() == raw
+        [(_, plain)] = decrypt_many_files([(src, "tj_bang", None)], json_format=json_format)
+        assert plain == raw
+
+
+def test_deeply_nested_json_written_as_is(tmp_path, make_tj):
+    raw = b"[" * 100000 + b"]" * 100000
+    src = make_tj(tmp_path / "src" / "c.json", raw)
+    [res] = decode_many_files([src], out_dir=tmp_path / "out", source_root=src.parent, json_format="pretty")
+    assert res.ok and res.out_path.read_bytes() == raw
+    assert [p.name for p in res.out_path.parent.iterdir()] == ["c.json"]
+    [(res, plain)] = decrypt_many_files([(src, "tj_bang", None)], json_format="minify")
+    assert res.ok and plain == raw
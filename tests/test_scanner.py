@@ -0,0 +1,56 @@
+import os
+
+from decoder.decode_logic import decrypt_many_files
+from decoder.scanner import ScanIndex
+
+
+def _names(index):
+    return sorted(path.name for path, _, _ in index.iter_tj_files())
+
+
+def test_refresh_tracks_new_and_removed_files(tmp_path, make_tj):
+    root = tmp_path / "src"
+    make_tj(root / "a.lua", b"return 1\n")
+    make_tj(root / "sub" / "b.lua", b"return 2\n")
+    with ScanIndex(root, tmp_path / "index.sqlite3") as index:
+        stats = index.refresh()
+        assert _names(index) == ["a.lua", "b.lua"]
+        assert stats.dirs_scanned == 2
+
+        stats = index.refresh()
+        assert stats.dirs_reused == 2 and stats.dirs_scanned == 0
+
+        make_tj(root / "sub" / "c.lua", b"return 3\n")
+        (root / "a.lua").unlink()
+        index.refresh()
+        assert _names(index) == ["b.lua", "c.lua"]
+
+
+def test_index_lives_in_root_by_default(tmp_path, make_tj):
+    make_tj(tmp_path / "a.lua", b"return 1\n")
+    with ScanIndex(tmp_path) as index:
+        index.refresh()
+        assert [p.name for p, _, _ in index.iter_tj_files()] == ["a.lua"]
+    assert (tmp_path / ".tj_index.sqlite3").exists()
+
+
+def test_in_place_rewrite_refreshes_head(tmp_path, make_tj, rng):
+    root = tmp_path / "src"
+    path = make_tj(root / "a.lua", b"return 1\n" * 10)
+    with ScanIndex(root, tmp_path / "index.sqlite3") as index:
+        index.refresh()
+        dir_times = (root.stat().st_atime_ns, root.stat().st_mtime_ns)
+
+        # mesmo tamanho, header (FILE KEY) novo; o mtime da pasta não muda
+        new_plain = b"return 2\n" * 10
+        make_tj(path, new_plain)
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        os.utime(root, ns=dir_times)
+
+        stats = index.refresh()
+        assert stats.dirs_reused == 1 and stats.files_probed == 1
+        jobs = list(index.iter_tj_files())
+        assert jobs[0][2][:19] == path.read_bytes()[:19]
+        [(res, plain)] = decrypt_many_files(jobs)
+        assert res.ok and plain == new_plain
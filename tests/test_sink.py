@@ -0,0 +1,82 @@
+import zipfile
+import zlib
+
+import pytest
+
+from decoder.archive import decode_archive
+from decoder.decode_logic import ParallelDecoder, decrypt_many_files
+from decoder.sink import SinkWriter, TarSink, ZipSink, read_entry, read_index
+
+from .conftest import run_decoder
+
+
+@pytest.mark.parametrize("sink_cls, suffix", [(ZipSink, ".zip"), (TarSink, ".tar")])
+def test_archive_sink(tmp_path, src, plain, make_tj, sink_cls, suffix):
+    tjz_plain = b"return 1\n" * 400
+    tjz = make_tj(src.parent / "b.tjz", zlib.compress(tjz_plain), magic=b"tjz")
+    sink = sink_cls(tmp_path / f"out{suffix}", src.parent)
+    writer = SinkWriter(sink, lambda res: None)
+    for res, data in decrypt_many_files([(src, "tj_bang", None), (tjz, "tjz", None)]):
+        writer.put(res, data)
+    writer.close()
+
+    index = read_index(sink.path)
+    assert read_entry(sink.path, "a.lua", index) == plain
+    assert read_entry(sink.path, "b.tjz", index) == tjz_plain  # tjz entra inflado
+    assert not sink.tmp_path.exists()
+
+
+@pytest.mark.parametrize("sink_cls", [ZipSink, TarSink])
+def test_abort_discards_archive(tmp_path, src, sink_cls):
+    previous = tmp_path / "out.bin"
+    previous.write_bytes(b"execucao anterior")
+    sink = sink_cls(previous, src.parent)
+    writer = SinkWriter(sink, lambda res: None)
+    for res, data in decrypt_many_files([(src, "tj_bang", None)]):
+        writer.put(res, data)
+    writer.abort()
+    assert previous.read_bytes() == b"execucao anterior"
+    assert not sink.tmp_path.exists()
+
+
+def test_cancelled_decode_all_does_not_finalize(tmp_path, src):
+    sink = ZipSink(tmp_path / "out.zip", src.parent)
+    decoder = ParallelDecoder(workers=1, root=src.parent, sink=sink)
+    decoder.cancel()
+    events = run_decoder(decoder, [(src, "tj_bang", None)])
+    assert events["done"] == [True]
+    assert not sink.path.exists() and not sink.tmp_path.exists()
+
+
+def test_decode_archive_closed_early(tmp_path, src):
+    apk = tmp_path / "client.apk"
+    with zipfile.ZipFile(apk, "w") as zf:
+        zf.write(src, "assets/a.lua")
+        zf.write(src, "assets/b.lua")
+    out_zip = tmp_path / "apk.zip"
+    results = decode_archive(apk, out_zip=out_zip, workers=1, chunk_size=1)
+    next(results)
+    results.close()
+    assert not out_zip.exists()
+    assert not any(p.suffix == ".tmp" for p in tmp_path.iterdir())
+
+
+@pytest.mark.parametrize("sink_cls", [ZipSink, TarSink])
+def test_large_plaintext_is_not_copied(tmp_path, make_tj, rng, monkeypatch, sink_cls):
+    from decoder import decode_logic
+
+    plain = rng.randbytes(6000)
+    src = make_tj(tmp_path / "src" / "big.lua", plain)
+    monkeypatch.setattr(decode_logic, "LOW_MEMORY_THRESHOLD", 5000)
+    [(res, data)] = decrypt_many_files([(src, "tj_bang", None)])
+    assert isinstance(data, memoryview) and data == plain
+
+    sink = sink_cls(tmp_path / "out.bin", src.parent)
+    writer = SinkWriter(sink, lambda res: None)
+    writer.put(res, data)
+    writer.close()
+    assert read_entry(sink.path, "big.lua") == plain
+
+    # na volta do pool o plaintext precisa ser picklable
+    [(_, data)], _, _, _ = decode_logic._decode_chunk([(src, "tj_bang", None)], None, 23, return_plain=True)
+    assert isinstance(data, bytes) and data == plain
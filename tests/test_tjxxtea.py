@@ -0,0 +1,73 @@
+import hashlib
+import json
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+from decoder import tjxxtea
+from decoder.decode_logic import _new_word_buffer
+from decoder.keygen import BASE_KEY_HEX, derive_file_key, parse_hex_bytes
+
+from .synthetic import xxtea_encrypt
+
+BASE_KEY = parse_hex_bytes(BASE_KEY_HEX)
+GOLDEN = json.loads((Path(__file__).parents[1] / "benchmarks" / "golden_vectors.json").read_text())
+DECODERS = [*tjxxtea.BACKENDS, "batch", "inplace"]
+SIZES = [1, 2, 3, 4, 5, 8, 9, 31, 64, 255, 1024, 2999]
+
+
+def _decrypt(name: str, data: bytes, key: bytes) -> bytes:
+    if name == "batch":
+        return tjxxtea.tj_xxtea_decrypt_many([(data, key)] * tjxxtea.NUMPY_MIN_ROWS)[0]
+    if name == "inplace":
+        words = _new_word_buffer((len(data) + 3) // 4)
+        memoryview(words).cast("B")[:len(data)] = data
+        if sys.byteorder == "big":
+            words.byteswap()
+        v43 = tjxxtea.tj_xxtea_decrypt_inplace(words, key)
+        if sys.byteorder == "big":
+            words.byteswap()
+        return memoryview(words).cast("B")[:v43].tobytes()
+    return tjxxtea.tj_xxtea_decrypt_bytes(data, key, backend=name)
+
+
+def _golden_payload(vec: dict) -> tuple[bytes, bytes]:
+    data = bytes.fromhex(vec["file_hex"])
+    return data[vec["header_size"]:], derive_file_key(BASE_KEY, data[3:19])
+
+
+GOLDEN_CASES = [v for v in GOLDEN if _golden_payload(v)[0]]
+
+
+@pytest.mark.parametrize("decoder", DECODERS)
+@pytest.mark.parametrize("vec", GOLDEN_CASES, ids=lambda v: f"size={v['size']}")
+def test_golden_decrypt(vec, decoder):
+    payload, key = _golden_payload(vec)
+    plain = _decrypt(decoder, payload, key)
+    assert hashlib.sha256(plain).hexdigest() == vec["plain_sha256"]
+
+
+@pytest.mark.parametrize("vec", GOLDEN_CASES, ids=lambda v: f"size={v['size']}")
+def test_golden_encrypt(vec):
+    payload, key = _golden_payload(vec)
+    plain = tjxxtea.tj_xxtea_decrypt_bytes(payload, key, backend="python")
+    assert tjxxtea.tj_xxtea_encrypt_bytes(plain, key) == payload
+
+
+@pytest.mark.parametrize("decoder", DECODERS)
+@pytest.mark.parametrize("size", SIZES)
+def test_round_trip(size, decoder):
+    rng = random.Random(size)
+    plain, key = rng.randbytes(size), rng.randbytes(16)
+    assert _decrypt(decoder, xxtea_encrypt(plain, key), key) == plain
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_encrypt_matches_reference(size):
+    rng = random.Random(size)
+    plain, key = rng.randbytes(size), rng.randbytes(16)
+    cipher = xxtea_encrypt(plain, key)
+    assert tjxxtea.tj_xxtea_encrypt_bytes(plain, key) == cipher
+    assert tjxxtea.tj_xxtea_encrypt_many([(plain, key)] * tjxxtea.NUMPY_MIN_ROWS)[0] == cipher
@@ -0,0 +1,17 @@
+from decoder.verify import REASON_HEADER, REASON_LENGTH, VerifyReport, verify_files
+
+
+def test_verify_files(tmp_path, src, make_tj):
+    bad = tmp_path / "src" / "bad.lua"
+    bad.write_bytes(b"tj!" + b"\0" * 5)
+    report = VerifyReport()
+    for res in verify_files([(src, "tj_bang"), (bad, "tj_bang")], workers=1):
+        report.add(res)
+    assert (report.ok, report.failed) == (1, 1)
+    assert report.to_dict()["kinds"] == {"tj_bang/lua": 1}
+    assert report.to_dict()["failures"] == {f"tj_bang/{REASON_HEADER}": 1}
+
+
+def test_wrong_key_is_a_length_failure(src):
+    [res] = verify_files([(src, "tj_bang")], base_key_hex="00 " * 15 + "00", workers=1)
+    assert not res.ok and res.reason == REASON_LENGTH
@@ -8,6 +8,11 @@ Interface gráfica simples (Tkinter) para:
 from __future__ import annotations
 
 import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter
 from pathlib import Path
 from typing import Optional
 
@@ -15,17 +20,47 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
 try:
-    from PIL import Image, ImageTk
+    from PIL import ImageTk
     PIL_AVAILABLE = True
 except Exception:
     PIL_AVAILABLE = False
 from decoder.decode_logic import (
+    ParallelDecoder,
+    ThroughputMeter,
     detect_tj_type,
     decode_single_file,
-    iter_tj_files,
 )
+from decoder.postprocess import content_label
+from decoder.profiling import stage_lines
+from decoder.scanner import ScanIndex, iter_indexed_tj_files
+from ui.explorer import TYPE_LABELS, ExplorerCatalog, format_size
+from ui.preview import PreviewResult, PreviewWorker
 APP_VERSION = "0.0.0"
 
+# Arquivos por lote no Decode All (agrupados no XXTEA em lote)
+DECODE_CHUNK_SIZE = 64
+
+# Intervalo de leitura da fila de resultados do Decode All
+POLL_INTERVAL_MS = 100
+
+# Intervalo de leitura da fila do preview (curto: é o clique do usuário)
+PREVIEW_POLL_MS = 20
+
+# Itens inseridos por vez no explorer; o resto entra ao rolar/expandir
+TREE_PAGE_SIZE = 500
+
+# Espera após a última tecla no filtro antes de refazer a lista
+FILTER_DELAY_MS = 250
+
+# Opções do filtro por tipo -> tj_type (None = todos)
+FILTER_TYPES = {"todos": None, "tj!": "tj_bang", "tje": "tje", "tjz": "tjz", "outros": "unknown"}
+
+# Formato das saídas JSON no Decode All (rótulo, json_format do ParallelDecoder)
+JSON_CHOICES = (("como está", None), ("indentado", "pretty"), ("minificado", "minify"))
+
+_PLACEHOLDER = "__placeholder__"
+_MORE = "__more__"
+
 
 class DecoderApp(tk.Tk):
         def __init__(self):
@@ -34,9 +69,25 @@ class DecoderApp(tk.Tk):
             self.geometry("1000x600")
 
             self.current_root: Optional[Path] = None
+            self.catalog: Optional[ExplorerCatalog] = None
+            # nó "mais N itens" -> (pai, entradas, próximo índice)
+            self.tree_pages: dict[str, tuple] = {}
+            self._filter_job: Optional[str] = None
             self.image_cache = None  # Para manter referência do PhotoImage
 
+            # preview carregado em outra thread; só o request mais recente é exibido
+            self.preview_worker = PreviewWorker()
+            self.preview_request = 0
+            self.preview_next_offset: Optional[int] = None
+            self.preview_path: Optional[Path] = None
+            self._preview_polling = False
+
             self._build_ui()
+            self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        def on_close(self):
+            self.preview_worker.close()
+            self.destroy()
 
         # ------------------------------------------------------------------
         # UI building
@@ -66,21 +117,50 @@ class DecoderApp(tk.Tk):
             left_frame = ttk.Frame(main_pane)
             main_pane.add(left_frame, weight=1)
 
-            self.tree = ttk.Treeview(left_frame)
+            # Filtro: nome, tipo tj e extensão (sobre o catálogo em memória)
+            frm_filter = ttk.Frame(left_frame)
+            frm_filter.pack(side=tk.TOP, fill=tk.X)
+            self.var_filter_text = tk.StringVar()
+            self.var_filter_type = tk.StringVar(value="todos")
+            self.var_filter_ext = tk.StringVar()
+            ttk.Label(frm_filter, text="Filtro:").pack(side=tk.LEFT)
+            ttk.Entry(frm_filter, textvariable=self.var_filter_text).pack(side=tk.LEFT, fill=tk.X, expand=True)
+            ttk.Combobox(frm_filter, textvariable=self.var_filter_type, values=list(FILTER_TYPES),
+                         state="readonly", width=7).pack(side=tk.LEFT, padx=2)
+            ttk.Label(frm_filter, text="ext:").pack(side=tk.LEFT)
+            ttk.Entry(frm_filter, textvariable=self.var_filter_ext, width=6).pack(side=tk.LEFT)
+            for var in (self.var_filter_text, self.var_filter_type, self.var_filter_ext):
+                var.trace_add("write", self.on_filter_changed)
+
+            # a coluna "path" fica escondida: values[0] continua sendo o caminho
+            self.tree = ttk.Treeview(left_frame, columns=("path", "tipo", "tamanho"),
+                                     displaycolumns=("tipo", "tamanho"))
+            self.tree.heading("tipo", text="Tipo")
+            self.tree.heading("tamanho", text="Tamanho")
+            self.tree.column("tipo", width=50, stretch=False)
+            self.tree.column("tamanho", width=80, stretch=False, anchor="e")
             self.tree.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
 
             self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
+            self.tree.bind("<<TreeviewOpen>>", self.on_tree_open)
 
-            scroll_y = ttk.Scrollbar(left_frame, orient=tk.VERTICAL, command=self.tree.yview)
-            self.tree.configure(yscrollcommand=scroll_y.set)
-            scroll_y.pack(side=tk.RIGHT, fill=tk.Y)
+            self.tree_scroll = ttk.Scrollbar(left_frame, orient=tk.VERTICAL, command=self.tree.yview)
+            self.tree.configure(yscrollcommand=self.on_tree_scroll)
+            self.tree_scroll.pack(side=tk.RIGHT, fill=tk.Y)
 
             # Preview area
             right_frame = ttk.Frame(main_pane)
             main_pane.add(right_frame, weight=3)
 
-            self.preview_label = ttk.Label(right_frame, text="Preview")
-            self.preview_label.pack(side=tk.TOP, anchor="w", padx=5, pady=5)
+            frm_preview_top = ttk.Frame(right_frame)
+            frm_preview_top.pack(side=tk.TOP, fill=tk.X)
+
+            self.preview_label = ttk.Label(frm_preview_top, text="Preview")
+            self.preview_label.pack(side=tk.LEFT, anchor="w", padx=5, pady=5)
+
+            self.btn_preview_more = ttk.Button(frm_preview_top, text="Carregar mais",
+                                               command=self.load_more_preview, state=tk.DISABLED)
+            self.btn_preview_more.pack(side=tk.RIGHT, padx=5)
 
             self.preview_text = tk.Text(right_frame, wrap="word")
             self.preview_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -94,32 +174,90 @@ class DecoderApp(tk.Tk):
                 return
 
             self.current_root = Path(folder)
-            self.lbl_root.config(text=str(self.current_root))
+            self.lbl_root.config(text=f"{self.current_root} (indexando...)")
+            self.catalog = None
+            self._clear_tree()
 
-            # limpa tree
-            for item in self.tree.get_children():
-                self.tree.delete(item)
+            # o scan e a montagem do catálogo rodam fora da thread do Tk
+            root = self.current_root
+            result: dict = {}
 
-            # adiciona root
-            root_id = self.tree.insert("", "end", text=str(self.current_root), open=True, values=[str(self.current_root)])
+            def worker():
+                try:
+                    with ScanIndex(root) as index:
+                        result["stats"] = index.refresh()
+                        result["catalog"] = ExplorerCatalog.from_index(index)
+                except (OSError, sqlite3.Error) as e:
+                    result["error"] = e
+
+            thread = threading.Thread(target=worker, daemon=True)
+            thread.start()
+            self.after(POLL_INTERVAL_MS, self._wait_index, root, thread, result)
+
+        def _wait_index(self, root: Path, thread: threading.Thread, result: dict):
+            if thread.is_alive():
+                self.after(POLL_INTERVAL_MS, self._wait_index, root, thread, result)
+                return
+            if root != self.current_root:
+                return  # outra pasta foi selecionada no meio do scan
+
+            if "error" in result:
+                self.lbl_root.config(text=str(root))
+                messagebox.showerror("Erro", f"Falha ao indexar pasta:{result['error']}")
+                return
 
-            self._populate_tree(self.current_root, root_id)
+            self.catalog = result["catalog"]
+            self.lbl_root.config(text=f"{root} ({len(self.catalog.all_files)} arquivos)")
+            self._apply_filter()
+
+        def _clear_tree(self):
+            self.tree.delete(*self.tree.get_children())
+            self.tree_pages.clear()
+
+        def _show_root(self):
+            root = self.current_root
+            root_id = self.tree.insert("", "end", text=str(root), open=True, values=[str(root), "", ""])
+            self._populate_tree(root, root_id)
 
         def _populate_tree(self, directory: Path, parent_id: str):
-            # primeiro subpastas, depois arquivos
-            try:
-                entries = sorted(directory.iterdir(), key=lambda p: (p.is_file(), p.name.lower()))
-            except OSError:
+            # primeiro subpastas, depois arquivos (já ordenados pelo catálogo)
+            if self.catalog is None:
                 return
-
-            for entry in entries:
-                node_id = self.tree.insert(parent_id, "end", text=entry.name, values=[str(entry)], open=False)
-                if entry.is_dir():
+            self._insert_page(parent_id, self.catalog.children(directory), 0)
+
+        def _insert_page(self, parent_id: str, entries: list, start: int, relative: bool = False):
+            """Insere até TREE_PAGE_SIZE entradas; o resto fica atrás de um nó "mais N itens"."""
+            end = start + TREE_PAGE_SIZE
+            for entry in entries[start:end]:
+                text = str(entry.path.relative_to(self.current_root)) if relative else entry.name
+                if entry.is_dir:
+                    node_id = self.tree.insert(parent_id, "end", text=text,
+                                               values=[str(entry.path), "", ""], open=False)
                     # placeholder child para exibir "expand"
-                    self.tree.insert(node_id, "end", text="...", values=["__placeholder__"])
-
-            # bind para quando expandir diretório, carregar filhos reais
-            self.tree.bind("<<TreeviewOpen>>", self.on_tree_open)
+                    self.tree.insert(node_id, "end", text="...", values=[_PLACEHOLDER])
+                else:
+                    self.tree.insert(parent_id, "end", text=text, values=[
+                        str(entry.path), TYPE_LABELS.get(entry.tj_type, ""), format_size(entry.size)])
+            if end < len(entries):
+                more_id = self.tree.insert(parent_id, "end", text=f"... mais {len(entries) - end} itens",
+                                           values=[_MORE, "", ""])
+                self.tree_pages[more_id] = (parent_id, entries, end, relative)
+
+        def _load_more(self, more_id: str):
+            parent_id, entries, start, relative = self.tree_pages.pop(more_id)
+            self.tree.delete(more_id)
+            self._insert_page(parent_id, entries, start, relative)
+
+        def on_tree_scroll(self, first, last):
+            self.tree_scroll.set(first, last)
+            # perto do fim da lista: carrega a próxima página do que estiver visível
+            if self.tree_pages and float(last) > 0.9:
+                self.after_idle(self._load_visible_pages)
+
+        def _load_visible_pages(self):
+            for more_id in list(self.tree_pages):
+                if self.tree.exists(more_id) and self.tree.bbox(more_id):
+                    self._load_more(more_id)
 
         def on_tree_open(self, event):
             item_id = self.tree.focus()
@@ -129,12 +267,34 @@ class DecoderApp(tk.Tk):
             # se primeiro filho é placeholder, removemos e populamos de verdade
             if len(children) == 1:
                 child_values = self.tree.item(children[0], "values")
-                if child_values and child_values[0] == "__placeholder__":
+                if child_values and child_values[0] == _PLACEHOLDER:
                     self.tree.delete(children[0])
                     path_str = self.tree.item(item_id, "values")[0]
-                    path = Path(path_str)
-                    if path.is_dir():
-                        self._populate_tree(path, item_id)
+                    self._populate_tree(Path(path_str), item_id)
+
+        def on_filter_changed(self, *args):
+            if self._filter_job is not None:
+                self.after_cancel(self._filter_job)
+            self._filter_job = self.after(FILTER_DELAY_MS, self._apply_filter)
+
+        def _apply_filter(self):
+            self._filter_job = None
+            if self.catalog is None:
+                return
+            self._clear_tree()
+
+            text = self.var_filter_text.get()
+            ext = self.var_filter_ext.get()
+            tj_type = FILTER_TYPES.get(self.var_filter_type.get())
+            if not text.strip() and not ext.strip() and tj_type is None:
+                self._show_root()
+                return
+
+            # lista plana dos arquivos que batem, também paginada
+            matches = self.catalog.filter(tj_type, ext, text)
+            results_id = self.tree.insert("", "end", text=f"Resultados: {len(matches)} arquivos",
+                                          open=True, values=[str(self.current_root), "", ""])
+            self._insert_page(results_id, matches, 0, relative=True)
 
         # ------------------------------------------------------------------
         # Preview
@@ -144,8 +304,12 @@ class DecoderApp(tk.Tk):
             if not item_id:
                 return
 
+            if item_id in self.tree_pages:
+                self._load_more(item_id)
+                return
+
             values = self.tree.item(item_id, "values")
-            if not values:
+            if not values or values[0] in (_PLACEHOLDER, _MORE):
                 return
 
             path = Path(values[0])
@@ -157,33 +321,61 @@ class DecoderApp(tk.Tk):
         def show_preview(self, path: Path):
             self.preview_text.delete("1.0", tk.END)
             self.image_cache = None
+            self.preview_path = path
+            self.preview_next_offset = None
+            self.btn_preview_more.configure(state=tk.DISABLED)
 
-            self.preview_label.config(text=f"Preview: {path.name}")
+            self.preview_label.config(text=f"Preview: {path.name} (carregando...)")
+            self._request_preview(path, 0)
 
-            # tenta abrir como imagem, se PIL disponível
-            if PIL_AVAILABLE and path.suffix.lower() in (".png", ".jpg", ".jpeg", ".bmp", ".gif"):
-                try:
-                    img = Image.open(path)
-                    img.thumbnail((600, 400))
-                    self.image_cache = ImageTk.PhotoImage(img)
-                    # Limpa Text e coloca uma pequena instrução + imagem
-                    self.preview_text.insert(tk.END, "[Imagem carregada abaixo]")
-                    self.preview_text.image_create(tk.END, image=self.image_cache)
-                    return
-                except Exception as e:
-                    self.preview_text.insert(tk.END, f"[Falha ao carregar imagem: {e}]")
-
-            # senão, tenta abrir como texto
-            try:
-                with path.open("rb") as f:
-                    raw = f.read()
+        def load_more_preview(self):
+            if self.preview_path is None or self.preview_next_offset is None:
+                return
+            self.btn_preview_more.configure(state=tk.DISABLED)
+            self._request_preview(self.preview_path, self.preview_next_offset)
+
+        def _request_preview(self, path: Path, offset: int):
+            # leitura, decode do texto e thumbnail rodam na thread do PreviewWorker
+            self.preview_request = self.preview_worker.submit(path, offset)
+            if not self._preview_polling:
+                self._preview_polling = True
+                self.after(PREVIEW_POLL_MS, self._poll_preview)
+
+        def _poll_preview(self):
+            latest: Optional[PreviewResult] = None
+            while True:
                 try:
-                    text = raw.decode("utf-8")
-                except UnicodeDecodeError:
-                    text = raw.decode("latin-1", errors="replace")
-                self.preview_text.insert(tk.END, text)
-            except Exception as e:
-                self.preview_text.insert(tk.END, f"Erro ao abrir arquivo: {e}")
+                    res = self.preview_worker.results.get_nowait()
+                except queue.Empty:
+                    break
+                if res.request_id == self.preview_request:
+                    latest = res  # os demais são de seleções antigas: descartados
+
+            if latest is None:
+                self.after(PREVIEW_POLL_MS, self._poll_preview)
+                return
+            self._preview_polling = False
+            self._render_preview(latest)
+
+        def _render_preview(self, res: PreviewResult):
+            title = f"Preview: {res.path.name}"
+            if res.tj_type:
+                title += f" ({res.tj_type}, decifrado em memória)"
+            self.preview_label.config(text=title)
+
+            if res.kind == "image":
+                # o PhotoImage precisa ser criado na thread do Tk
+                self.image_cache = ImageTk.PhotoImage(res.image)
+                self.preview_text.insert(tk.END, "[Imagem carregada abaixo]")
+                self.preview_text.image_create(tk.END, image=self.image_cache)
+                return
+
+            self.preview_text.insert(tk.END, res.text)
+            self.preview_next_offset = res.next_offset
+            if res.next_offset is not None:
+                self.preview_label.config(
+                    text=f"{title} [{res.next_offset // 1024} de {res.size // 1024} KB]")
+                self.btn_preview_more.configure(state=tk.NORMAL)
 
         # ------------------------------------------------------------------
         # Decode single
@@ -244,14 +436,30 @@ class DecodeAllDialog(tk.Toplevel):
         def __init__(self, master: DecoderApp, root_folder: Path):
             super().__init__(master)
             self.title("Decode All")
-            self.geometry("600x400")
+            self.geometry("600x450")
             self.root_folder = root_folder
 
             self.var_tj_bang = tk.BooleanVar(value=True)
             self.var_tje = tk.BooleanVar(value=True)
             self.var_tjz = tk.BooleanVar(value=False)
+            self.var_incremental = tk.BooleanVar(value=False)
+            self.var_dedup = tk.BooleanVar(value=False)
+            self.var_auto_key = tk.BooleanVar(value=False)
+            self.var_profile = tk.BooleanVar(value=False)
+            self.var_resume = tk.BooleanVar(value=False)
+            self.var_json = tk.StringVar(value=JSON_CHOICES[0][0])
+            self.var_workers = tk.IntVar(value=os.cpu_count() or 1)
+            self.var_chunk = tk.IntVar(value=DECODE_CHUNK_SIZE)
+            self.var_stats = tk.StringVar(value="")
+
+            self.decoder: Optional[ParallelDecoder] = None
+            self.meter: Optional[ThroughputMeter] = None
+            self.count_ok = 0
+            self.count_err = 0
+            self.contents: Counter = Counter()
 
             self._build_ui()
+            self.protocol("WM_DELETE_WINDOW", self.on_close)
 
         def _build_ui(self):
             frm_opts = ttk.Frame(self)
@@ -259,18 +467,29 @@ class DecodeAllDialog(tk.Toplevel):
 
             ttk.Label(frm_opts, text=f"Pasta raiz: {self.root_folder}").pack(anchor="w")
 
-            ttk.Checkbutton(frm_opts, text="Decodificar tj! (JSON ainda pode ficar ilegível)",
+            ttk.Checkbutton(frm_opts, text="Decodificar tj! (Lua, bytecode LuaJIT, JSON)",
                             variable=self.var_tj_bang).pack(anchor="w")
             ttk.Checkbutton(frm_opts, text="Decodificar tje (imagens, PNG/JPG)",
                             variable=self.var_tje).pack(anchor="w")
-            ttk.Checkbutton(frm_opts, text="Decodificar tjz (experimental)",
+            ttk.Checkbutton(frm_opts, text="Decodificar tjz (experimental, descomprime zlib/gzip/zip)",
                             variable=self.var_tjz).pack(anchor="w")
 
+            ttk.Checkbutton(frm_opts, text="Incremental (pular arquivos inalterados desde o último Decode All)",
+                            variable=self.var_incremental).pack(anchor="w")
+            ttk.Checkbutton(frm_opts, text="Deduplicar (decifra cópias idênticas uma vez e cria hardlinks)",
+                            variable=self.var_dedup).pack(anchor="w")
+            ttk.Checkbutton(frm_opts, text="Detectar base key e header_size (testa o keyring nos menores arquivos)",
+                            variable=self.var_auto_key).pack(anchor="w")
+            ttk.Checkbutton(frm_opts, text="Medir tempo por estágio (scan, leitura, key, XXTEA, gravação)",
+                            variable=self.var_profile).pack(anchor="w")
+            ttk.Checkbutton(frm_opts, text="Retomar (pular o que um Decode All interrompido já concluiu)",
+                            variable=self.var_resume).pack(anchor="w")
+
             lbl_warn = ttk.Label(
                 frm_opts,
                 text=(
                     "Aviso:"
-                    "- JSON (tj!) ainda não foi totalmente analisado, saída pode parecer corrompida."
+                    "- JSON (tj!) inválido sai como decifrado, mesmo com a formatação de JSON."
                     "- TJZ não foi testado, pode falhar."
                 ),
                 foreground="red",
@@ -278,14 +497,36 @@ class DecodeAllDialog(tk.Toplevel):
             )
             lbl_warn.pack(anchor="w", pady=(5, 5))
 
-            btn_run = ttk.Button(frm_opts, text="Iniciar Decode All", command=self.run_decode_all)
-            btn_run.pack(anchor="w", pady=(5, 5))
+            frm_par = ttk.Frame(frm_opts)
+            frm_par.pack(anchor="w", pady=(0, 5))
+            ttk.Label(frm_par, text="Processos:").pack(side=tk.LEFT)
+            ttk.Spinbox(frm_par, from_=1, to=256, width=5,
+                        textvariable=self.var_workers).pack(side=tk.LEFT, padx=(2, 10))
+            ttk.Label(frm_par, text="Arquivos por lote:").pack(side=tk.LEFT)
+            ttk.Spinbox(frm_par, from_=1, to=4096, width=6,
+                        textvariable=self.var_chunk).pack(side=tk.LEFT, padx=(2, 10))
+            ttk.Label(frm_par, text="JSON:").pack(side=tk.LEFT)
+            ttk.Combobox(frm_par, textvariable=self.var_json, state="readonly", width=12,
+                         values=[label for label, _ in JSON_CHOICES]).pack(side=tk.LEFT, padx=2)
+
+            frm_btns = ttk.Frame(frm_opts)
+            frm_btns.pack(anchor="w", pady=(5, 5))
+            self.btn_run = ttk.Button(frm_btns, text="Iniciar Decode All", command=self.run_decode_all)
+            self.btn_run.pack(side=tk.LEFT)
+            self.btn_cancel = ttk.Button(frm_btns, text="Cancelar", command=self.cancel_decode_all,
+                                         state=tk.DISABLED)
+            self.btn_cancel.pack(side=tk.LEFT, padx=5)
+
+            self.progress = ttk.Progressbar(frm_opts, mode="determinate")
+            self.progress.pack(fill=tk.X, pady=(5, 0))
+            ttk.Label(frm_opts, textvariable=self.var_stats).pack(anchor="w")
 
             # Log
             frm_log = ttk.Frame(self)
             frm_log.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
-            self.txt_log = tk.Text(frm_log, wrap="word")
+            # fonte fixa para a tabela de estágios alinhar
+            self.txt_log = tk.Text(frm_log, wrap="word", font="TkFixedFont")
             self.txt_log.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
             scroll_y = ttk.Scrollbar(frm_log, orient=tk.VERTICAL, command=self.txt_log.yview)
@@ -295,39 +536,167 @@ class DecodeAllDialog(tk.Toplevel):
         def log(self, msg: str):
             self.txt_log.insert(tk.END, msg + "\n")
             self.txt_log.see(tk.END)
-            self.update_idletasks()
 
         def run_decode_all(self):
-            from decoder.decode_logic import iter_tj_files, decode_single_file
-
             include_tj_bang = self.var_tj_bang.get()
             include_tje = self.var_tje.get()
             include_tjz = self.var_tjz.get()
+            incremental = self.var_incremental.get()
+            dedup = "link" if self.var_dedup.get() else None
+
+            try:
+                workers = max(1, self.var_workers.get())
+                chunk_size = max(1, self.var_chunk.get())
+            except tk.TclError:
+                messagebox.showwarning("Aviso", "Processos/lote precisam ser números inteiros.", parent=self)
+                return
 
             self.log(f"Iniciando Decode All em: {self.root_folder}")
             self.log(f"  tj!: {include_tj_bang}, tje: {include_tje}, tjz: {include_tjz}")
+            self.log(f"  processos: {workers}, arquivos por lote: {chunk_size}, incremental: {incremental}, "
+                     f"dedup: {bool(dedup)}")
+
+            auto_key = self.var_auto_key.get()
+            if auto_key:
+                # a detecção roda na thread do ParallelDecoder e chega como evento "auto_key"
+                self.log("  key: detecção automática pelo keyring")
             self.log("--------------------------------------------------------")
 
-            count_ok = 0
-            count_err = 0
+            self.count_ok = 0
+            self.count_err = 0
+            self.contents = Counter()
+            self.meter = ThroughputMeter()
+            self.progress.configure(value=0, maximum=1)
+            self.btn_run.configure(state=tk.DISABLED)
+            self.btn_cancel.configure(state=tk.NORMAL)
 
-            for path, t in iter_tj_files(
+            # o índice é atualizado e lido dentro da thread do ParallelDecoder
+            jobs = iter_indexed_tj_files(
                 self.root_folder,
                 include_tj_bang=include_tj_bang,
                 include_tje=include_tje,
                 include_tjz=include_tjz,
-            ):
+            )
+            self.decoder = ParallelDecoder(
+                workers=workers,
+                chunk_size=chunk_size,
+                root=self.root_folder,
+                incremental=incremental,
+                dedup=dedup,
+                profile="stages" if self.var_profile.get() else None,
+                resume=self.var_resume.get(),
+                json_format=dict(JSON_CHOICES)[self.var_json.get()],
+                auto_key=auto_key,
+            )
+            self.decoder.start(jobs)
+            self.after(POLL_INTERVAL_MS, self._poll_events)
+
+        def cancel_decode_all(self):
+            if self.decoder is not None:
+                self.decoder.cancel()
+                self.btn_cancel.configure(state=tk.DISABLED)
+                self.log("Cancelando...")
+
+        def on_close(self):
+            if self.decoder is not None:
+                self.decoder.cancel()
+            self.destroy()
+
+        def _poll_events(self):
+            if self.decoder is None or not self.winfo_exists():
+                return
+
+            lines: list[str] = []
+            finished = None
+            # drena a fila em lotes: um insert no Text por ciclo, não por arquivo
+            deadline = time.monotonic() + 0.05
+            while time.monotonic() < deadline:
                 try:
-                    out_path = decode_single_file(path)
-                    self.log(f"[OK] ({t}) {path} -> {out_path}")
-                    count_ok += 1
-                except Exception as e:
-                    self.log(f"[ERRO] ({t}) {path}: {e}")
-                    count_err += 1
+                    kind, payload = self.decoder.events.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == "total":
+                    self.meter.total = payload
+                    self.progress.configure(maximum=max(payload, 1))
+                    lines.append(f"{payload} arquivos encontrados.")
+                elif kind == "result":
+                    res = payload
+                    self.meter.add(res.size)
+                    if res.ok and res.duplicate_of is not None:
+                        self.count_ok += 1
+                        line = f"[DUP] ({res.tj_type}) {res.path} = {res.duplicate_of} -> {res.out_path}"
+                        lines.append(line)
+                    elif res.ok:
+                        self.count_ok += 1
+                        self.contents[res.content] += 1
+                        line = f"[OK] ({res.tj_type}) {res.path} -> {res.out_path}"
+                        if res.container:
+                            line += f" [{res.container}: {res.plain_size} -> {res.out_size} bytes]"
+                        label = content_label(res.content, res.content_version)
+                        if label:
+                            line += f" [{label}]"
+                        lines.append(line)
+                    else:
+                        self.count_err += 1
+                        lines.append(f"[ERRO] ({res.tj_type}) {res.path}: {res.error}")
+                elif kind == "auto_key":
+                    det = payload
+                    if det is None:
+                        lines.append("[ERRO] Nenhuma base key/header_size do keyring serviu; nada foi decodificado.")
+                    else:
+                        lines.append(f"Key detectada: {det.base_key_hex} / header_size {det.header_size} "
+                                     f"(score {det.score}/{2 * det.files}, {det.seconds:.2f}s)")
+                elif kind == "skipped":
+                    lines.append(f"{payload} arquivos inalterados pulados.")
+                elif kind == "resumed":
+                    lines.append(f"Retomando: {payload} arquivos já concluídos pulados.")
+                elif kind == "pruned":
+                    for out_path in payload:
+                        lines.append(f"[REMOVIDO] {out_path} (fonte apagada)")
+                elif kind == "key_cache":
+                    lines.append(f"Cache de keys: {payload['hits']} hits, {payload['misses']} misses.")
+                elif kind == "dedup":
+                    lines.append(
+                        f"Dedup: {payload['unique']} únicos, {payload['duplicates']} duplicados; "
+                        f"{payload['bytes_saved'] / (1024 * 1024):.1f} MB sem decifrar, "
+                        f"{payload['out_bytes_saved'] / (1024 * 1024):.1f} MB sem gravar, "
+                        f"~{payload['cpu_saved']:.1f}s de CPU poupados.")
+                elif kind == "profile":
+                    lines.append("Tempo por estágio:")
+                    lines.extend(stage_lines(payload))
+                elif kind == "error":
+                    lines.append(f"[ERRO] {payload}")
+                elif kind == "done":
+                    finished = payload
+                    break
+
+            if lines:
+                self.log("\n".join(lines))
+            self._update_stats()
+
+            if finished is None:
+                self.after(POLL_INTERVAL_MS, self._poll_events)
+                return
 
             self.log("--------------------------------------------------------")
-            self.log(f"Concluído. Sucesso: {count_ok}, Erros: {count_err}")
-
+            status = "Cancelado" if finished else "Concluído"
+            self.log(f"{status}. Sucesso: {self.count_ok}, Erros: {self.count_err}")
+            if self.contents:
+                self.log("Conteúdo: " + ", ".join(f"{k} {n}" for k, n in self.contents.most_common()))
+            self.decoder = None
+            self.btn_run.configure(state=tk.NORMAL)
+            self.btn_cancel.configure(state=tk.DISABLED)
+
+        def _update_stats(self):
+            m = self.meter
+            self.progress.configure(value=m.files)
+            total = "?" if m.total is None else str(m.total)
+            eta = m.eta
+            eta_txt = "--" if eta is None else f"{int(eta) // 60:02d}:{int(eta) % 60:02d}"
+            self.var_stats.set(
+                f"{m.files}/{total} arquivos | {m.files_per_sec:.1f} arq/s | "
+                f"{m.mb_per_sec:.2f} MB/s | ETA {eta_txt}"
+            )
 
 def main():
     app = DecoderApp()
@@ -0,0 +1,84 @@
+"""
+Catálogo em memória do explorer, montado uma vez a partir do ScanIndex.
+
+A árvore da GUI lê os filhos de cada pasta daqui (já ordenados, com tipo
+tj e tamanho do scan) e o filtro por tipo/extensão/nome roda sobre a lista
+plana de arquivos, sem varrer o disco nem consultar o SQLite de novo.
+Nada de Tk aqui: o catálogo é montado na thread do scan.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+from decoder.scanner import IndexEntry, ScanIndex
+
+# rótulos da coluna "tipo" (e do filtro)
+TYPE_LABELS = {
+    "tj_bang": "tj!",
+    "tje": "tje",
+    "tjz": "tjz",
+    "unknown": "",
+}
+
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class ExplorerCatalog:
+    """Pastas e arquivos da raiz indexada, agrupados por pasta pai."""
+
+    def __init__(self, root: Path, dirs: dict[str, list[str]], files: dict[str, list[IndexEntry]]):
+        self.root = root
+        self._dirs = dirs
+        self._files = files
+        self.all_files: list[IndexEntry] = [e for entries in files.values() for e in entries]
+        # nomes em minúsculas para o filtro por substring, na mesma ordem
+        self._names_lower = [e.name.lower() for e in self.all_files]
+
+    @classmethod
+    def from_index(cls, index: ScanIndex) -> ExplorerCatalog:
+        dirs: dict[str, list[str]] = {}
+        for parent, rel in index.iter_subdirs():
+            dirs.setdefault(parent, []).append(rel)
+        for children in dirs.values():
+            children.sort(key=lambda rel: rel.rpartition("/")[2].lower())
+
+        files: dict[str, list[IndexEntry]] = {}
+        for rel_dir, entry in index.iter_file_entries():
+            files.setdefault(rel_dir, []).append(entry)
+        for entries in files.values():
+            entries.sort(key=lambda e: e.name.lower())
+        return cls(index.root, dirs, files)
+
+    def _rel(self, directory: Path) -> str:
+        rel = Path(directory).relative_to(self.root).as_posix()
+        return "" if rel == "." else rel
+
+    def children(self, directory: Path) -> list[IndexEntry]:
+        """Filhos de uma pasta: primeiro subpastas, depois arquivos (por nome)."""
+        rel_dir = self._rel(directory)
+        dirs = [IndexEntry(rel.rpartition("/")[2], self.root / rel, True)
+                for rel in self._dirs.get(rel_dir, ())]
+        return dirs + self._files.get(rel_dir, [])
+
+    def filter(self, tj_type: str | None = None, ext: str = "", text: str = "") -> list[IndexEntry]:
+        """Arquivos que batem com tipo tj, extensão e substring do nome (vazios = qualquer)."""
+        ext = ext.lower().strip()
+        if ext and not ext.startswith("."):
+            ext = "." + ext
+        text = text.lower().strip()
+        out = []
+        for entry, name in zip(self.all_files, self._names_lower):
+            if tj_type is not None and entry.tj_type != tj_type:
+                continue
+            if ext and not name.endswith(ext):
+                continue
+            if text and text not in name:
+                continue
+            out.append(entry)
+        return out
@@ -0,0 +1,276 @@
+"""
+Carregamento do preview fora da thread do Tk.
+
+O PreviewWorker tem uma única thread que lê o arquivo, decodifica o texto
+e gera o thumbnail (PIL). Cada pedido recebe um request id; só o pedido
+mais recente fica na fila, então trocar a seleção rápido descarta os
+previews velhos antes mesmo de ler o arquivo. Os resultados vão para uma
+queue.Queue que a GUI drena com after() — nada de Tk aqui.
+
+Arquivos tj!/tje/tjz são decifrados em memória (tjz também é inflado) e
+exibidos direto, sem gravar .dec. Plaintexts e thumbnails ficam num LRU
+limitado em bytes, então voltar a um asset já visto é instantâneo.
+"""
+from __future__ import annotations
+
+import itertools
+import queue
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+
+from decoder.decode_logic import decrypt_tj_file, read_tj_head, tj_type_from_bytes
+from decoder.decompress import detect_container, inflate_bytes
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except Exception:
+    PIL_AVAILABLE = False
+
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".bmp", ".gif")
+
+# tamanho do thumbnail do preview
+THUMBNAIL_SIZE = (600, 400)
+
+# bytes de texto inseridos no tk.Text por página
+TEXT_PAGE_SIZE = 256 * 1024
+
+# orçamento do cache de plaintexts + thumbnails (em bytes, não em itens)
+PREVIEW_CACHE_BYTES = 64 * 1024 * 1024
+
+# o decrypt de um arquivo é sequencial: acima disso o preview não decifra
+MAX_DECRYPT_SIZE = 4 * 1024 * 1024
+
+# tjz inflado para preview é cortado neste tamanho
+MAX_INFLATE_SIZE = 16 * 1024 * 1024
+
+_IMAGE_MAGICS = (b"\x89PNG", b"\xff\xd8\xff", b"GIF8", b"BM")
+
+
+class ByteLRU:
+    """LRU limitado pela soma dos tamanhos dos valores (não pela contagem).
+
+    Usado só pela thread do PreviewWorker, então não tem lock.
+    """
+
+    def __init__(self, max_bytes: int = PREVIEW_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return item[0]
+
+    def put(self, key, value, nbytes: int) -> None:
+        if nbytes > self.max_bytes:
+            return  # maior que o cache inteiro: não vale despejar tudo
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.size -= old[1]
+        self._items[key] = (value, nbytes)
+        self.size += nbytes
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self._items.popitem(last=False)
+            self.size -= evicted
+
+    def clear(self) -> None:
+        self._items.clear()
+        self.size = 0
+
+
+@dataclass
+class PreviewResult:
+    """Preview pronto para a GUI (image é um PIL.Image, não um PhotoImage).
+
+    kind: "text", "image" ou "error". Para texto, offset/next_offset
+    delimitam a página lida; next_offset é None na última página.
+    """
+    request_id: int
+    path: Path
+    kind: str
+    text: str = ""
+    image: object = None
+    offset: int = 0
+    next_offset: int | None = None
+    size: int = 0
+    tj_type: str | None = None
+
+
+def _decode_page(raw: bytes, at_eof: bool) -> tuple[str, int]:
+    """Decodifica uma página como UTF-8 (ou latin-1); retorna (texto, bytes usados).
+
+    Um caractere multibyte cortado no fim da página fica para a próxima.
+    """
+    try:
+        return raw.decode("utf-8"), len(raw)
+    except UnicodeDecodeError as e:
+        if not at_eof and e.reason == "unexpected end of data":
+            return raw[:e.start].decode("utf-8"), e.start
+        return raw.decode("latin-1", errors="replace"), len(raw)
+
+
+def text_page(data, offset: int = 0, page_size: int = TEXT_PAGE_SIZE) -> tuple[str, int | None]:
+    """Uma página de texto de um buffer em memória; retorna (texto, próximo offset ou None)."""
+    raw = bytes(data[offset:offset + page_size])
+    at_eof = offset + len(raw) >= len(data)
+    text, used = _decode_page(raw, at_eof)
+    return text, None if at_eof and used == len(raw) else offset + used
+
+
+def load_text_page(path: Path, offset: int = 0, page_size: int = TEXT_PAGE_SIZE) -> tuple[str, int | None, int]:
+    """Lê uma página de texto; retorna (texto, próximo offset ou None, tamanho do arquivo)."""
+    with path.open("rb") as f:
+        size = f.seek(0, 2)
+        f.seek(offset)
+        raw = f.read(page_size)
+    at_eof = offset + len(raw) >= size
+    text, used = _decode_page(raw, at_eof)
+    next_offset = None if at_eof and used == len(raw) else offset + used
+    return text, next_offset, size
+
+
+def load_thumbnail(source):
+    """Abre a imagem (path ou file-like) e já reduz para THUMBNAIL_SIZE (PIL.Image)."""
+    img = Image.open(source)
+    img.thumbnail(THUMBNAIL_SIZE)
+    return img
+
+
+def _thumbnail_bytes(img) -> int:
+    return img.width * img.height * len(img.getbands())
+
+
+def _decrypted_payload(path: Path, head: bytes, file_key: tuple, cache: ByteLRU) -> bytes:
+    """Plaintext de um arquivo tj (tjz já inflado), via cache."""
+    plain = cache.get(("plain",) + file_key)
+    if plain is not None:
+        return plain
+    if file_key[1] > MAX_DECRYPT_SIZE:
+        raise ValueError(f"arquivo cifrado grande demais para preview ({file_key[1] // 1024} KB); "
+                         "use \"Decodificar arquivo selecionado\"")
+    plain, tj_type = decrypt_tj_file(path, head=head)
+    if tj_type == "tjz":
+        container = detect_container(plain)
+        if container not in (None, "zip"):
+            try:
+                plain = inflate_bytes(plain, container, MAX_INFLATE_SIZE)
+            except ValueError:
+                pass  # falso positivo do magic: mostra o plaintext como está
+    cache.put(("plain",) + file_key, plain, len(plain))
+    return plain
+
+
+def _load_decrypted(request_id: int, path: Path, offset: int, head: bytes,
+                    file_key: tuple, cache: ByteLRU) -> PreviewResult:
+    tj_type = tj_type_from_bytes(head)
+    try:
+        plain = _decrypted_payload(path, head, file_key, cache)
+    except (OSError, ValueError) as e:
+        return PreviewResult(request_id, path, "error", text=f"Falha ao decifrar ({tj_type}): {e}",
+                             tj_type=tj_type)
+
+    error = ""
+    if offset == 0 and PIL_AVAILABLE and plain[:4].startswith(_IMAGE_MAGICS):
+        img = cache.get(("thumb",) + file_key)
+        try:
+            if img is None:
+                img = load_thumbnail(BytesIO(plain))
+                cache.put(("thumb",) + file_key, img, _thumbnail_bytes(img))
+            return PreviewResult(request_id, path, "image", image=img, tj_type=tj_type)
+        except Exception as e:
+            error = f"[Falha ao carregar imagem: {e}]\n"
+
+    text, next_offset = text_page(plain, offset)
+    return PreviewResult(request_id, path, "text", text=error + text, offset=offset,
+                         next_offset=next_offset, size=len(plain), tj_type=tj_type)
+
+
+def load_preview(request_id: int, path: Path, offset: int = 0, cache: ByteLRU | None = None) -> PreviewResult:
+    """Monta o preview de um arquivo (imagem se possível, senão uma página de texto).
+
+    Arquivos tj!/tje/tjz são decifrados em memória antes.
+    """
+    if cache is None:
+        cache = ByteLRU(0)
+    try:
+        st = path.stat()
+        head = read_tj_head(path)
+    except OSError as e:
+        return PreviewResult(request_id, path, "error", text=f"Erro ao abrir arquivo: {e}")
+    file_key = (str(path), st.st_size, st.st_mtime_ns)
+
+    if tj_type_from_bytes(head) != "unknown":
+        return _load_decrypted(request_id, path, offset, head, file_key, cache)
+
+    error = ""
+    if offset == 0 and PIL_AVAILABLE and path.suffix.lower() in IMAGE_SUFFIXES:
+        img = cache.get(("thumb",) + file_key)
+        try:
+            if img is None:
+                img = load_thumbnail(path)
+                cache.put(("thumb",) + file_key, img, _thumbnail_bytes(img))
+            return PreviewResult(request_id, path, "image", image=img)
+        except Exception as e:
+            error = f"[Falha ao carregar imagem: {e}]\n"
+
+    try:
+        text, next_offset, size = load_text_page(path, offset)
+    except Exception as e:
+        return PreviewResult(request_id, path, "error", text=f"{error}Erro ao abrir arquivo: {e}")
+    return PreviewResult(request_id, path, "text", text=error + text, offset=offset,
+                         next_offset=next_offset, size=size)
+
+
+class PreviewWorker:
+    """Thread única de preview; só o pedido mais recente é atendido."""
+
+    def __init__(self, cache_bytes: int = PREVIEW_CACHE_BYTES):
+        self.results: queue.Queue = queue.Queue()
+        self.cache = ByteLRU(cache_bytes)
+        self._ids = itertools.count(1)
+        self._pending: tuple | None = None
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, path: Path, offset: int = 0) -> int:
+        """Agenda o preview de `path` e retorna o request id.
+
+        Um pedido ainda não iniciado é substituído (descartado) por este.
+        """
+        request_id = next(self._ids)
+        with self._cond:
+            self._pending = (request_id, path, offset)
+            self._cond.notify()
+        return request_id
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                request_id, path, offset = self._pending
+                self._pending = None
+            self.results.put(load_preview(request_id, path, offset, self.cache))